@@ -0,0 +1,217 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Dimensions the dashboard tabs group Weekly_Sales by
+DIMENSIONS = ['Date', 'Dept', 'Store', 'Month', 'Season', 'Holiday_Flag', 'IsPromoWeek']
+
+# Two-level breakdowns (used by the Promo vs Non-Promo chart)
+CROSS_DIMENSIONS = [('Date', 'IsPromoWeek')]
+
+# Order of the rows kept for filtered views: every Year x Store x Dept is one contiguous block.
+# Load the data with load_sales_data(..., sort_by=INDEX_KEYS) so the frame is already in this order.
+INDEX_KEYS = ['Year', 'Store', 'Dept']
+
+# Columns the filtered views aggregate
+SEGMENT_COLUMNS = list(dict.fromkeys(INDEX_KEYS + DIMENSIONS + ['Weekly_Sales']))
+
+
+def _build_cubes(df):
+    """Weekly_Sales totals and counts by Year x each dimension, as {year: {dimension: frame}}."""
+    cubes = {}
+    for dims in DIMENSIONS + CROSS_DIMENSIONS:
+        keys = ['Year'] + ([dims] if isinstance(dims, str) else list(dims))
+        grouped = (df.groupby(keys, observed=True)['Weekly_Sales']
+                     .agg(['sum', 'count'])
+                     .rename(columns={'sum': 'Weekly_Sales'}))
+        for year, frame in grouped.groupby(level='Year'):
+            cubes.setdefault(int(year), {})[dims] = frame.droplevel('Year')
+
+    for year, cube in cubes.items():
+        cube['total'] = cube['Date'][['Weekly_Sales', 'count']].sum()
+    return cubes
+
+
+# Appended segments are merged once there are more than this many
+MAX_SEGMENTS = 8
+
+
+def _is_sorted(keys):
+    """Whether the rows of a 2-D key array are in lexicographic order."""
+    if len(keys) < 2:
+        return True
+    # Consecutive rows are in order if the first column that differs increases
+    diff = np.sign(np.diff(keys, axis=0))
+    first = diff[np.arange(len(diff)), np.argmax(diff != 0, axis=1)]
+    return bool((first >= 0).all())
+
+
+def _index_segment(df):
+    """Rows sorted by Year, Store and Dept plus the offset table of their Year x Store x Dept blocks.
+
+    A frame that is already in that order (e.g. the memory-mapped cache) is
+    used as it is, so the index adds only the offset table; other frames are
+    copied in sorted order.
+    """
+    keys = np.column_stack([df[key].to_numpy(dtype=np.int64) for key in INDEX_KEYS])
+    if _is_sorted(keys):
+        # Blocks are row positions, so the frame is used without copying or resetting its index
+        rows = df
+    else:
+        order = np.lexsort(keys.T[::-1])
+        rows = df[SEGMENT_COLUMNS].take(order).reset_index(drop=True)
+        keys = keys[order]
+
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    blocks = pd.DataFrame(keys[starts], columns=INDEX_KEYS)
+    blocks['start'] = starts
+    blocks['stop'] = np.r_[starts[1:], len(keys)]
+    return rows, blocks
+
+
+# Everything the readers use, published together so a reader never mixes old and new data
+_Data = namedtuple('_Data', ['cubes', 'segments', 'store_types', 'last_dates'])
+
+
+class SalesAggregates:
+    """Pre-aggregated Weekly_Sales totals and counts keyed by Year x dimension.
+
+    Built once at startup so the dashboard callbacks only do dictionary
+    lookups instead of re-filtering and re-grouping the full dataframe.
+
+    For Store/Dept/Type filters the rows are also kept sorted by Year, Store
+    and Dept with an offset table of where each Year x Store x Dept block
+    starts, so `select` gathers only the selected blocks (O(selected rows))
+    and aggregates those.
+
+    New weeks are added with `append`, which folds their totals into the
+    cubes and indexes them as a separate segment, so the cost depends on the
+    new rows only. `append` builds the new state aside and publishes it with
+    one reference swap, so callbacks running in other threads see either
+    the data before or after the new week, never a mix.
+    """
+
+    def __init__(self, df):
+        self._data = _Data(
+            cubes=_build_cubes(df),
+            segments=[_index_segment(df)],
+            store_types=df.groupby('Store', observed=True)['Type'].first().astype(object),
+            last_dates=df.groupby('Store', observed=True)['Date'].max(),
+        )
+        self._append_lock = threading.Lock()
+
+    def append(self, df):
+        """Add new rows (e.g. one week of sales) to the cubes and the index."""
+        with self._append_lock:
+            data = self._data
+            # Copy the dicts and replace changed frames; the published ones are never modified
+            cubes = {year: dict(cube) for year, cube in data.cubes.items()}
+            for year, cube in _build_cubes(df).items():
+                current = cubes.get(year)
+                if current is None:
+                    cubes[year] = cube
+                    continue
+                for dims in DIMENSIONS + CROSS_DIMENSIONS:
+                    merged = current[dims].add(cube[dims], fill_value=0)
+                    current[dims] = merged.astype({'count': 'int64'})
+                current['total'] = current['Date'][['Weekly_Sales', 'count']].sum()
+
+            segments = data.segments + [_index_segment(df)]
+            if len(segments) > MAX_SEGMENTS:
+                # Merge the appended segments (never the initial one) into one
+                merged = pd.concat([rows[SEGMENT_COLUMNS] for rows, _ in segments[1:]], ignore_index=True)
+                segments = segments[:1] + [_index_segment(merged)]
+
+            types = df.groupby('Store', observed=True)['Type'].first().astype(object)
+            last_dates = df.groupby('Store', observed=True)['Date'].max()
+            self._data = _Data(
+                cubes=cubes,
+                segments=segments,
+                store_types=data.store_types.combine_first(types),
+                last_dates=pd.concat([data.last_dates, last_dates]).groupby(level=0).max(),
+            )
+
+    @property
+    def years(self):
+        """Sorted list of the years available in the data."""
+        return sorted(self._data.cubes)
+
+    @property
+    def stores(self):
+        return sorted(self._data.store_types.index.tolist())
+
+    @property
+    def depts(self):
+        return sorted(set().union(*(blocks['Dept'].unique().tolist() for _, blocks in self._data.segments)))
+
+    @property
+    def types(self):
+        return sorted(self._data.store_types.unique().tolist())
+
+    @property
+    def store_types(self):
+        """Type of every store, indexed by Store."""
+        return self._data.store_types
+
+    @property
+    def last_dates(self):
+        """Latest Date with sales for every store, indexed by Store."""
+        return self._data.last_dates
+
+    def year(self, selected_year):
+        """Return the aggregates for one year as a dict keyed by dimension."""
+        return self._data.cubes[int(selected_year)]
+
+    def stores_for(self, stores=None, types=None, store_types=None):
+        """Sorted stores matching both filters (None means no store filter)."""
+        if not stores and not types:
+            return None
+        store_types = self._data.store_types if store_types is None else store_types
+        selected = set(store_types.index if not stores else stores)
+        if types:
+            selected &= set(store_types.index[store_types.isin(types)])
+        return sorted(selected)
+
+    def rows(self, selected_year, stores=None, depts=None, types=None):
+        """Source rows of one year for the selected stores, departments and store types."""
+        data = self._data
+        stores = self.stores_for(stores, types, data.store_types)
+        selected = []
+        for rows, blocks in data.segments:
+            mask = blocks['Year'].to_numpy() == int(selected_year)
+            if stores is not None:
+                mask &= np.isin(blocks['Store'].to_numpy(), stores)
+            if depts:
+                mask &= np.isin(blocks['Dept'].to_numpy(), depts)
+
+            starts = blocks['start'].to_numpy()[mask]
+            stops = blocks['stop'].to_numpy()[mask]
+            # Expand the [start, stop) blocks into row positions without a Python loop
+            lengths = stops - starts
+            positions = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths) + np.arange(lengths.sum())
+            selected.append(rows.take(positions)[SEGMENT_COLUMNS])
+        return selected[0] if len(selected) == 1 else pd.concat(selected, ignore_index=True)
+
+    def select(self, selected_year, stores=None, depts=None, types=None):
+        """Aggregates for one year, restricted to the selected stores, departments and store types.
+
+        Without filters this is the precomputed `year()` cube. A selection with
+        no rows returns None.
+        """
+        if not (stores or depts or types):
+            return self.year(selected_year)
+        rows = self.rows(selected_year, stores, depts, types)
+        return _build_cubes(rows).get(int(selected_year)) if len(rows) else None
+
+
+def sales_by(cube, dims):
+    """Total Weekly_Sales by the given dimension(s) as a flat dataframe."""
+    return cube[dims][['Weekly_Sales']].reset_index()
+
+
+def mean_sales_by(cube, dims):
+    """Average Weekly_Sales (per row of the source data) by the given dimension(s)."""
+    frame = cube[dims]
+    return (frame['Weekly_Sales'] / frame['count']).rename('Weekly_Sales').reset_index()
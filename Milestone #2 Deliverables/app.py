@@ -1,26 +1,129 @@
-from dash import Dash, dcc, html, Input, Output
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dash import Dash, dcc, html, Input, Output, State, ctx, no_update
 import dash_bootstrap_components as dbc
-import pandas as pd
-from overview import render_overview  # Import the Overview tab
-from sales_trends import render_sales_trends  # Import the Sales Trends tab
-from department_performance import render_department_performance  # Import the Department Performance tab
-from seasonality_analysis import render_seasonality_analysis  # Import the Seasonality Analysis tab
+from flask import Response, jsonify
+from callback_cache import CallbackCache, log_callback
 
-# Load data
-df = pd.read_csv('../walmart_cleaned.csv')
+# The forecast store and the stage timers live with the SmartCast code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #4 Deliverables'))
+from instrumentation import REGISTRY, PROMETHEUS_CONTENT_TYPE, timer, timed  # noqa: E402
 
-# Prepare Date column (same as in your previous code)
-if 'Date' in df.columns:
-    df['Date'] = pd.to_datetime(df['Date'])
-else:
-    df['Date'] = pd.to_datetime(df['Year'].astype(str) + df['WeekOfYear'].astype(str) + '0', format='%Y%W%w')
+DATA_FILE = '../walmart_cleaned.csv'
+FORECAST_DB = '../forecasts.db'
+INGEST_INTERVAL_SECONDS = 60
 
-# Get list of available years
-years_available = df['Year'].unique()
-years_available.sort()
+# Filled in by load_dashboard() in the background; callbacks check data_ready() first
+data_version = aggregates = ingestor = forecasts = None
+render_overview = render_sales_trends = render_department_performance = render_seasonality_analysis = None
+
+
+def load_dashboard():
+    """Import the data and tab modules, load the sales data and build the aggregates."""
+    global data_version, aggregates, ingestor, forecasts
+    global render_overview, render_sales_trends, render_department_performance, render_seasonality_analysis
+    # pandas, pyarrow and the tab modules are imported here, so the server starts without them
+    from data_loader import load_sales_data, file_digest
+    from aggregates import SalesAggregates, INDEX_KEYS
+    from ingest import WeeklyIngestor
+    from forecast_store import ForecastStore
+    import overview, sales_trends, department_performance, seasonality_analysis  # noqa: E401
+
+    # Time every tab renderer (p50/p95/p99 per tab on /metrics)
+    render_overview = timed('render_overview')(overview.render_overview)
+    render_sales_trends = timed('render_sales_trends')(sales_trends.render_sales_trends)
+    render_department_performance = timed('render_department_performance')(
+        department_performance.render_department_performance)
+    render_seasonality_analysis = timed('render_seasonality_analysis')(seasonality_analysis.render_seasonality_analysis)
+
+    # Load data (typed columns and parsed Date, cached in ../.cache after the first run). The cache
+    # is memory-mapped, so gunicorn workers share one copy of the data through the page cache, and
+    # stored in the aggregates' index order, so the mapped frame is the row index of filtered views.
+    with timer('data_load'):
+        data_version = file_digest(DATA_FILE)
+        df = load_sales_data(DATA_FILE, memory_map=True, digest=data_version, sort_by=INDEX_KEYS)
+
+    # Pre-aggregate once so the callbacks never scan the full dataframe
+    with timer('aggregates_build'):
+        aggregates = SalesAggregates(df)
+
+    # Weeks added after the CSV export (dropped in ../data/incoming) are appended to the aggregates
+    ingestor = WeeklyIngestor(aggregates)
+    with timer('ingest_sync'):
+        ingestor.sync()
+
+    # Stored forecast runs (written by forecasting.py / batch_scoring.py --store), if any
+    forecasts = ForecastStore(FORECAST_DB) if os.path.exists(FORECAST_DB) else None
+
+
+_loading = None
+_loading_lock = threading.Lock()
+
+
+def start_loading():
+    """Start load_dashboard() in a background thread (once per process) and return its future.
+
+    Called when a gunicorn worker is forked (see gunicorn.conf.py), on the first request otherwise,
+    so the server accepts connections while the data loads.
+    """
+    global _loading
+    with _loading_lock:
+        if _loading is None:
+            _loading = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dashboard-load').submit(load_dashboard)
+    return _loading
+
+
+def loading_status():
+    if _loading is None or not _loading.done():
+        return 'warming'
+    return 'failed' if _loading.exception() is not None else 'ready'
+
+
+def data_ready():
+    return loading_status() == 'ready'
+
+
+# Rendered tabs are cached on disk for all workers; entries are dropped when the
+# sales file, the ingested weeks or the latest forecast run change
+callback_cache = CallbackCache(
+    '../.cache/callbacks',
+    version=lambda: (f'{data_version}:{ingestor.version}:'
+                     f'{forecasts.latest_run() if forecasts is not None else None}')
+)
+
+REGISTRY.gauge('callback_cache_hits', lambda: callback_cache.hits)
+REGISTRY.gauge('callback_cache_misses', lambda: callback_cache.misses)
 
 # Start Dash app
 app = Dash(__name__, external_stylesheets=[dbc.themes.LITERA])
+server = app.server  # WSGI entry point: gunicorn -c gunicorn.conf.py app:server
+
+@server.before_request
+def start_loading_on_request():
+    start_loading()
+
+# Health checks: /health answers as soon as the server is up (with the loading status), /ready once the data is loaded
+@server.route('/health')
+def health():
+    status = loading_status()
+    return jsonify(status=status), 500 if status == 'failed' else 200
+
+@server.route('/ready')
+def ready():
+    status = loading_status()
+    return jsonify(status=status), 200 if status == 'ready' else 503
+
+# Stage timings of this worker process, for Prometheus and as JSON
+@server.route('/metrics')
+def metrics():
+    return Response(REGISTRY.to_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@server.route('/metrics.json')
+def metrics_json():
+    return Response(REGISTRY.to_json(), content_type='application/json')
 
 # Layout
 app.layout = html.Div([
@@ -50,34 +153,136 @@ app.layout = html.Div([
                 html.Label('Select Year:', className="fw-bold"),
                 dcc.Dropdown(
                     id='year-dropdown',
-                    options=[{'label': str(year), 'value': year} for year in years_available],
-                    value=years_available[0],
                     clearable=False
                 ),
-            ], width=4)
+            ], width=3),
+            dbc.Col([
+                html.Label('Stores:', className="fw-bold"),
+                dcc.Dropdown(
+                    id='store-dropdown',
+                    multi=True,
+                    placeholder='All stores'
+                ),
+            ], width=3),
+            dbc.Col([
+                html.Label('Departments:', className="fw-bold"),
+                dcc.Dropdown(
+                    id='dept-dropdown',
+                    multi=True,
+                    placeholder='All departments'
+                ),
+            ], width=3),
+            dbc.Col([
+                html.Label('Store Types:', className="fw-bold"),
+                dcc.Dropdown(
+                    id='type-dropdown',
+                    multi=True,
+                    placeholder='All types'
+                ),
+            ], width=3)
         ], className="mb-4"),
 
+        # Shown while the sales data is still loading
+        html.Div('Loading sales data...', id='startup-status', className='alert alert-info text-center my-4'),
+        dcc.Interval(id='startup-interval', interval=1000),
+
         # Dynamic Content Section
-        html.Div(id='tabs-content')
+        html.Div(id='tabs-content'),
+
+        # Periodic check for newly ingested weeks
+        dcc.Interval(id='ingest-interval', interval=INGEST_INTERVAL_SECONDS * 1000),
+        dcc.Store(id='data-version')
 
     ], fluid=True)
 ])
 
-# Callback to render content based on selected tab
+def filter_options():
+    """Options of the year, store, department and store type dropdowns for the current data."""
+    return (
+        [{'label': str(year), 'value': year} for year in aggregates.years],
+        [{'label': f'Store {store}', 'value': store} for store in aggregates.stores],
+        [{'label': f'Dept {dept}', 'value': dept} for dept in aggregates.depts],
+        [{'label': f'Type {store_type}', 'value': store_type} for store_type in aggregates.types],
+    )
+
+# Callback to fill in the filters once the data is loaded, and to pick up newly ingested weeks without a restart
+@app.callback(
+    Output('data-version', 'data'),
+    Output('year-dropdown', 'options'),
+    Output('year-dropdown', 'value'),
+    Output('store-dropdown', 'options'),
+    Output('dept-dropdown', 'options'),
+    Output('type-dropdown', 'options'),
+    Output('startup-status', 'children'),
+    Output('startup-status', 'style'),
+    Output('startup-interval', 'disabled'),
+    Input('startup-interval', 'n_intervals'),
+    Input('ingest-interval', 'n_intervals'),
+    State('year-dropdown', 'value')
+)
+@timed('callback_refresh_data')
+def refresh_data(startup_intervals, ingest_intervals, selected_year):
+    status = loading_status()
+    if status == 'warming':
+        return (no_update,) * 9
+    if status == 'failed':
+        message = f'Failed to load the sales data: {_loading.exception()}'
+        return (no_update,) * 6 + (message, no_update, True)
+
+    # Apply new weeks first, so the options below include any new year, store, department or type
+    applied = ingestor.sync()
+    if ctx.triggered_id == 'ingest-interval' and not applied:
+        return (no_update,) * 9
+    options = filter_options()
+    if ctx.triggered_id == 'ingest-interval':
+        return (ingestor.version, options[0], no_update) + options[1:] + (no_update,) * 3
+
+    # Page load (or the data just finished loading): fill in every filter and hide the status
+    return (
+        ingestor.version,
+        options[0],
+        selected_year if selected_year in aggregates.years else aggregates.years[0],
+        *options[1:],
+        None,
+        {'display': 'none'},
+        True,
+    )
+
+# Callback to render content based on selected tab and filters
 @app.callback(
     Output('tabs-content', 'children'),
     Input('tabs', 'value'),
-    Input('year-dropdown', 'value')
+    Input('year-dropdown', 'value'),
+    Input('store-dropdown', 'value'),
+    Input('dept-dropdown', 'value'),
+    Input('type-dropdown', 'value'),
+    Input('data-version', 'data')
 )
-def render_content(tab, selected_year):
+@log_callback
+@timed('callback_render_content')
+def render_content(tab, selected_year, stores=None, depts=None, types=None, version=None):
+    if not data_ready() or selected_year is None:
+        return None
+    # This worker may not have applied the latest ingested weeks yet
+    ingestor.sync()
+    # Sorted, so the same selection made in a different order hits the same cache entry
+    return render_tab(tab, selected_year, sorted(stores or []), sorted(depts or []), sorted(types or []))
+
+@callback_cache.memoize
+def render_tab(tab, selected_year, stores, depts, types):
+    filters = {'stores': stores, 'depts': depts, 'types': types}
     if tab == 'tab-overview':
-        return render_overview(selected_year, df)
+        return render_overview(selected_year, aggregates, filters)
     elif tab == 'tab-sales-trends':
-        return render_sales_trends(selected_year, df)
+        return render_sales_trends(selected_year, aggregates, forecasts, filters)
     elif tab == 'tab-department-performance':
-        return render_department_performance(selected_year, df)
+        return render_department_performance(selected_year, aggregates, filters)
     elif tab == 'tab-seasonality-analysis':
-        return render_seasonality_analysis(selected_year, df)
+        return render_seasonality_analysis(selected_year, aggregates, filters)
 
 if __name__ == '__main__':
+    # Set DASHBOARD_LOG_LEVEL=DEBUG to log per-figure and per-callback payload sizes
+    logging.basicConfig(level=os.environ.get('DASHBOARD_LOG_LEVEL', 'INFO'),
+                        format='%(asctime)s %(name)s %(message)s')
+    start_loading()
     app.run(debug=True)
@@ -0,0 +1,169 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import plotly
+
+logger = logging.getLogger(__name__)
+
+# Empty file in each version directory; its mtime orders the versions
+CREATED_MARKER = '.created'
+
+
+class CallbackCache:
+    """Memoizes Dash callback results in files shared by every worker process.
+
+    Entries live in `<directory>/<version>/`, where the version identifies
+    the data the results were computed from (e.g. the sales file digest and
+    the latest forecast run). When the version changes, lookups go to a new
+    directory and the older ones are removed, so stale views are never served.
+    Files are written atomically, so concurrent workers can fill the same
+    cache without locking. Values are stored as Plotly JSON and come back as
+    the plain dicts Dash would send to the browser anyway; nothing read from
+    the shared directory is unpickled.
+
+        cache = CallbackCache('../.cache/callbacks', version=lambda: data_version)
+
+        @cache.memoize
+        def render_content(tab, selected_year):
+            ...
+    """
+
+    def __init__(self, directory, version):
+        self.directory = directory
+        self._version = version
+        self._current = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self):
+        version = self._version() if callable(self._version) else self._version
+        version = str(version)
+        if version != self._current:
+            with self._lock:
+                if version != self._current:
+                    created = self._create(version)
+                    self._current = version
+                    self._remove_older_versions(version, created)
+        return version
+
+    def _path(self, version, key=None):
+        digest = hashlib.sha256(version.encode()).hexdigest()[:16]
+        directory = os.path.join(self.directory, digest)
+        return directory if key is None else os.path.join(directory, f'{key}.json')
+
+    def _created(self, directory):
+        """When a version directory was first created (its marker file is never rewritten)."""
+        try:
+            return os.stat(os.path.join(directory, CREATED_MARKER)).st_mtime_ns
+        except FileNotFoundError:
+            return os.stat(directory).st_mtime_ns
+
+    def _create(self, version):
+        """Create the directory for `version` if no worker has yet; returns its creation time."""
+        directory = self._path(version)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            os.close(os.open(os.path.join(directory, CREATED_MARKER), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            pass
+        return self._created(directory)
+
+    def _remove_older_versions(self, version, created):
+        """Remove the entries of the versions created before `version`.
+
+        Newer versions stay: another worker may already have switched to them
+        while this one still reports an older version. The emptied directories
+        keep their marker, so a worker switching late to a retired version
+        still sees it as older than the ones that replaced it.
+        """
+        keep = os.path.basename(self._path(version))
+        for name in os.listdir(self.directory):
+            directory = os.path.join(self.directory, name)
+            try:
+                if name == keep or self._created(directory) >= created:
+                    continue
+                for entry in os.listdir(directory):
+                    if entry != CREATED_MARKER:
+                        os.remove(os.path.join(directory, entry))
+            except FileNotFoundError:
+                # Removed by another worker in the meantime
+                pass
+
+    @staticmethod
+    def key(name, args, kwargs=None):
+        return hashlib.sha256(repr((name, args, sorted((kwargs or {}).items()))).encode()).hexdigest()
+
+    def get(self, key, version=None):
+        """Cached value for `key` under `version` (default: the current one), or None."""
+        try:
+            with open(self._path(version or self.version, key), encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value, version=None):
+        path = self._path(version or self.version, key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f, cls=plotly.utils.PlotlyJSONEncoder)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # The version changed and its directory was removed while writing
+            pass
+
+    def memoize(self, func):
+        """Decorator returning cached results for calls with the same arguments."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self.key(func.__name__, args, kwargs)
+            # The version callable may query the database, so evaluate it once per call
+            version = self.version
+            value = self.get(key, version)
+            if value is None:
+                value = func(*args, **kwargs)
+                self.put(key, value, version)
+            return value
+        return wrapper
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._current = None
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0}
+
+
+def log_callback(func):
+    """Log how long a Dash callback took and how large its JSON response was (DEBUG level).
+
+    Measuring the size serializes the response a second time, so it only
+    happens when DEBUG logging is enabled; callback times are always on
+    /metrics.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        if logger.isEnabledFor(logging.DEBUG):
+            elapsed = (time.perf_counter() - start) * 1000
+            payload = len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+            logger.debug('callback %s%r: %.1f ms, %.1f KB', func.__name__, args, elapsed, payload / 1024)
+        return result
+    return wrapper
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather  # needed by pandas for the Feather cache
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Compact dtypes for the columns of walmart_cleaned.csv / walmart_cleaned_machine.csv.
+# Weekly_Sales stays float64 so the dashboard totals keep full precision.
+COLUMN_DTYPES = {
+    'Store': 'int16',
+    'Dept': 'int16',
+    'Holiday_Flag': 'int8',
+    'Temperature': 'float32',
+    'Fuel_Price': 'float32',
+    'CPI': 'float32',
+    'Unemployment': 'float32',
+    'Type': 'category',
+    'Size': 'int32',
+    'Month': 'int8',
+    'Year': 'int16',
+    'WeekOfYear': 'int8',
+    'Quarter': 'int8',
+    'Season': 'int8',
+    'IsPromoWeek': 'bool',
+}
+
+CACHE_SUFFIX = '.feather'
+# Uncompressed Arrow cache that can be memory-mapped (shared page cache across processes)
+MMAP_SUFFIX = '.arrow'
+
+
+def file_digest(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prepare_sales_frame(df):
+    """Downcast the numeric columns and build the datetime column in place."""
+    for col, dtype in COLUMN_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+
+    # Prepare Date column
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    elif 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], format='mixed')
+    else:
+        df['Date'] = pd.to_datetime(df['Year'].astype(str) + df['WeekOfYear'].astype(str) + '0', format='%Y%W%w')
+    return df
+
+
+def cache_path_for(csv_path, digest, cache_dir=None, suffix=CACHE_SUFFIX, sort_by=None):
+    """Location of the columnar cache for a given CSV file, content hash and row order."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.cache')
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    order = f".by-{'-'.join(sort_by)}" if sort_by else ''
+    return os.path.join(cache_dir, f'{stem}.{digest[:16]}{order}{suffix}')
+
+
+def _remove_stale_caches(csv_path, digest, cache_dir, suffix=CACHE_SUFFIX):
+    """Remove caches of older versions of the CSV (caches of this version in another row order stay)."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    for name in os.listdir(cache_dir):
+        if name.startswith(stem + '.') and name.endswith(suffix) and not name.startswith(f'{stem}.{digest[:16]}.'):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def _sorted(df, sort_by):
+    return df.sort_values(list(sort_by), kind='stable', ignore_index=True) if sort_by else df
+
+
+def _read_mapped(cache_path):
+    """Read an uncompressed Arrow cache through a memory map.
+
+    Numeric and datetime columns without nulls are wrapped without copying, so
+    their pages live in the OS page cache and are shared by every process that
+    maps the same file.
+    """
+    table = feather.read_table(cache_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def load_sales_data(csv_path, cache_dir=None, use_cache=True, memory_map=False, digest=None, sort_by=None):
+    """Load a sales CSV through a typed Feather (Arrow) cache.
+
+    The first call parses the CSV, downcasts the columns and writes the result
+    next to the source file in a `.cache` directory. Later calls read the cache
+    directly as long as the CSV content (SHA-256) is unchanged. Without pyarrow
+    the CSV is parsed every time.
+
+    With memory_map=True the cache is written uncompressed and memory-mapped,
+    so several worker processes share one copy of the data. `digest` can pass
+    an already computed file_digest(csv_path).
+
+    `sort_by` (column names) stores the rows in that order (stable, so rows
+    with equal keys keep their CSV order). Sorting once in the cache lets
+    callers that need sorted rows use the memory-mapped frame as it is
+    instead of keeping a sorted copy per process.
+    """
+    if not (use_cache and HAS_PYARROW):
+        return _sorted(prepare_sales_frame(pd.read_csv(csv_path)), sort_by)
+
+    suffix = MMAP_SUFFIX if memory_map else CACHE_SUFFIX
+    digest = digest or file_digest(csv_path)
+    cache_path = cache_path_for(csv_path, digest, cache_dir, suffix, sort_by)
+    if not os.path.exists(cache_path):
+        df = _sorted(prepare_sales_frame(pd.read_csv(csv_path)), sort_by)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        if memory_map:
+            # One uncompressed chunk per column, so columns can be used in place
+            df.to_feather(tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+        else:
+            df.to_feather(tmp_path)
+        os.replace(tmp_path, cache_path)
+        _remove_stale_caches(csv_path, digest, os.path.dirname(cache_path), suffix)
+        if not memory_map:
+            return df
+    return _read_mapped(cache_path) if memory_map else pd.read_feather(cache_path)
@@ -1,11 +1,14 @@
 from dash import Dash, dcc, html
-import plotly.express as px
+from aggregates import sales_by
+from figures import no_data
 
-def render_department_performance(selected_year, df):
-    filtered_df = df[df['Year'] == selected_year]
+def render_department_performance(selected_year, aggregates, filters=None):
+    cube = aggregates.select(selected_year, **(filters or {}))
+    if cube is None:
+        return no_data()
     
     # Performance by Department Content
-    department_sales = filtered_df.groupby('Dept')['Weekly_Sales'].sum().reset_index().sort_values(by='Weekly_Sales', ascending=False)
+    department_sales = sales_by(cube, 'Dept').sort_values(by='Weekly_Sales', ascending=False)
 
     return html.Div([
         dcc.Graph(
@@ -0,0 +1,132 @@
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+from dash import html
+
+logger = logging.getLogger(__name__)
+
+# Line traces longer than this are downsampled with LTTB before being sent
+LINE_POINT_BUDGET = 2000
+
+# Line traces that still have more points than this are drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Date bar charts with more bars than this are binned into months, quarters or years
+BAR_BUDGET = 120
+BAR_FREQUENCIES = ['MS', 'QS', 'YS']
+
+
+def lttb(x, y, n_out):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps when reducing a line to `n_out` points.
+
+    The first and last points are always kept; in between, each bucket keeps
+    the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, so peaks and dips survive the reduction.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        keep[i + 1] = previous
+    return keep
+
+
+def _numeric(x):
+    """Float view of an x axis (datetimes as nanoseconds) for the LTTB areas."""
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.astype('int64').to_numpy()
+    return x.to_numpy(dtype=np.float64)
+
+
+def bar_frequency(x, max_bars=BAR_BUDGET):
+    """Coarsest-needed bin frequency for date bars, or None if they fit as they are."""
+    dates = pd.DatetimeIndex(x)
+    if len(dates) <= max_bars:
+        return None
+    for freq in BAR_FREQUENCIES:
+        if len(dates.to_period(freq[0]).unique()) <= max_bars:
+            return freq
+    return BAR_FREQUENCIES[-1]
+
+
+class FigureBuilder:
+    """Builds a Dash figure dict, keeping the payload small for large series.
+
+    Line traces above LINE_POINT_BUDGET points are downsampled with LTTB and
+    switched to `scattergl`; date bar traces above BAR_BUDGET bars are summed
+    into coarser periods. At DEBUG level, `to_dict()` logs the build time,
+    point counts and JSON payload size of each figure (serializing the
+    figure once more, so it is off by default).
+
+        fig = FigureBuilder('Weekly Sales Over Time', {'xaxis': {'title': 'Date'}})
+        fig.line(weekly_sales['Date'], weekly_sales['Weekly_Sales'], name='Weekly Sales')
+        dcc.Graph(figure=fig.to_dict())
+    """
+
+    def __init__(self, title, layout=None):
+        self.title = title
+        self.layout = {'title': title, **(layout or {})}
+        self.traces = []
+        self.points_in = 0
+        self.points_out = 0
+        self._bar_freq = None
+        self._start = time.perf_counter()
+
+    def line(self, x, y, name, budget=LINE_POINT_BUDGET, **style):
+        self.points_in += len(y)
+        if len(y) > budget:
+            keep = lttb(_numeric(x), y, budget)
+            x, y = np.asarray(x)[keep], np.asarray(y)[keep]
+        self.points_out += len(y)
+        trace_type = 'scattergl' if len(y) > WEBGL_THRESHOLD else 'scatter'
+        self.traces.append({'x': x, 'y': y, 'type': trace_type, 'mode': 'lines', 'name': name, **style})
+        return self
+
+    def bar(self, x, y, name, max_bars=BAR_BUDGET, **style):
+        """Add a bar trace; date bars are summed per month/quarter/year when there are too many.
+
+        All date bar traces of one figure share the bin size chosen for the first one.
+        """
+        self.points_in += len(y)
+        if pd.api.types.is_datetime64_any_dtype(pd.Series(x)):
+            self._bar_freq = self._bar_freq or bar_frequency(x, max_bars)
+            if self._bar_freq is not None:
+                binned = pd.Series(np.asarray(y), index=pd.DatetimeIndex(x)).resample(self._bar_freq).sum()
+                binned = binned[binned != 0]
+                x, y = binned.index, binned.to_numpy()
+        self.points_out += len(y)
+        self.traces.append({'x': x, 'y': y, 'type': 'bar', 'name': name, **style})
+        return self
+
+    def to_dict(self):
+        figure = {'data': self.traces, 'layout': self.layout}
+        if logger.isEnabledFor(logging.DEBUG):
+            payload = len(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+            logger.debug('figure %r: %d -> %d points, %.1f KB, built in %.1f ms', self.title, self.points_in,
+                        self.points_out, payload / 1024, (time.perf_counter() - self._start) * 1000)
+        return figure
+
+
+def no_data(message='No sales for the selected stores and departments.'):
+    """Placeholder shown instead of a tab's charts when the filters match no rows."""
+    return html.Div(message, className='alert alert-warning text-center my-4')
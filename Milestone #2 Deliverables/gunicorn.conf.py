@@ -0,0 +1,35 @@
+"""gunicorn settings for serving the dashboard with several worker processes.
+
+    cd "Milestone #2 Deliverables"
+    gunicorn -c gunicorn.conf.py app:server
+
+The app is imported once in the master before the workers are forked
+(preload_app); importing it does not load any data, so the socket is bound
+right away. Each worker starts loading the sales data in a background
+thread as soon as it is forked (post_fork) and answers /health with
+"warming" until then; /ready returns 503 until the data is loaded, for load
+balancer checks. The sales data is a memory-mapped Arrow file, stored in
+the order the filtered views index it, so every worker uses the shared
+pages directly; each worker only builds the small aggregate cubes and block
+offset table. Rendered tabs are cached on disk (../.cache/callbacks) for
+every worker.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('DASHBOARD_THREADS', 2))
+preload_app = True
+timeout = 120
+
+# Recycle workers now and then so fragmentation does not grow memory over time
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    from app import start_loading
+    start_loading()
@@ -0,0 +1,206 @@
+"""Append new weeks of sales to the dashboard without re-exporting the CSV or restarting.
+
+Weekly files (CSV, same columns as walmart_cleaned.csv) dropped in the
+incoming directory are validated, typed and written to the ingested
+directory as Feather files, one per week. Every dashboard process then
+applies the ingested files it has not seen yet to its SalesAggregates with
+`append`, so a refresh costs time proportional to the new week only. On
+start-up the app replays all ingested files on top of the base CSV; rows
+the CSV already has (not newer than its last date for the store, e.g. after
+the CSV was re-exported with those weeks) are skipped, so no week is
+counted twice.
+
+Rejected files are moved to incoming/rejected with the reason next to them.
+The command line checks the columns of weekly files and queues them in the
+incoming directory; the dashboard picks them up on its next refresh (or at
+start-up).
+
+    python ingest.py new_week.csv [more.csv ...] --incoming ../data/incoming
+"""
+import argparse
+import logging
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from data_loader import prepare_sales_frame
+
+logger = logging.getLogger(__name__)
+
+# Columns the render functions use; every weekly file must have them
+REQUIRED_COLUMNS = ['Date', 'Store', 'Dept', 'Weekly_Sales', 'IsPromoWeek', 'Holiday_Flag', 'Season', 'Month', 'Year']
+
+INCOMING_DIR = '../data/incoming'
+INGESTED_DIR = '../data/ingested'
+
+
+class IngestError(ValueError):
+    """A weekly file that cannot be appended to the dashboard data."""
+
+
+def validate_week(frame, store_types=None, last_dates=None):
+    """Check and type one weekly file; returns the prepared frame or raises IngestError.
+
+    `store_types` (Store -> Type) fills in a missing Type column for known
+    stores; `last_dates` (Store -> latest Date already loaded) rejects weeks
+    that are not newer than what the dashboard already has, since ingest
+    only appends.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise IngestError(f"Missing columns: {', '.join(missing)}")
+    if frame.empty:
+        raise IngestError('File has no rows')
+    if frame[REQUIRED_COLUMNS].isna().any().any():
+        nulls = frame[REQUIRED_COLUMNS].columns[frame[REQUIRED_COLUMNS].isna().any()].tolist()
+        raise IngestError(f"Missing values in: {', '.join(nulls)}")
+
+    if 'Type' not in frame.columns:
+        types = frame['Store'].map(store_types) if store_types is not None else None
+        if types is None or types.isna().any():
+            raise IngestError('Type column is required for stores the dashboard does not know yet')
+        frame = frame.assign(Type=types)
+
+    try:
+        frame = prepare_sales_frame(frame.copy())
+        frame['Weekly_Sales'] = frame['Weekly_Sales'].astype('float64')
+    except (ValueError, TypeError) as e:
+        raise IngestError(f'Cannot convert columns: {e}') from e
+
+    if (frame['Year'] != frame['Date'].dt.year).any() or (frame['Month'] != frame['Date'].dt.month).any():
+        raise IngestError('Year/Month do not match Date')
+    if frame.duplicated(['Store', 'Dept', 'Date']).any():
+        raise IngestError('Duplicate Store/Dept/Date rows')
+    if last_dates is not None:
+        known = frame['Store'].map(last_dates)
+        stale = frame['Date'] <= known
+        if stale.any():
+            raise IngestError(f'{int(stale.sum())} rows are not newer than the data already loaded')
+    return frame
+
+
+def ingested_files(ingested_dir):
+    """Ingested weekly files in the order they were added."""
+    if not os.path.isdir(ingested_dir):
+        return []
+    return sorted(name for name in os.listdir(ingested_dir) if name.endswith('.feather'))
+
+
+def write_ingested(frame, source_name, ingested_dir):
+    """Write a validated week to the ingested directory (atomically); returns its file name."""
+    os.makedirs(ingested_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}-{stem}.feather"
+    tmp_path = os.path.join(ingested_dir, f'.{name}.tmp')
+    frame.reset_index(drop=True).to_feather(tmp_path)
+    os.replace(tmp_path, os.path.join(ingested_dir, name))
+    return name
+
+
+class WeeklyIngestor:
+    """Keeps one process's SalesAggregates in step with the ingested weekly files.
+
+    `sync()` first ingests any new files from the incoming directory (the
+    first process to claim a file processes it), then appends every ingested
+    file this process has not applied yet. It is cheap when nothing changed
+    (two directory listings), so it can run on every dashboard refresh.
+    """
+
+    def __init__(self, aggregates, incoming_dir=INCOMING_DIR, ingested_dir=INGESTED_DIR):
+        self.aggregates = aggregates
+        self.incoming_dir = incoming_dir
+        self.ingested_dir = ingested_dir
+        self.applied = []
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Identifies the data this process serves: the last ingested file applied."""
+        return self.applied[-1] if self.applied else 'base'
+
+    def _claim_incoming(self):
+        if not os.path.isdir(self.incoming_dir):
+            return
+        for name in sorted(os.listdir(self.incoming_dir)):
+            path = os.path.join(self.incoming_dir, name)
+            if not name.endswith('.csv') or not os.path.isfile(path):
+                continue
+            # Renaming is atomic, so only one worker processes each file
+            claimed = f'{path}.{os.getpid()}.processing'
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                frame = validate_week(pd.read_csv(claimed), self.aggregates.store_types, self.aggregates.last_dates)
+            except (IngestError, ValueError, UnicodeDecodeError) as e:
+                # ValueError covers pandas' EmptyDataError and ParserError (empty or malformed CSV)
+                self._reject(claimed, name, str(e) or type(e).__name__)
+                continue
+            write_ingested(frame, name, self.ingested_dir)
+            os.remove(claimed)
+            logger.info('ingested %s: %d rows', name, len(frame))
+
+    def _reject(self, path, name, reason):
+        rejected_dir = os.path.join(self.incoming_dir, 'rejected')
+        os.makedirs(rejected_dir, exist_ok=True)
+        shutil.move(path, os.path.join(rejected_dir, name))
+        with open(os.path.join(rejected_dir, f'{name}.error.txt'), 'w') as f:
+            f.write(reason + '\n')
+        logger.warning('rejected %s: %s', name, reason)
+
+    def _apply_new(self):
+        applied = set(self.applied)
+        new = [name for name in ingested_files(self.ingested_dir) if name not in applied]
+        for name in new:
+            start = time.perf_counter()
+            frame = pd.read_feather(os.path.join(self.ingested_dir, name))
+            # Skip rows the loaded data already has (weeks the base CSV now includes)
+            loaded = (frame['Date'] <= frame['Store'].map(self.aggregates.last_dates)).to_numpy()
+            if loaded.any():
+                logger.info('%s: skipping %d rows already in the data', name, int(loaded.sum()))
+                frame = frame[~loaded]
+            if len(frame):
+                self.aggregates.append(frame)
+            self.applied.append(name)
+            logger.info('applied %s: %d rows in %.1f ms', name, len(frame), (time.perf_counter() - start) * 1000)
+        return len(new)
+
+    def sync(self):
+        """Ingest new incoming files and apply new ingested files; returns how many were applied."""
+        with self._lock:
+            # Apply weeks other workers ingested first, so validation sees the latest dates
+            applied = self._apply_new()
+            self._claim_incoming()
+            return applied + self._apply_new()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check weekly sales files and queue them for the dashboard.')
+    parser.add_argument('files', nargs='+', help='Weekly sales CSV files')
+    parser.add_argument('--incoming', default=INCOMING_DIR, help='Directory the dashboard picks new weeks up from')
+    args = parser.parse_args()
+
+    os.makedirs(args.incoming, exist_ok=True)
+    for path in args.files:
+        try:
+            frame = pd.read_csv(path)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"{path}: rejected (cannot read the CSV: {e})")
+            continue
+        missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+        if missing:
+            print(f"{path}: rejected (missing columns: {', '.join(missing)})")
+            continue
+        # Copy under a temporary name first so the dashboard never reads a partial file
+        target = os.path.join(args.incoming, os.path.basename(path))
+        shutil.copyfile(path, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        print(f'{path}: {len(frame):,} rows queued in {args.incoming}')
+
+
+if __name__ == '__main__':
+    main()
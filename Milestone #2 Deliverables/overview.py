@@ -1,7 +1,8 @@
 from dash import Dash, dcc, html
-import plotly.express as px
 import dash_bootstrap_components as dbc
 import pandas as pd
+from aggregates import sales_by
+from figures import FigureBuilder, no_data
 
 # Small function to format numbers
 def format_number(number):
@@ -14,16 +15,18 @@ def format_number(number):
         return "${:,.2f}".format(number)
 
 # Function to generate the overview tab content
-def render_overview(selected_year, df):
+def render_overview(selected_year, aggregates, filters=None):
     """Render the Overview tab for the selected year"""
     
-    # Filter the dataframe for the selected year
-    filtered_df = df[df['Year'] == selected_year]
+    # Look up the pre-aggregated data for the selected year
+    cube = aggregates.select(selected_year, **(filters or {}))
+    if cube is None:
+        return no_data()
 
     # Calculate KPIs
-    total_sales_value = filtered_df['Weekly_Sales'].sum()
-    average_sales_value = filtered_df['Weekly_Sales'].mean()
-    top_store_id = filtered_df.groupby('Store')['Weekly_Sales'].sum().idxmax()
+    total_sales_value = cube['total']['Weekly_Sales']
+    average_sales_value = total_sales_value / cube['total']['count']
+    top_store_id = cube['Store']['Weekly_Sales'].idxmax()
 
     # Apply formatting
     total_sales = format_number(total_sales_value)
@@ -31,10 +34,11 @@ def render_overview(selected_year, df):
     top_store_text = f"Store {top_store_id}"
 
     # Prepare charts (Sales Trend, Sales by Department, Promo vs Non-Promo)
-    weekly_sales = filtered_df.groupby('Date')['Weekly_Sales'].sum().reset_index()
-    department_sales = filtered_df.groupby('Dept')['Weekly_Sales'].sum().reset_index()
-    promo_sales = filtered_df[filtered_df['IsPromoWeek'] == 1].groupby('Date')['Weekly_Sales'].sum().reset_index()
-    non_promo_sales = filtered_df[filtered_df['IsPromoWeek'] == 0].groupby('Date')['Weekly_Sales'].sum().reset_index()
+    weekly_sales = sales_by(cube, 'Date')
+    department_sales = sales_by(cube, 'Dept')
+    date_promo_sales = sales_by(cube, ('Date', 'IsPromoWeek'))
+    promo_sales = date_promo_sales[date_promo_sales['IsPromoWeek'] == 1]
+    non_promo_sales = date_promo_sales[date_promo_sales['IsPromoWeek'] == 0]
 
     # Build the Overview tab layout
     return html.Div([
@@ -79,29 +83,24 @@ def render_overview(selected_year, df):
 
         # Sales Trend Chart (Weekly Sales Over Time)
         dbc.Row([dbc.Col([dcc.Graph(
-            figure={
-                'data': [{'x': weekly_sales['Date'], 'y': weekly_sales['Weekly_Sales'], 'type': 'line', 'name': 'Weekly Sales'}],
-                'layout': {'title': 'Weekly Sales Over Time', 'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Sales'}}
-            }
+            figure=FigureBuilder('Weekly Sales Over Time', {'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Sales'}})
+                .line(weekly_sales['Date'], weekly_sales['Weekly_Sales'], name='Weekly Sales')
+                .to_dict()
         )], width=12)]),
 
         # Sales by Store/Department (Bar Chart)
         dbc.Row([dbc.Col([dcc.Graph(
-            figure={
-                'data': [{'x': department_sales['Dept'].astype(str), 'y': department_sales['Weekly_Sales'], 'type': 'bar', 'name': 'Sales by Department'}],
-                'layout': {'title': 'Sales by Department', 'xaxis': {'title': 'Department'}, 'yaxis': {'title': 'Sales'}}
-            }
+            figure=FigureBuilder('Sales by Department', {'xaxis': {'title': 'Department'}, 'yaxis': {'title': 'Sales'}})
+                .bar(department_sales['Dept'].astype(str), department_sales['Weekly_Sales'], name='Sales by Department')
+                .to_dict()
         )], width=6),
 
-        # Promo vs Non-Promo Performance (Comparison Bar Chart)
+        # Promo vs Non-Promo Performance (Comparison Bar Chart, binned by month/quarter when there are many weeks)
         dbc.Col([dcc.Graph(
-            figure={
-                'data': [
-                    {'x': promo_sales['Date'], 'y': promo_sales['Weekly_Sales'], 'type': 'bar', 'name': 'Promo Sales'},
-                    {'x': non_promo_sales['Date'], 'y': non_promo_sales['Weekly_Sales'], 'type': 'bar', 'name': 'Non-Promo Sales'}
-                ],
-                'layout': {'title': 'Promo vs Non-Promo Performance', 'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Sales'}}
-            }
+            figure=FigureBuilder('Promo vs Non-Promo Performance', {'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Sales'}})
+                .bar(promo_sales['Date'], promo_sales['Weekly_Sales'], name='Promo Sales')
+                .bar(non_promo_sales['Date'], non_promo_sales['Weekly_Sales'], name='Non-Promo Sales')
+                .to_dict()
         )], width=6)])
 
     ])
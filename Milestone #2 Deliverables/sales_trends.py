@@ -1,31 +1,35 @@
 from dash import Dash, dcc, html
 import dash_bootstrap_components as dbc
-import plotly.express as px
+from aggregates import sales_by, mean_sales_by
+from figures import FigureBuilder, no_data
 
-def render_sales_trends(selected_year, df):
-    filtered_df = df[df['Year'] == selected_year]
+def render_sales_trends(selected_year, aggregates, forecasts=None, filters=None):
+    cube = aggregates.select(selected_year, **(filters or {}))
+    if cube is None:
+        return no_data()
 
     # Sales Trends Content
-    weekly_sales = filtered_df.groupby('Date')['Weekly_Sales'].sum().reset_index()
-    monthly_sales = filtered_df.groupby('Month')['Weekly_Sales'].sum().reset_index()
-    holiday_sales = filtered_df.groupby('Holiday_Flag')['Weekly_Sales'].mean().reset_index()
+    weekly_sales = sales_by(cube, 'Date')
+    weekly_figure = FigureBuilder('Weekly Sales Over Time',
+                                  {'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Sales'}, 'hovermode': 'x unified'})
+    weekly_figure.line(weekly_sales['Date'], weekly_sales['Weekly_Sales'], name='Weekly Sales')
+    # Overlay the latest stored forecast run for the same year and selection (one indexed query, no model call)
+    if forecasts is not None and forecasts.latest_run() is not None:
+        filters = filters or {}
+        weekly_forecast = forecasts.weekly_totals(year=selected_year,
+                                                  store=aggregates.stores_for(filters.get('stores'), filters.get('types')),
+                                                  dept=filters.get('depts') or None)
+        if len(weekly_forecast):
+            weekly_figure.line(weekly_forecast['Date'], weekly_forecast['forecast'], name='Forecast',
+                               line={'dash': 'dash'})
+
+    monthly_sales = sales_by(cube, 'Month')
+    holiday_sales = mean_sales_by(cube, 'Holiday_Flag')
     holiday_sales['Holiday_Type'] = holiday_sales['Holiday_Flag'].map({0: 'Non-Holiday', 1: 'Holiday'})
 
     return html.Div([
         # Weekly Sales Over Time Graph
-        dcc.Graph(
-            figure={
-                'data': [
-                    {'x': weekly_sales['Date'], 'y': weekly_sales['Weekly_Sales'], 'type': 'line', 'name': 'Weekly Sales'}
-                ],
-                'layout': {
-                    'title': 'Weekly Sales Over Time',
-                    'xaxis': {'title': 'Date'},
-                    'yaxis': {'title': 'Sales'},
-                    'hovermode': 'x unified'
-                }
-            }
-        ),
+        dcc.Graph(figure=weekly_figure.to_dict()),
 
         # Row for Monthly Sales and Holiday vs Non-Holiday Sales
         dbc.Row([
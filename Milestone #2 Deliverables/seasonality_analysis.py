@@ -1,26 +1,31 @@
 from dash import Dash, dcc, html
 import dash_bootstrap_components as dbc
 import pandas as pd
-import plotly.express as px
+from aggregates import sales_by, mean_sales_by
+from figures import FigureBuilder, no_data
 
-def render_seasonality_analysis(selected_year, df):
-    filtered_df = df[df['Year'] == selected_year]
+def render_seasonality_analysis(selected_year, aggregates, filters=None):
+    cube = aggregates.select(selected_year, **(filters or {}))
+    if cube is None:
+        return no_data()
 
     # Sales by Season (Sales grouped by 'Season')
-    sales_by_season = filtered_df.groupby('Season')['Weekly_Sales'].sum().reset_index()
+    sales_by_season = sales_by(cube, 'Season')
 
     # Create a bar chart for Sales by Season
-    seasonality_fig = px.bar(sales_by_season, x='Season', y='Weekly_Sales',
-                             title='Sales by Season', labels={'Weekly_Sales': 'Sales'})
-    seasonality_fig.update_layout(title_x=0.5)
+    seasonality_fig = (FigureBuilder('Sales by Season', {'title': {'text': 'Sales by Season', 'x': 0.5},
+                                                         'xaxis': {'title': 'Season'}, 'yaxis': {'title': 'Sales'}})
+                       .bar(sales_by_season['Season'], sales_by_season['Weekly_Sales'], name='Sales by Season')
+                       .to_dict())
 
     # Promo vs Non-Promo Sales (Using 'IsPromoWeek' column)
-    promo_sales = filtered_df.groupby('IsPromoWeek')['Weekly_Sales'].mean().reset_index()
+    promo_sales = mean_sales_by(cube, 'IsPromoWeek')
     promo_sales['Promo'] = promo_sales['IsPromoWeek'].map({False: 'Non-Promo', True: 'Promo'})
 
     # Create a bar chart for Promo vs Non-Promo Sales
-    promo_fig = px.bar(promo_sales, x='Promo', y='Weekly_Sales',
-                       title='Promo vs Non-Promo Sales', labels={'Weekly_Sales': 'Average Sales'})
+    promo_fig = (FigureBuilder('Promo vs Non-Promo Sales', {'xaxis': {'title': 'Promo'}, 'yaxis': {'title': 'Average Sales'}})
+                 .bar(promo_sales['Promo'], promo_sales['Weekly_Sales'], name='Promo vs Non-Promo Sales')
+                 .to_dict())
 
     return html.Div([
         # Sales by Season Chart
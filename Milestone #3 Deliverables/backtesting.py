@@ -0,0 +1,189 @@
+"""Walk-forward (rolling-origin) backtesting per Store x Dept series.
+
+Instead of one random train/test split, every series is evaluated on several
+forecast origins: for each fold the model is trained on all weeks up to the
+origin and scored on the next `horizon` weeks. Series are grouped into chunks
+and fitted in parallel worker processes; each series' feature matrix is built
+once, sorted by date, and every fold trains/tests on slices of it.
+
+    python backtesting.py walmart_cleaned_machine.csv --folds 4 --horizon 8 --jobs 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from evaluation import METRICS, evaluation_report, grouped_metrics
+
+SERIES_KEYS = ['Store', 'Dept']
+TARGET = 'Weekly_Sales'
+DATE_COLUMN = 'date'
+
+
+def default_model_factory():
+    """The XGBoost configuration used in the modelling notebooks (single-threaded per worker)."""
+    from xgboost import XGBRegressor
+    return XGBRegressor(n_estimators=200, max_depth=7, learning_rate=0.01, subsample=0.8,
+                        colsample_bytree=1.0, objective='reg:squarederror', random_state=42, n_jobs=1)
+
+
+def rolling_origins(dates, n_folds=4, horizon=8, step=None):
+    """Forecast origins for the walk-forward folds.
+
+    Returns a list of (origin, end) dates: fold i trains on dates <= origin and
+    tests on origin < date <= end. Origins are spaced `step` weeks apart
+    (default: `horizon`) and the last fold ends at the last date.
+    """
+    unique_dates = np.sort(pd.unique(pd.Series(dates)))
+    step = step or horizon
+    folds = []
+    for i in reversed(range(n_folds)):
+        end_index = len(unique_dates) - 1 - i * step
+        origin_index = end_index - horizon
+        if origin_index < 1:
+            continue
+        folds.append((unique_dates[origin_index], unique_dates[end_index]))
+    return folds
+
+
+def build_series(df, feature_columns):
+    """Split the frame into per-series (key, X, y, dates) arrays, sorted by date.
+
+    The feature matrices are contiguous float32 arrays built once; the folds
+    only take slices of them.
+    """
+    df = df.sort_values(SERIES_KEYS + [DATE_COLUMN], kind='stable')
+    X = df[feature_columns].to_numpy(dtype=np.float32)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    dates = df[DATE_COLUMN].to_numpy(dtype='datetime64[ns]')
+
+    keys = df[SERIES_KEYS].to_numpy()
+    boundaries = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(df)]])
+    return [(tuple(keys[s].tolist()), X[s:e], y[s:e], dates[s:e]) for s, e in zip(starts, ends)]
+
+
+def _backtest_chunk(series_chunk, folds, model_factory, min_train_rows, return_predictions):
+    metrics_rows, prediction_frames = [], []
+    actuals, predicted = [], []
+    for key, X, y, dates in series_chunk:
+        for fold, (origin, end) in enumerate(folds):
+            # Dates are sorted, so both windows are contiguous slices
+            train_end = np.searchsorted(dates, origin, side='right')
+            test_end = np.searchsorted(dates, end, side='right')
+            if train_end < min_train_rows or test_end == train_end:
+                continue
+
+            model = model_factory()
+            model.fit(X[:train_end], y[:train_end])
+            y_pred = model.predict(X[train_end:test_end])
+            y_true = y[train_end:test_end]
+
+            actuals.append(y_true)
+            predicted.append(y_pred)
+            metrics_rows.append({**dict(zip(SERIES_KEYS, key)), 'fold': fold, 'origin': origin,
+                                 'n_train': train_end, 'n_test': test_end - train_end})
+            if return_predictions:
+                prediction_frames.append(pd.DataFrame({
+                    **{k: v for k, v in zip(SERIES_KEYS, key)}, 'fold': fold,
+                    DATE_COLUMN: dates[train_end:test_end], 'actual': y_true, 'predicted': y_pred,
+                }))
+
+    # Metrics of every series x fold of the chunk in one grouped pass
+    if metrics_rows:
+        codes = np.repeat(np.arange(len(metrics_rows)), [len(a) for a in actuals])
+        metrics = grouped_metrics(np.concatenate(actuals), np.concatenate(predicted), codes, len(metrics_rows))
+        for i, row in enumerate(metrics_rows):
+            row.update((name, metrics[name][i]) for name in METRICS)
+    return metrics_rows, prediction_frames
+
+
+def backtest(df, model_factory=default_model_factory, feature_columns=None, n_folds=4, horizon=8,
+             step=None, min_train_rows=26, n_jobs=None, chunk_size=50, return_predictions=False,
+             verbose=True):
+    """Rolling-origin evaluation of `model_factory()` fitted separately on every Store x Dept series.
+
+    `model_factory` must be picklable (a module-level function) when n_jobs != 1.
+    Returns a dataframe of metrics per series and fold, plus a dataframe of
+    out-of-sample predictions when `return_predictions` is set.
+    """
+    df = df.copy()
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format='mixed')
+    if feature_columns is None:
+        feature_columns = [c for c in df.columns if c not in (TARGET, DATE_COLUMN)]
+
+    folds = rolling_origins(df[DATE_COLUMN], n_folds, horizon, step)
+    series = build_series(df, feature_columns)
+    chunks = [series[i:i + chunk_size] for i in range(0, len(series), chunk_size)]
+    args = (folds, model_factory, min_train_rows, return_predictions)
+
+    metrics_rows, prediction_frames = [], []
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs != 1 else None
+    try:
+        if executor is None:
+            done = (_backtest_chunk(chunk, *args) for chunk in chunks)
+        else:
+            futures = [executor.submit(_backtest_chunk, chunk, *args) for chunk in chunks]
+            done = (future.result() for future in as_completed(futures))
+        for i, (rows, preds) in enumerate(done, 1):
+            metrics_rows += rows
+            prediction_frames += preds
+            if verbose:
+                print(f'\r{i}/{len(chunks)} chunks done ({time.perf_counter() - start:.0f}s)', end='', flush=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if verbose:
+        print(f'\nBacktested {len(series)} series x {len(folds)} folds in {time.perf_counter() - start:.1f}s')
+
+    results = pd.DataFrame(metrics_rows).sort_values(SERIES_KEYS + ['fold'], ignore_index=True)
+    if return_predictions:
+        predictions = pd.concat(prediction_frames, ignore_index=True) if prediction_frames else pd.DataFrame()
+        return results, predictions
+    return results
+
+
+def summarize(results):
+    """Average each metric per fold and over all series/folds."""
+    metric_columns = [c for c in METRICS if c in results.columns]
+    per_fold = results.groupby('fold')[metric_columns].mean()
+    per_fold.loc['all'] = results[metric_columns].mean()
+    return per_fold
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward backtest per Store x Dept series.')
+    parser.add_argument('data', help='Path to walmart_cleaned_machine.csv')
+    parser.add_argument('--folds', type=int, default=4)
+    parser.add_argument('--horizon', type=int, default=8, help='Weeks forecast per fold')
+    parser.add_argument('--step', type=int, help='Weeks between origins (default: horizon)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--out', default='backtest_results.csv', help='Where to write per-series metrics')
+    parser.add_argument('--scorecard', help='Also write metrics per fold, Store, Dept, Type, holiday and promo here')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    results = backtest(data, n_folds=args.folds, horizon=args.horizon, step=args.step, n_jobs=args.jobs,
+                       return_predictions=bool(args.scorecard))
+    if args.scorecard:
+        results, predictions = results
+        # Pooled over all out-of-sample weeks, with the segment columns looked up from the data
+        data[DATE_COLUMN] = pd.to_datetime(data[DATE_COLUMN], format='mixed')
+        segments = ['Type', 'Holiday_Flag', 'IsPromoWeek']
+        predictions = predictions.merge(data[SERIES_KEYS + [DATE_COLUMN] + segments], how='left')
+        report = evaluation_report(predictions, predictions['predicted'], ['fold'] + SERIES_KEYS + segments,
+                                   target='actual')
+        report.to_csv(args.scorecard, index=False)
+        print(f'Per-segment scorecard written to {args.scorecard}')
+    results.to_csv(args.out, index=False)
+    print(summarize(results).to_string())
+    print(f'Per-series metrics written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Vectorized evaluation metrics, overall and per segment, for one or many models.
+
+Computes the notebooks' metric set (MSE, RMSE, MAE, MAPE, R2, explained
+variance) from a handful of sums over the errors instead of six separate
+sklearn calls. Per-segment scorecards (Store, Dept, Type, holiday, promo or
+any combination of columns) use the same sums grouped with `np.bincount`,
+so there is no Python loop over segments or rows; the per-row error terms
+are computed once and shared by every segmentation.
+
+    report = evaluation_report(test_frame, {'xgboost': xgb_pred, 'catboost': cat_pred})
+    python evaluation.py scored.csv --pred Predicted_Sales --out scorecard.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+TARGET = 'Weekly_Sales'
+
+# Same names as the notebooks' calculate_metrics
+MSE = 'Mean Squared Error (MSE)'
+RMSE = 'Root Mean Squared Error (RMSE)'
+MAE = 'Mean Absolute Error (MAE)'
+MAPE = 'Mean Absolute Percentage Error (MAPE)'
+R2 = 'R2 Score'
+EXPLAINED_VARIANCE = 'Explained Variance Score'
+METRICS = [MSE, RMSE, MAE, MAPE, R2, EXPLAINED_VARIANCE]
+
+# Segments of the default scorecard; a tuple is a combination of columns
+SEGMENTS = ['Store', 'Dept', 'Type', 'Holiday_Flag', 'IsPromoWeek']
+
+
+def _sums(codes, n_groups, values):
+    """Sum of `values` per group; 2-D values (one row per model) give the groups of each model in turn."""
+    if codes is None:
+        return np.atleast_1d(values.sum(axis=-1))
+    if values.ndim == 1:
+        return np.bincount(codes, weights=values, minlength=n_groups)
+    # One bincount per model is faster than a single one over offset codes (no n_models x n_rows index)
+    return np.concatenate([np.bincount(codes, weights=row, minlength=n_groups) for row in values])
+
+
+def row_terms(y_true, y_pred):
+    """Per-row quantities every metric is a sum of, computed once for any number of groupings.
+
+    `y_pred` may be 2-D (n_models, n_rows) to score several models at once.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    y_pred = y_pred.reshape(1 if y_pred.ndim == 1 else len(y_pred), len(y_true))
+    errors = y_true - y_pred
+    abs_errors = np.abs(errors)
+    return {
+        'y_true': y_true,
+        'error': errors,
+        'squared': errors * errors,
+        'absolute': abs_errors,
+        'relative': abs_errors / np.maximum(np.abs(y_true), np.finfo(np.float64).eps),
+    }
+
+
+def grouped_metrics(y_true, y_pred, codes=None, n_groups=None, terms=None):
+    """Every metric for each group of rows, as a dict of arrays (plus the row count 'n').
+
+    `codes` gives each row's group (0 .. n_groups - 1); without it the rows
+    form a single group. `y_pred` may be 2-D (n_models, n_rows), in which
+    case the arrays have n_models * n_groups entries, model-major. Pass
+    `terms` (from `row_terms`) to reuse them across groupings. Groups with no
+    rows get NaN metrics, and R2 / explained variance are NaN when the
+    group's actuals are constant.
+    """
+    terms = terms or row_terms(y_true, y_pred)
+    y_true = terms['y_true']
+    n_models = len(terms['error'])
+    if codes is not None:
+        codes = np.asarray(codes, dtype=np.int64).ravel()
+        n_groups = int(codes.max()) + 1 if n_groups is None and len(codes) else (n_groups or 0)
+
+    # Statistics of the actuals are shared by every model
+    with np.errstate(invalid='ignore', divide='ignore'):
+        count = _sums(codes, n_groups, np.ones_like(y_true))
+        mean_true = _sums(codes, n_groups, y_true) / count
+        centered = y_true - (mean_true[codes] if codes is not None else mean_true)
+        variance = np.tile(_sums(codes, n_groups, centered * centered) / count, n_models)
+    count = np.tile(count, n_models)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_error = _sums(codes, n_groups, terms['error']) / count
+        mse = _sums(codes, n_groups, terms['squared']) / count
+        constant = variance <= 0
+        return {
+            'n': count.astype(np.int64),
+            MSE: mse,
+            RMSE: np.sqrt(mse),
+            MAE: _sums(codes, n_groups, terms['absolute']) / count,
+            MAPE: _sums(codes, n_groups, terms['relative']) / count,
+            R2: np.where(constant, np.nan, 1 - mse / variance),
+            EXPLAINED_VARIANCE: np.where(constant, np.nan, 1 - (mse - mean_error ** 2) / variance),
+        }
+
+
+def calculate_metrics(y_true, y_pred):
+    """Same metric set as the modelling notebooks' calculate_metrics, in one vectorized pass."""
+    metrics = grouped_metrics(y_true, y_pred)
+    return {name: float(metrics[name][0]) for name in METRICS}
+
+
+def segment_codes(frame, keys):
+    """Group code of every row for one column or a combination of columns, and the group labels.
+
+    Returns (codes, labels) where labels is a dataframe with one row per
+    group, sorted by the key values.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    codes, n_groups = np.zeros(len(frame), dtype=np.int64), 1
+    uniques = []
+    for key in keys:
+        key_codes, key_uniques = pd.factorize(frame[key], sort=True)
+        if (key_codes < 0).any():
+            raise ValueError(f'Missing values in segment column {key}')
+        codes = codes * len(key_uniques) + key_codes
+        n_groups *= len(key_uniques)
+        uniques.append(np.asarray(key_uniques))
+    # Keep only the combinations that occur, in sorted order
+    present, codes = np.unique(codes, return_inverse=True)
+    labels = {}
+    for key, values in zip(reversed(keys), reversed(uniques)):
+        labels[key] = values[present % len(values)]
+        present = present // len(values)
+    return codes, pd.DataFrame({key: labels[key] for key in keys})
+
+
+def _as_predictions(predictions):
+    if isinstance(predictions, dict):
+        return list(predictions), np.vstack([np.asarray(p, dtype=np.float64).ravel() for p in predictions.values()])
+    return ['model'], np.asarray(predictions, dtype=np.float64).reshape(1, -1)
+
+
+def evaluation_report(frame, predictions, segments=SEGMENTS, target=TARGET):
+    """Scorecard of one or more models: overall metrics plus metrics for every segment value.
+
+    `predictions` is an array aligned with `frame`, or a dict of model name
+    -> array. Returns a long dataframe with columns model, segment, value,
+    n and the metrics; the overall rows have segment 'all'. Segments whose
+    columns are missing from `frame` are skipped.
+    """
+    names, y_pred = _as_predictions(predictions)
+    terms = row_terms(frame[target].to_numpy(dtype=np.float64), y_pred)
+
+    overall = grouped_metrics(None, None, terms=terms)
+    parts = [pd.DataFrame({'model': names, 'segment': 'all', 'value': 'all', **overall})]
+    for keys in segments:
+        columns = [keys] if isinstance(keys, str) else list(keys)
+        if not set(columns) <= set(frame.columns):
+            continue
+        codes, labels = segment_codes(frame, columns)
+        metrics = grouped_metrics(None, None, codes, len(labels), terms)
+        value = labels[columns[0]].astype(str) if len(columns) == 1 else labels.astype(str).agg(' / '.join, axis=1)
+        parts.append(pd.DataFrame({
+            'model': np.repeat(names, len(labels)),
+            'segment': ' x '.join(columns),
+            'value': np.tile(value.to_numpy(), len(names)),
+            **metrics,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Overall and per-segment metrics of prediction columns.')
+    parser.add_argument('data', help='CSV with the actuals and one or more prediction columns')
+    parser.add_argument('--pred', nargs='+', default=['Predicted_Sales'], help='Prediction columns to score')
+    parser.add_argument('--target', default=TARGET)
+    parser.add_argument('--segments', nargs='+', default=SEGMENTS,
+                        help='Columns to segment by; join columns with + for combinations (e.g. Store+Dept)')
+    parser.add_argument('--out', default='scorecard.csv')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    segments = [tuple(s.split('+')) if '+' in s else s for s in args.segments]
+    report = evaluation_report(data, {column: data[column] for column in args.pred}, segments, args.target)
+    report.to_csv(args.out, index=False)
+    print(report[report['segment'] == 'all'].drop(columns=['segment', 'value']).to_string(index=False))
+    print(f'{len(report):,} scorecard rows written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
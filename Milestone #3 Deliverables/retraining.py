@@ -0,0 +1,261 @@
+"""Weekly incremental retraining of the XGBoost model.
+
+Instead of refitting the scaler and training 200 trees from scratch on the
+whole history, a retrain:
+
+1. updates the StandardScaler statistics with the new weeks (`partial_fit`),
+2. continues boosting from the current booster (`xgb_model=`), adding a few
+   trees trained on the new weeks plus a random replay sample of the
+   history, so older patterns are not forgotten,
+3. backtests the candidate against the current model on the most recent
+   weeks (held out from the candidate's training), in Weekly_Sales units,
+4. promotes it only if it is at least as good, replacing the model and
+   scaler files atomically and keeping the previous ones as `.prev`.
+
+Features are built by SmartCast's FeatureTransformer (from the scaler), so
+training, backtests and serving see exactly the same inputs; `--bundle`
+also writes the promoted model with its transformer for SmartCast. If that
+bundle already has a quantile model (prediction intervals), it is continued
+on the same rows as the point model, so the intervals follow the new
+scaling; the updated quantile model is only kept if its P10-P90 coverage on
+the held-out weeks is at least as close to nominal as the current one's.
+
+Every run is appended to a JSONL log with both models' metrics.
+
+    python retraining.py walmart_cleaned_machine.csv new_weeks.csv \\
+        --model "../Saved Models/xgb_model.joblib" --scaler "../Saved Models/scaler.joblib"
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from evaluation import calculate_metrics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #4 Deliverables'))
+from drift_monitor import IntervalTracker  # noqa: E402
+from feature_transformer import SCALED_FEATURES, FeatureTransformer, ModelBundle, load_bundle  # noqa: E402
+from preprocessing import model_feature_order  # noqa: E402
+
+TARGET = 'Weekly_Sales'
+DATE_COLUMN = 'date'
+
+
+def _dates(frame):
+    return pd.to_datetime(frame[DATE_COLUMN], format='mixed')
+
+
+def features_and_target(frame, scaler):
+    """Scaled model inputs and scaled target of `frame`, built by the serving feature transformer.
+
+    The inputs keep the feature names, which the booster checks when training continues.
+    """
+    transformer = FeatureTransformer.from_scaler(scaler)
+    X = pd.DataFrame(transformer.transform(frame), columns=model_feature_order, copy=False)
+    return X, transformer.scale_target(frame[TARGET])
+
+
+def replay_sample(history, fraction=0.05, seed=42):
+    """Uniform random sample of the history mixed into every update."""
+    if fraction <= 0:
+        return history.iloc[:0]
+    return history.sample(frac=min(fraction, 1.0), random_state=seed)
+
+
+def warm_start(model, X, y, n_estimators=50, **params):
+    """A copy of `model` with `n_estimators` more trees fitted on (X, y), continuing its booster.
+
+    `params` override the model's own (e.g. the objective of a model loaded
+    from XGBoost's native format, whose wrapper parameters are not saved).
+    """
+    params = {**model.get_params(), 'n_estimators': n_estimators, **params}
+    candidate = type(model)(**params)
+    candidate.fit(X, y, xgb_model=model.get_booster())
+    return candidate
+
+
+def evaluate(model, scaler, frame):
+    """Metrics of `model` (with the scaler it expects) on `frame`, in Weekly_Sales units."""
+    predictions = ModelBundle(model, FeatureTransformer.from_scaler(scaler)).predict(frame)
+    return calculate_metrics(frame[TARGET].to_numpy(dtype=np.float64), predictions)
+
+
+def evaluate_intervals(model, scaler, frame, quantile_model, quantiles):
+    """IntervalTracker of the outer quantile band (e.g. P10-P90) on `frame`."""
+    bundle = ModelBundle(model, FeatureTransformer.from_scaler(scaler), quantile_model, quantiles)
+    _, bands = bundle.predict_intervals(frame)
+    tracker = IntervalTracker(nominal=quantiles[-1] - quantiles[0])
+    return tracker.update(frame[TARGET].to_numpy(dtype=np.float64), bands[:, 0], bands[:, -1])
+
+
+def update(model, scaler, history, new_weeks, n_estimators=50, replay_fraction=0.05, seed=42,
+           quantile_model=None, quantiles=()):
+    """Scaler updated with `new_weeks` and the model continued on them plus a replay sample.
+
+    Returns (model, scaler, quantile_model); the quantile model, if given, is
+    continued on the same rows.
+    """
+    scaler = copy.deepcopy(scaler)
+    scaler.partial_fit(new_weeks[SCALED_FEATURES + [TARGET]])
+    training = pd.concat([new_weeks, replay_sample(history, replay_fraction, seed)], ignore_index=True)
+    X, y = features_and_target(training, scaler)
+    if quantile_model is not None:
+        quantile_model = warm_start(quantile_model, X, y, n_estimators, objective='reg:quantileerror',
+                                    quantile_alpha=np.asarray(quantiles))
+    return warm_start(model, X, y, n_estimators), scaler, quantile_model
+
+
+def retrain(model, scaler, history, new_weeks, n_estimators=50, replay_fraction=0.05, gate_weeks=1,
+            tolerance=0.0, refit=True, seed=42, quantile_model=None, quantiles=()):
+    """Warm-start a candidate on the new weeks and decide whether it replaces the current model.
+
+    The last `gate_weeks` of `new_weeks` are held out: the candidate is
+    trained on the earlier new weeks, and both models are scored on the
+    held-out ones. The candidate is accepted if its RMSE is at most
+    (1 + tolerance) times the current model's. With `refit`, the accepted
+    model is then updated again on all new weeks, so nothing is left out.
+
+    Returns a dict with the model and scaler to use, whether the candidate
+    was promoted, and the metrics of both models on the held-out weeks. A
+    `quantile_model` is updated alongside the candidate and returned as
+    'quantile_model'. The updated one is only used if the candidate is
+    promoted and its interval coverage on the held-out weeks is not further
+    from nominal than the current quantile model's; 'intervals' has both
+    coverages.
+    """
+    dates = _dates(new_weeks)
+    weeks = np.sort(dates.unique())
+    if len(weeks) <= gate_weeks:
+        raise ValueError(f'Need more than {gate_weeks} new week(s) to train and backtest the update')
+    held_out = (dates >= weeks[-gate_weeks]).to_numpy()
+
+    start = time.perf_counter()
+    candidate, candidate_scaler, candidate_quantiles = update(model, scaler, history, new_weeks[~held_out],
+                                                              n_estimators, replay_fraction, seed,
+                                                              quantile_model, quantiles)
+    current_metrics = evaluate(model, scaler, new_weeks[held_out])
+    candidate_metrics = evaluate(candidate, candidate_scaler, new_weeks[held_out])
+    promoted = (candidate_metrics['Root Mean Squared Error (RMSE)']
+                <= current_metrics['Root Mean Squared Error (RMSE)'] * (1 + tolerance))
+
+    intervals = None
+    quantiles_promoted = promoted
+    if quantile_model is not None:
+        # A bundle has one transformer, so a kept quantile model would be served with the candidate's scaler
+        current_intervals = evaluate_intervals(model, candidate_scaler, new_weeks[held_out], quantile_model, quantiles)
+        candidate_intervals = evaluate_intervals(candidate, candidate_scaler, new_weeks[held_out],
+                                                 candidate_quantiles, quantiles)
+        nominal = current_intervals.nominal
+        quantiles_promoted = promoted and (abs(candidate_intervals.coverage - nominal)
+                                           <= abs(current_intervals.coverage - nominal))
+        intervals = {'nominal': nominal, 'current': current_intervals.coverage,
+                     'candidate': candidate_intervals.coverage, 'promoted': bool(quantiles_promoted)}
+
+    if promoted and refit:
+        candidate, candidate_scaler, refit_quantiles = update(model, scaler, history, new_weeks, n_estimators,
+                                                              replay_fraction, seed,
+                                                              quantile_model if quantiles_promoted else None, quantiles)
+        if quantiles_promoted:
+            candidate_quantiles = refit_quantiles
+
+    return {
+        'model': candidate if promoted else model,
+        'scaler': candidate_scaler if promoted else scaler,
+        'quantile_model': candidate_quantiles if quantiles_promoted else quantile_model,
+        'promoted': bool(promoted),
+        'current': current_metrics,
+        'candidate': candidate_metrics,
+        'intervals': intervals,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _replace(obj, path, save=joblib.dump):
+    """Save `obj` next to `path` and swap it in atomically, keeping the old file as `<path>.prev`.
+
+    The temporary file keeps the extension, so `save` can pick the format from it.
+    """
+    root, extension = os.path.splitext(path)
+    tmp_path = f'{root}.{os.getpid()}.tmp{extension}'
+    save(obj, tmp_path)
+    if os.path.exists(path):
+        os.replace(path, f'{path}.prev')
+    os.replace(tmp_path, path)
+
+
+def promote(model, scaler, model_path, scaler_path, bundle_path=None, quantile_model=None, quantiles=()):
+    _replace(scaler, scaler_path)
+    _replace(model, model_path)
+    if bundle_path:
+        bundle = ModelBundle(model, FeatureTransformer.from_scaler(scaler), quantile_model, quantiles)
+        _replace(bundle, bundle_path, save=ModelBundle.save)
+
+
+def log_run(log_path, result, new_weeks, **details):
+    record = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'promoted': result['promoted'],
+        'new_rows': len(new_weeks),
+        'weeks': sorted(str(d.date()) for d in _dates(new_weeks).unique()),
+        'seconds': round(result['seconds'], 2),
+        'current': {k: float(v) for k, v in result['current'].items()},
+        'candidate': {k: float(v) for k, v in result['candidate'].items()},
+        'intervals': result['intervals'],
+        **details,
+    }
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm-start the XGBoost model on newly arrived weeks.')
+    parser.add_argument('history', help='Training history (walmart_cleaned_machine.csv) used for the replay sample')
+    parser.add_argument('new', nargs='+', help='CSV files with the new weeks (same columns as the history)')
+    parser.add_argument('--model', default='../Saved Models/xgb_model.joblib')
+    parser.add_argument('--scaler', default='../Saved Models/scaler.joblib')
+    parser.add_argument('--bundle', help='Also save the promoted model with its feature transformer here (for SmartCast)')
+    parser.add_argument('--trees', type=int, default=50, help='Trees to add')
+    parser.add_argument('--replay', type=float, default=0.05, help='Fraction of the history to replay')
+    parser.add_argument('--gate-weeks', type=int, default=1, help='Most recent new weeks held out for the backtest')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='Allowed relative RMSE increase')
+    parser.add_argument('--no-refit', action='store_true', help='Promote the gated candidate as it is')
+    parser.add_argument('--dry-run', action='store_true', help='Evaluate only, do not replace the model')
+    parser.add_argument('--log', default='retraining_log.jsonl')
+    args = parser.parse_args()
+
+    model, scaler = joblib.load(args.model), joblib.load(args.scaler)
+    history = pd.read_csv(args.history)
+    new_weeks = pd.concat([pd.read_csv(path) for path in args.new], ignore_index=True)
+    # Keep the prediction intervals of the bundle being replaced
+    current_bundle = load_bundle(args.bundle) if args.bundle and os.path.exists(args.bundle) else None
+    quantile_model = current_bundle.quantile_model if current_bundle is not None else None
+    quantiles = current_bundle.quantiles if current_bundle is not None else ()
+
+    result = retrain(model, scaler, history, new_weeks, args.trees, args.replay, args.gate_weeks,
+                     args.tolerance, refit=not args.no_refit, quantile_model=quantile_model, quantiles=quantiles)
+    rmse = 'Root Mean Squared Error (RMSE)'
+    print(f"Held-out RMSE: current {result['current'][rmse]:,.2f}, candidate {result['candidate'][rmse]:,.2f} "
+          f"({result['seconds']:.1f}s)")
+    if result['intervals'] is not None:
+        intervals = result['intervals']
+        print(f"Held-out interval coverage (nominal {intervals['nominal']:.0%}): current {intervals['current']:.1%}, "
+              f"candidate {intervals['candidate']:.1%}"
+              + ('' if intervals['promoted'] or not result['promoted'] else ' - keeping the current quantile model'))
+    if result['promoted'] and not args.dry_run:
+        promote(result['model'], result['scaler'], args.model, args.scaler, args.bundle,
+                result['quantile_model'], quantiles)
+        print(f'Promoted: {args.model} now has {result["model"].get_booster().num_boosted_rounds()} trees')
+    else:
+        print('Kept the current model' + (' (dry run)' if args.dry_run else ''))
+    log_run(args.log, result, new_weeks, trees=args.trees, replay=args.replay, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Lazy, batched sequence windows for the LSTM and WaveNet models.
+
+`create_sequences` in the modelling notebook copies every window into a
+(n, time_steps, features) array, which is `time_steps` times the size of the
+data. `SequenceDataset` keeps one contiguous float32 copy of the features and
+cuts each batch out of a strided view of it, so memory stays the same whatever
+`time_steps` is. It is a Keras `PyDataset`/`Sequence` when TensorFlow is
+installed and can be passed straight to `model.fit` / `model.predict`:
+
+    train_seq = SequenceDataset(X_train, y_train, time_steps=10, batch_size=32, shuffle=True, seed=42)
+    test_seq = SequenceDataset(X_test, y_test, time_steps=10, batch_size=32)
+    lstm.fit(train_seq, epochs=20)
+
+Keras ignores `fit(shuffle=...)` for a dataset, so shuffling the training
+windows is done here: `shuffle=True` reshuffles the window order every epoch.
+Keep evaluation datasets unshuffled so predictions line up with `targets()`.
+
+Window i is X[i:i + time_steps] with target y[i + time_steps], the same as
+`create_sequences`. When `series` is given (one Store x Dept id per row, rows
+sorted by series and date) windows that would cross into another series are
+skipped; `SequenceDataset.from_frame` does that sorting for a dataframe.
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from tensorflow.keras.utils import PyDataset as _KerasDataset
+except ImportError:
+    try:
+        from tensorflow.keras.utils import Sequence as _KerasDataset
+    except ImportError:
+        _KerasDataset = object
+
+
+class SequenceDataset(_KerasDataset):
+    """Batches of (time_steps, features) windows generated on demand."""
+
+    def __init__(self, X, y, time_steps=10, batch_size=32, series=None, shuffle=False, seed=None):
+        super().__init__()
+        if len(X) < time_steps:
+            raise ValueError(f'Need at least time_steps={time_steps} rows to build a window, got {len(X)}')
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        self.time_steps = time_steps
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+        # Window view only; nothing is copied until a batch is requested
+        self.windows = sliding_window_view(self.X, time_steps, axis=0).transpose(0, 2, 1)
+        n_windows = max(len(self.X) - time_steps, 0)
+        starts = np.arange(n_windows)
+        if series is not None:
+            series = np.asarray(series)
+            # A window is valid when its first row and its target row belong to the same series
+            starts = starts[series[:n_windows] == series[time_steps:time_steps + n_windows]]
+        self.starts = starts
+        self.order = starts.copy()
+        if shuffle:
+            self.rng.shuffle(self.order)
+
+    @classmethod
+    def from_frame(cls, frame, feature_columns, target='Weekly_Sales', time_steps=10, batch_size=32,
+                   series_keys=('Store', 'Dept'), date_column='date', **kwargs):
+        """Build a dataset from a dataframe, keeping windows inside each series."""
+        series_keys = list(series_keys)
+        frame = frame.sort_values(series_keys + [date_column], kind='stable')
+        series = frame.groupby(series_keys, sort=False).ngroup().to_numpy()
+        return cls(frame[feature_columns].to_numpy(dtype=np.float32), frame[target].to_numpy(dtype=np.float32),
+                   time_steps, batch_size, series=series, **kwargs)
+
+    @property
+    def n_features(self):
+        return self.X.shape[1]
+
+    @property
+    def shape(self):
+        """Shape the full window array would have if it were materialized."""
+        return (len(self.starts), self.time_steps, self.n_features)
+
+    def __len__(self):
+        return math.ceil(len(self.starts) / self.batch_size)
+
+    def __getitem__(self, index):
+        starts = self.order[index * self.batch_size:(index + 1) * self.batch_size]
+        # Fancy indexing copies just this batch into a contiguous array
+        return self.windows[starts], self.y[starts + self.time_steps]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+    def targets(self):
+        """Targets of all windows in order (the `y_seq` of `create_sequences`)."""
+        return self.y[self.starts + self.time_steps]
@@ -0,0 +1,254 @@
+"""Hyperband / successive-halving hyperparameter search for XGBoost, CatBoost and Random Forest.
+
+Replaces the notebooks' exhaustive `GridSearchCV(cv=3)`. The search space is
+the same grids minus the size parameter (`n_estimators` / `iterations`),
+which becomes the budget: every configuration starts with a small number of
+trees, and only the best 1/eta of each rung is retrained with eta times more.
+Boosted models also stop early once the validation RMSE stops improving.
+
+Validation is time-aware: the last `valid_fraction` of weeks is held out and
+the models are trained on the weeks before it. Features are scaled by
+SmartCast's FeatureTransformer fitted on the training weeks only, so the
+held-out weeks do not leak into the scaling statistics. Trials run in a process pool
+whose workers build the training `DMatrix` / `Pool` once and reuse it for
+every trial. Each finished trial is appended to a JSONL file, so an
+interrupted search picks up where it stopped when run again.
+
+    python tuning.py walmart_cleaned_machine.csv --model xgboost --results xgb_trials.jsonl --jobs 8
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #4 Deliverables'))
+from feature_transformer import FeatureTransformer  # noqa: E402
+
+# Same grids as the modelling notebooks, without the budget parameter
+SEARCH_SPACES = {
+    'xgboost': {
+        'max_depth': [4, 6, 8],
+        'learning_rate': [0.01, 0.1],
+        'subsample': [0.8, 1.0],
+        'colsample_bytree': [0.8, 1.0],
+    },
+    'catboost': {
+        'learning_rate': [0.01, 0.1],
+        'depth': [6, 8, 10],
+    },
+    'random_forest': {
+        'max_depth': [None, 10, 20],
+        'min_samples_split': [2, 5],
+    },
+}
+
+# Parameter that holds the number of trees, and its range in the notebook grids
+BUDGETS = {
+    'xgboost': ('n_estimators', 25, 200),
+    'catboost': ('iterations', 125, 1000),
+    'random_forest': ('n_estimators', 25, 200),
+}
+
+EARLY_STOPPING_ROUNDS = 20
+
+# Per-process training data, set once by _init_worker
+_DATA = {}
+
+
+def load_training_data(path, valid_fraction=0.2, date_column='date'):
+    """Read the unscaled training data and split off the last weeks for validation (see `time_split`)."""
+    return time_split(pd.read_csv(path), valid_fraction, date_column)
+
+
+def time_split(data, valid_fraction=0.2, date_column='date'):
+    """Hold out the last `valid_fraction` of distinct weeks instead of a random sample.
+
+    `data` is unscaled; the scaling statistics are fitted on the training
+    weeks only. Returns (X_train, y_train, X_valid, y_valid) as float32
+    arrays, features in model_feature_order and the target scaled.
+    """
+    dates = pd.to_datetime(data[date_column], format='mixed')
+    unique_dates = np.sort(dates.unique())
+    cutoff = unique_dates[int(len(unique_dates) * (1 - valid_fraction))]
+    valid = (dates >= cutoff).to_numpy()
+
+    transformer = FeatureTransformer().fit(data[~valid])
+    X = transformer.transform(data)
+    y = transformer.scale_target(data['Weekly_Sales']).astype(np.float32)
+    return X[~valid], y[~valid], X[valid], y[valid]
+
+
+def _init_worker(model_name, X_train, y_train, X_valid, y_valid):
+    """Build the library-specific training/validation data once per worker process."""
+    _DATA.clear()
+    _DATA.update(X_valid=X_valid, y_valid=y_valid)
+    if model_name == 'xgboost':
+        import xgboost as xgb
+        _DATA['train'] = xgb.DMatrix(X_train, label=y_train, nthread=1)
+        _DATA['valid'] = xgb.DMatrix(X_valid, label=y_valid, nthread=1)
+    elif model_name == 'catboost':
+        from catboost import Pool
+        _DATA['train'] = Pool(X_train, label=y_train)
+        _DATA['valid'] = Pool(X_valid, label=y_valid)
+    else:
+        _DATA.update(X_train=X_train, y_train=y_train)
+
+
+def _run_trial(model_name, params, budget, seed=42):
+    """Train one configuration with `budget` trees; returns its validation RMSE and tree count."""
+    start = time.perf_counter()
+    if model_name == 'xgboost':
+        import xgboost as xgb
+        booster = xgb.train(
+            {**params, 'objective': 'reg:squarederror', 'eval_metric': 'rmse', 'seed': seed, 'nthread': 1},
+            _DATA['train'], num_boost_round=budget, evals=[(_DATA['valid'], 'valid')],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False,
+        )
+        rmse, trees = booster.best_score, booster.best_iteration + 1
+    elif model_name == 'catboost':
+        from catboost import CatBoostRegressor
+        model = CatBoostRegressor(**params, iterations=budget, random_seed=seed, thread_count=1, verbose=0,
+                                  od_type='Iter', od_wait=EARLY_STOPPING_ROUNDS, use_best_model=True)
+        model.fit(_DATA['train'], eval_set=_DATA['valid'])
+        rmse, trees = model.get_best_score()['validation']['RMSE'], model.get_best_iteration() + 1
+    else:
+        from sklearn.ensemble import RandomForestRegressor
+        model = RandomForestRegressor(**params, n_estimators=budget, random_state=seed, n_jobs=1)
+        model.fit(_DATA['X_train'], _DATA['y_train'])
+        errors = model.predict(_DATA['X_valid']) - _DATA['y_valid']
+        rmse, trees = float(np.sqrt(np.mean(errors ** 2))), budget
+    return {'rmse': float(rmse), 'trees': int(trees), 'seconds': time.perf_counter() - start}
+
+
+def _trial_key(params, budget):
+    return json.dumps(params, sort_keys=True), budget
+
+
+def load_trials(path):
+    """Finished trials from a results file, keyed by (params, budget)."""
+    trials = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    trial = json.loads(line)
+                    trials[_trial_key(trial['params'], trial['budget'])] = trial
+    return trials
+
+
+def grid(space):
+    """All combinations of a search space, as a list of dicts."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def hyperband_brackets(n_configs, min_budget, max_budget, eta=3):
+    """Rung schedules [(n_configs, budget), ...] for each Hyperband bracket.
+
+    Budgets grow by `eta` from `min_budget` up to `max_budget`. The first
+    bracket starts every configuration at `min_budget`; each later bracket
+    starts 1/eta as many configurations one rung higher, down to the last one
+    which trains a few configurations at `max_budget` straight away.
+    """
+    s_max = int(math.ceil(math.log(max_budget / min_budget, eta) - 1e-9))
+    budgets = [min(max_budget, int(min_budget * eta ** i)) for i in range(s_max + 1)]
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil(n_configs / eta ** (s_max - s)))
+        brackets.append([(max(1, n // eta ** i), budget) for i, budget in enumerate(budgets[s_max - s:])])
+    return brackets
+
+
+class HyperbandSearch:
+    """Successive halving over Hyperband brackets, with trials spread over a process pool."""
+
+    def __init__(self, model_name, space=None, eta=3, min_budget=None, max_budget=None,
+                 results_path=None, n_jobs=None, seed=42, brackets=None, verbose=True):
+        if model_name not in SEARCH_SPACES:
+            raise ValueError(f"Unknown model '{model_name}', expected one of: {', '.join(SEARCH_SPACES)}")
+        self.model_name = model_name
+        self.configs = grid(space or SEARCH_SPACES[model_name])
+        self.budget_param, default_min, default_max = BUDGETS[model_name]
+        self.min_budget = min_budget or default_min
+        self.max_budget = max_budget or default_max
+        self.eta = eta
+        self.results_path = results_path
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.verbose = verbose
+        self.brackets = hyperband_brackets(len(self.configs), self.min_budget, self.max_budget, eta)
+        if brackets is not None:
+            self.brackets = self.brackets[:brackets]
+        self.trials = load_trials(results_path)
+
+    def _record(self, trial):
+        self.trials[_trial_key(trial['params'], trial['budget'])] = trial
+        if self.results_path:
+            with open(self.results_path, 'a') as f:
+                f.write(json.dumps(trial) + '\n')
+
+    def _evaluate(self, executor, params_list, budget):
+        """Run (or look up) every configuration at `budget`; returns their trials in order."""
+        pending = {}
+        for params in params_list:
+            if _trial_key(params, budget) not in self.trials:
+                pending[executor.submit(_run_trial, self.model_name, params, budget, self.seed)] = params
+        for future in as_completed(pending):
+            params = pending[future]
+            self._record({'model': self.model_name, 'params': params, 'budget': budget, **future.result()})
+        return [self.trials[_trial_key(params, budget)] for params in params_list]
+
+    def fit(self, X_train, y_train, X_valid, y_valid):
+        """Run all brackets and return the best trial."""
+        rng = np.random.default_rng(self.seed)
+        start = time.perf_counter()
+        initargs = (self.model_name, X_train, y_train, X_valid, y_valid)
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=initargs) as executor:
+            for b, rungs in enumerate(self.brackets):
+                n_start = rungs[0][0]
+                survivors = [self.configs[i] for i in rng.permutation(len(self.configs))[:n_start]]
+                for n_keep, budget in rungs:
+                    survivors = survivors[:n_keep]
+                    trials = self._evaluate(executor, survivors, budget)
+                    ranked = sorted(zip(trials, survivors), key=lambda pair: pair[0]['rmse'])
+                    survivors = [params for _, params in ranked]
+                    if self.verbose:
+                        print(f'bracket {b} budget {budget:>5}: {len(trials):>3} configs, '
+                              f'best RMSE {ranked[0][0]["rmse"]:.5f} ({time.perf_counter() - start:.0f}s)')
+        self.elapsed = time.perf_counter() - start
+        return self.best_trial()
+
+    def best_trial(self):
+        return min(self.trials.values(), key=lambda trial: trial['rmse'])
+
+    def best_params(self):
+        """Best configuration with the budget parameter set to the trees it actually used."""
+        trial = self.best_trial()
+        return {**trial['params'], self.budget_param: trial['trees']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hyperband search with a time-aware validation fold.')
+    parser.add_argument('data', help='Path to walmart_cleaned_machine.csv')
+    parser.add_argument('--model', choices=sorted(SEARCH_SPACES), default='xgboost')
+    parser.add_argument('--results', help='JSONL file to record trials in and resume from')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--eta', type=int, default=3, help='Keep the best 1/eta configurations per rung')
+    parser.add_argument('--valid-fraction', type=float, default=0.2, help='Share of last weeks held out')
+    args = parser.parse_args()
+
+    X_train, y_train, X_valid, y_valid = load_training_data(args.data, args.valid_fraction)
+    search = HyperbandSearch(args.model, eta=args.eta, results_path=args.results, n_jobs=args.jobs)
+    best = search.fit(X_train, y_train, X_valid, y_valid)
+    print(f'Best parameters for {args.model}: {search.best_params()} (validation RMSE {best["rmse"]:.5f})')
+
+
+if __name__ == '__main__':
+    main()
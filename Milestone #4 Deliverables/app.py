@@ -1,6 +1,20 @@
+import datetime
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import altair as alt
 import streamlit as st
 import pandas as pd
-import joblib
+from preprocessing import model_feature_order, feature_info, category_mapping, encode_record
+from batch_scoring import SUPPORTED_EXTENSIONS, iter_chunks, score_to_csv
+from feature_transformer import load_bundle, quantile_label
+from drift_monitor import DriftMonitor
+from forecast_store import ForecastStore, model_version
+from prediction_cache import PredictionCache
+from instrumentation import REGISTRY, timer, start_http_server
+from scenarios import SWEEP_FEATURES, PREDICTION_COLUMN, sweep_values, grid_size, run_sweep, sensitivity, heatmap_table
 
 # Configuration
 st.set_page_config(
@@ -176,149 +190,74 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load model
+MODEL_PATH = "xgb_model.ubj"
+
+# Stage timings are served for Prometheus on http://127.0.0.1:<port>/metrics (and /metrics.json); 0 turns it off
+METRICS_PORT = int(os.environ.get("SMARTCAST_METRICS_PORT", 9464))
+
 @st.cache_resource
-def load_model():
+def start_metrics_server(port):
+    if not port:
+        return None
     try:
-        return joblib.load("xgb_model.joblib")
-    except Exception as e:
-        st.error(f"Failed to load model: {str(e)}")
+        return start_http_server(port)
+    except OSError as e:
+        st.warning(f"Metrics endpoint unavailable on port {port}: {str(e)}")
         return None
 
-model = load_model()
-
-# Define the correct feature order expected by the model
-model_feature_order = [
-    'Store', 'Dept', 'Holiday_Flag', 'Temperature', 'Fuel_Price', 
-    'CPI', 'Unemployment', 'Type', 'Size', 'Month', 
-    'Year', 'WeekOfYear', 'Quarter', 'Season', 'IsPromoWeek'
-]
-
-# Updated feature information
-feature_info = {
-    "Store": {
-        "description": "Unique identifier for each store",
-        "range": "1 to 45 (integer)",
-        "example": "1, 2, 3,...",
-        "icon": "🏪",
-        "default": 22
-    },
-    "Dept": {
-        "description": "Department number within the store",
-        "range": "1 to 99 (integer)",
-        "example": "1, 2, 3,...",
-        "icon": "📦",
-        "default": 50
-    },
-    "date": {
-        "description": "Week of the sale (YYYY-MM-DD format)",
-        "range": "2010-02-05 to 2012-11-23",
-        "example": "2010-02-05, 2012-11-23,...",
-        "icon": "📅",
-        "default": "2011-06-15"
-    },
-    "Weekly_Sales": {
-        "description": "Cleaned weekly sales figures",
-        "range": "Positive numbers",
-        "example": "24924.5, 66836.92,...",
-        "icon": "💰"
-    },
-    "Holiday_Flag": {
-        "description": "Holiday indicator",
-        "range": "0 or 1",
-        "example": "0 = No, 1 = Yes",
-        "icon": "🏷️",
-        "default": 0
-    },
-    "Temperature": {
-        "description": "Average temperature during the week",
-        "range": "30 to 110 (Fahrenheit)",
-        "example": "42.31, 78.50,...",
-        "icon": "🌡️",
-        "default": 70.0
-    },
-    "Fuel_Price": {
-        "description": "Fuel price in the store's region",
-        "range": "2.0 to 4.5 (dollars)",
-        "example": "2.72, 3.14,...",
-        "icon": "⛽",
-        "default": 3.25
-    },
-    "CPI": {
-        "description": "Consumer Price Index",
-        "range": "120 to 250",
-        "example": "126.06, 138.33,...",
-        "icon": "📊",
-        "default": 185.0
-    },
-    "Unemployment": {
-        "description": "Unemployment rate",
-        "range": "3.0 to 15.0 (percentage)",
-        "example": "5.8, 7.2,...",
-        "icon": "📉",
-        "default": 7.5
-    },
-    "Type": {
-        "description": "Store type (A, B, or C)",
-        "range": "A, B, or C",
-        "example": "A = Small, B = Medium, C = Large",
-        "icon": "🏬",
-        "default": "B"
-    },
-    "Size": {
-        "description": "Size of the store in square feet",
-        "range": "20,000 to 250,000",
-        "example": "151315, 202307,...",
-        "icon": "📏",
-        "default": 150000
-    },
-    "Month": {
-        "description": "Month of the year",
-        "range": "1 to 12",
-        "example": "1 (Jan), 6 (Jun), 12 (Dec)",
-        "icon": "📅",
-        "default": 6
-    },
-    "Year": {
-        "description": "Year of the record",
-        "range": "2010 to 2012",
-        "example": "2010, 2011, 2012",
-        "icon": "📅",
-        "default": 2011
-    },
-    "WeekOfYear": {
-        "description": "Week number of the year",
-        "range": "1 to 52",
-        "example": "5, 23, 50",
-        "icon": "📅",
-        "default": 24
-    },
-    "Quarter": {
-        "description": "Quarter of the year",
-        "range": "1 to 4",
-        "example": "1 (Q1), 2 (Q2), 3 (Q3), 4 (Q4)",
-        "icon": "📅",
-        "default": 2
-    },
-    "Season": {
-        "description": "Season of the year",
-        "range": "1 to 4 (1=Winter, 2=Spring, 3=Summer, 4=Fall)",
-        "example": "1, 2, 3, 4",
-        "icon": "🌞",
-        "default": 2
-    },
-    "IsPromoWeek": {
-        "description": "Whether the week includes a promotion",
-        "range": "0 or 1",
-        "example": "0 = No, 1 = Yes",
-        "icon": "🏷️",
-        "default": 0
-    }
-}
+start_metrics_server(METRICS_PORT)
+
+@st.cache_resource
+def current_model_version(mtime):
+    """Hash of the model file; recomputed only when its modification time changes."""
+    try:
+        return model_version(MODEL_PATH)
+    except OSError:
+        return None
+
+# Load the model with its feature transformer in a background thread (cached per model version, so replacing
+# the file loads the new model). The page renders straight away; the first prediction waits for the load.
+@st.cache_resource
+def start_model_loading(version):
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-load").submit(load_bundle, MODEL_PATH)
+
+model_hash = current_model_version(os.path.getmtime(MODEL_PATH) if os.path.exists(MODEL_PATH) else None)
+model_loading = start_model_loading(model_hash)
+
+def get_predictor():
+    """Model bundle once the model is loaded, or None if loading failed."""
+    if not model_loading.done():
+        with st.spinner("Loading the model..."):
+            wait([model_loading])
+    if model_loading.exception() is not None:
+        return None
+    return model_loading.result()
+
+# Predictions shared by all sessions, cleared whenever the model file changes
+@st.cache_resource
+def load_prediction_cache():
+    return PredictionCache(max_size=4096)
 
-category_mapping = {
-    "Type": {"A": 0, "B": 1, "C": 2}
-}
+prediction_cache = load_prediction_cache()
+prediction_cache.set_model_version(model_hash)
+for counter in ("hits", "misses", "evictions"):
+    REGISTRY.gauge(f"prediction_cache_{counter}", lambda counter=counter: getattr(prediction_cache, counter))
+REGISTRY.gauge("prediction_cache_size", lambda: len(prediction_cache))
+
+# Precomputed forecasts written by forecasting.py / batch_scoring.py --store
+FORECAST_DB = "../forecasts.db"
+
+@st.cache_resource
+def load_forecast_store():
+    if not os.path.exists(FORECAST_DB):
+        return None
+    try:
+        return ForecastStore(FORECAST_DB)
+    except Exception as e:
+        st.warning(f"Forecast store unavailable: {str(e)}")
+        return None
+
+forecasts = load_forecast_store()
 
 # App Header
 st.markdown('<div class="header"><h1 style="color:white; margin:0;">✨ SmartCast </h1><p style="color:white; margin:0; opacity:0.8;">Advanced Retail Sales Forecasting System</p></div>', unsafe_allow_html=True)
@@ -333,6 +272,16 @@ with st.sidebar:
     
     st.markdown("---")
     
+    model_status = st.empty()
+    
+    st.markdown("---")
+    
+    # Filled in at the end of the run so the counters include this run's prediction
+    cache_stats = st.empty()
+    latency_stats = st.empty()
+    
+    st.markdown("---")
+    
     st.markdown("""
     <div style="text-align:center; margin-bottom:1rem;">
         <h3 style="color:var(--primary); margin-bottom:0.5rem;">📚 Feature Guide</h3>
@@ -440,43 +389,61 @@ with col1:
                     )
 
     if st.button("✨ Predict Sales", key="predict_single", use_container_width=True):
-        if model:
-            # Prepare the input data for prediction
-            pred_df = pd.DataFrame([input_data])
-            
-            # Convert date to features if needed
-            if "date" in pred_df.columns:
-                pred_df["date"] = pd.to_datetime(pred_df["date"])
-                pred_df["Year"] = pred_df["date"].dt.year
-                pred_df["Month"] = pred_df["date"].dt.month
-                pred_df["WeekOfYear"] = pred_df["date"].dt.isocalendar().week
-                pred_df["Quarter"] = pred_df["date"].dt.quarter
-                # Simple season calculation (1=Winter, 2=Spring, 3=Summer, 4=Fall)
-                pred_df["Season"] = ((pred_df["Month"] % 12 + 3) // 3).map({1:1, 2:1, 3:2, 4:2, 5:2, 6:3, 7:3, 8:3, 9:4, 10:4, 11:4, 12:1})
-                pred_df = pred_df.drop("date", axis=1)
-            
-            # Ensure all required features are present
-            missing_features = [f for f in model_feature_order if f not in pred_df.columns]
-            
-            if missing_features:
-                st.error(f"Missing required features: {', '.join(missing_features)}")
+        predictor = get_predictor()
+        if predictor:
+            try:
+                # Identical inputs share one cache entry: the key is the encoded feature vector
+                with timer("form_encode"):
+                    features = encode_record(input_data)
+                cache_key = tuple(features)
+                prediction = prediction_cache.get(cache_key)
+            except (KeyError, ValueError) as e:
+                st.error(str(e))
             else:
                 try:
-                    # Reorder columns to match model expectations
-                    pred_df = pred_df[model_feature_order]
-                    
-                    # Make prediction
-                    prediction = model.predict(pred_df)[0]
+                    # Make prediction (scaled and scored by the model bundle, in sales units),
+                    # with the quantiles from the same call if the model has an interval model
+                    if prediction is None:
+                        if predictor.quantiles:
+                            point, bands = predictor.predict_encoded_intervals([features])
+                            prediction = (float(point[0]), tuple(bands[0].tolist()))
+                        else:
+                            prediction = (float(predictor.predict_encoded([features])[0]), ())
+                        prediction_cache.put(cache_key, prediction)
+                    prediction, band = prediction
                     
+                    interval = ""
+                    if band:
+                        quantiles = predictor.quantiles
+                        interval = (f'<p style="margin:0.25rem 0;">{(quantiles[-1] - quantiles[0]):.0%} interval '
+                                    f'({quantile_label(quantiles[0])}–{quantile_label(quantiles[-1])}): '
+                                    f'<b>${band[0]:,.2f}</b> – <b>${band[-1]:,.2f}</b></p>')
                     with col2:
                         st.markdown(f"""
                         <div class="prediction-result">
                             <h3 style="margin-top:0;">Predicted Sales</h3>
-                            <div class="prediction-value">${prediction:,.4f}M</div>
+                            <div class="prediction-value">${prediction:,.2f}</div>
+                            {interval}
                             <p style="margin-bottom:0;">for the given parameters</p>
                         </div>
                         """, unsafe_allow_html=True)
                         
+                        # Latest stored run for this model, if any (an indexed lookup, no model call)
+                        if forecasts is not None:
+                            forecast_run = forecasts.latest_run(model_hash)
+                            week = datetime.date.fromisocalendar(
+                                int(input_data["Year"]), int(input_data["WeekOfYear"]), 5)
+                            with timer("forecast_lookup"):
+                                stored = None if forecast_run is None else forecasts.lookup(
+                                    input_data["Store"], input_data["Dept"], week, forecast_run)
+                            if stored is not None:
+                                st.markdown(f"""
+                                <div class="card" style="margin-top:1.5rem;">
+                                    <h3 style="color:var(--primary); margin-top:0;">📦 Stored Forecast</h3>
+                                    <p>Run {forecast_run} forecast for week of {week}: <b>${stored:,.2f}</b></p>
+                                </div>
+                                """, unsafe_allow_html=True)
+                        
                         st.markdown("""
                         <div class="card" style="margin-top:1.5rem;">
                             <h3 style="color:var(--primary); margin-top:0;">📊 Insights</h3>
@@ -493,6 +460,184 @@ with col1:
         else:
             st.error("Model not loaded. Cannot make predictions.")
 
+# Scenario Sweep
+st.markdown("""
+<div class="card">
+    <h2 style="color:var(--primary); margin-top:0;">🧪 Scenario Sweep</h2>
+    <p style="color:#6C757D;">Vary several inputs at once around the scenario above and score every combination in one batch</p>
+</div>
+""", unsafe_allow_html=True)
+
+MAX_SCENARIOS = 1_000_000
+
+sweep_features = st.multiselect(
+    "Features to sweep",
+    SWEEP_FEATURES,
+    default=["Temperature", "Fuel_Price"]
+)
+ranges = {}
+sweep_cols = st.columns(2)
+for i, feature in enumerate(sweep_features):
+    with sweep_cols[i % 2]:
+        values = sweep_values(feature)
+        if len(values) == 2 and set(values) == {0, 1}:
+            st.markdown(f"{feature_info[feature]['icon']} **{feature}**: 0 and 1")
+            ranges[feature] = values
+            continue
+        low, high = float(values[0]), float(values[-1])
+        selected = st.slider(f"{feature_info[feature]['icon']} {feature} range", low, high, (low, high),
+                             key=f"sweep_range_{feature}")
+        steps = st.number_input(f"{feature} steps", min_value=2, max_value=200, value=20,
+                                key=f"sweep_steps_{feature}")
+        ranges[feature] = sweep_values(feature, selected[0], selected[1], int(steps))
+
+n_scenarios = grid_size(ranges)
+st.caption(f"{n_scenarios:,} scenarios (limit {MAX_SCENARIOS:,})")
+
+if sweep_features and st.button("🧪 Run Sweep", key="predict_sweep", use_container_width=True):
+    predictor = get_predictor()
+    if not predictor:
+        st.error("Model not loaded. Cannot make predictions.")
+    elif n_scenarios > MAX_SCENARIOS:
+        st.error(f"{n_scenarios:,} scenarios is more than the {MAX_SCENARIOS:,} limit; use fewer steps.")
+    else:
+        try:
+            start = time.perf_counter()
+            with timer("scenario_sweep"):
+                results = run_sweep(predictor, input_data, ranges)
+            st.session_state["sweep_result"] = {"results": results, "seconds": time.perf_counter() - start}
+        except Exception as e:
+            st.error(f"Scenario sweep failed: {str(e)}")
+
+if "sweep_result" in st.session_state:
+    results = st.session_state["sweep_result"]["results"]
+    swept = [c for c in results.columns if c != PREDICTION_COLUMN]
+    st.markdown(f'<p class="validation-success">✅ Scored {len(results):,} scenarios in '
+                f'{st.session_state["sweep_result"]["seconds"]:.2f}s</p>', unsafe_allow_html=True)
+
+    # Sensitivity curves: mean prediction (and spread) for each value of one feature
+    curve_cols = st.columns(2)
+    for i, feature in enumerate(swept):
+        with timer("sweep_sensitivity"):
+            curve = sensitivity(results, feature)
+        band = alt.Chart(curve).mark_area(opacity=0.2, color="#6C63FF").encode(
+            x=alt.X(f"{feature}:Q"), y=alt.Y("min:Q", title="Predicted sales"), y2="max:Q")
+        line = alt.Chart(curve).mark_line(color="#6C63FF", point=True).encode(
+            x=f"{feature}:Q", y="mean:Q", tooltip=[feature, "mean", "min", "max"])
+        with curve_cols[i % 2]:
+            st.altair_chart((band + line).properties(title=f"Sensitivity to {feature}", height=250),
+                            use_container_width=True)
+
+    # Heatmap over two swept features
+    if len(swept) >= 2:
+        hx, hy = st.columns(2)
+        x = hx.selectbox("Heatmap x", swept, index=0, key="heatmap_x")
+        y = hy.selectbox("Heatmap y", [f for f in swept if f != x], index=0, key="heatmap_y")
+        with timer("sweep_heatmap"):
+            table = heatmap_table(results, x, y)
+        heatmap = alt.Chart(table).mark_rect().encode(
+            x=alt.X(f"{x}:O", axis=alt.Axis(format=".2f")),
+            y=alt.Y(f"{y}:O", axis=alt.Axis(format=".2f"), sort="descending"),
+            color=alt.Color(f"{PREDICTION_COLUMN}:Q", scale=alt.Scale(scheme="purples"), title="Predicted sales"),
+            tooltip=[x, y, PREDICTION_COLUMN]
+        )
+        st.altair_chart(heatmap.properties(title=f"Mean prediction by {x} and {y}", height=350),
+                        use_container_width=True)
+
+# Batch Scoring
+st.markdown("""
+<div class="card">
+    <h2 style="color:var(--primary); margin-top:0;">📁 Batch Scoring</h2>
+    <p style="color:#6C757D;">Upload a CSV, Excel or Parquet file with one row per Store/Dept/week to score it in one go</p>
+</div>
+""", unsafe_allow_html=True)
+
+uploaded_file = st.file_uploader("Upload data to score", type=SUPPORTED_EXTENSIONS)
+chunk_size = st.number_input("Rows per batch", min_value=1_000, max_value=1_000_000, value=100_000, step=10_000)
+
+if uploaded_file is not None and st.button("📊 Score File", key="predict_batch", use_container_width=True):
+    predictor = get_predictor()
+    if predictor:
+        status = st.empty()
+        # Tracks error and interval coverage for files that include Weekly_Sales actuals
+        monitor = DriftMonitor(model_feature_order)
+        try:
+            with tempfile.TemporaryFile(mode="w+", newline="") as scored_file, timer("batch_upload"):
+                rows = score_to_csv(
+                    predictor,
+                    iter_chunks(uploaded_file, uploaded_file.name, int(chunk_size)),
+                    scored_file,
+                    progress=lambda n: status.markdown(f"Scored **{n:,}** rows..."),
+                    monitor=monitor
+                )
+                scored_file.seek(0)
+                st.session_state["batch_result"] = {
+                    "name": f"{os.path.splitext(uploaded_file.name)[0]}_scored.csv",
+                    "rows": rows,
+                    "data": scored_file.read().encode("utf-8"),
+                    "monitor": monitor,
+                }
+            status.markdown(f'<p class="validation-success">✅ Scored {rows:,} rows</p>', unsafe_allow_html=True)
+        except Exception as e:
+            status.markdown(f'<p class="validation-error">❌ Batch scoring failed: {str(e)}</p>', unsafe_allow_html=True)
+    else:
+        st.error("Model not loaded. Cannot make predictions.")
+
+if "batch_result" in st.session_state:
+    result = st.session_state["batch_result"]
+    st.markdown('<div class="uploaded-data"><h4 style="margin-top:0;">Preview of scored data</h4></div>', unsafe_allow_html=True)
+    st.dataframe(pd.read_csv(io.BytesIO(result["data"]), nrows=20), use_container_width=True)
+    # Accuracy against the file's own Weekly_Sales, if it has them
+    errors, intervals = result["monitor"].errors, result["monitor"].intervals
+    if errors.count:
+        metric_columns = st.columns(3)
+        metric_columns[0].metric("MAE", f"${errors.mae:,.2f}")
+        metric_columns[1].metric("RMSE", f"${errors.rmse:,.2f}")
+        if intervals.count:
+            shortfall = (intervals.coverage - intervals.nominal) * 100
+            metric_columns[2].metric("Interval coverage", f"{intervals.coverage:.1%}",
+                                     f"{shortfall:+.1f} pts vs {intervals.nominal:.0%}", delta_color="off",
+                                     help=f"Share of actuals inside the predicted interval "
+                                          f"(mean width ${intervals.mean_width:,.0f})")
+    st.download_button(
+        f"⬇️ Download scored file ({result['rows']:,} rows)",
+        data=result["data"],
+        file_name=result["name"],
+        mime="text/csv",
+        use_container_width=True
+    )
+
+# Model loading status (sidebar)
+if not model_loading.done():
+    model_status.caption("⏳ Model loading in the background...")
+elif model_loading.exception() is not None:
+    model_status.error(f"Failed to load model: {str(model_loading.exception())}")
+else:
+    quantiles = model_loading.result().quantiles
+    interval_note = f", {quantile_label(quantiles[0])}–{quantile_label(quantiles[-1])} intervals" if quantiles else ""
+    model_status.caption(f"✅ Model loaded ({MODEL_PATH}{interval_note})")
+
+# Prediction cache counters (sidebar)
+stats = prediction_cache.stats()
+cache_stats.markdown(f"""
+<div style="font-size:0.9rem;">
+    <b>🧠 Prediction cache</b><br>
+    {stats['size']:,} / {stats['max_size']:,} entries · hit rate {stats['hit_rate']:.0%}<br>
+    hits {stats['hits']:,} · misses {stats['misses']:,} · evictions {stats['evictions']:,}
+</div>
+""", unsafe_allow_html=True)
+
+# Stage latencies of this server process (sidebar)
+with latency_stats.container():
+    st.markdown("**⏱️ Stage latency (ms)**")
+    latency = REGISTRY.summary()
+    if latency:
+        st.dataframe(pd.DataFrame(latency).set_index("stage").round(2), use_container_width=True)
+    else:
+        st.caption("No timings yet")
+    st.download_button("⬇️ Timings (JSON)", data=REGISTRY.to_json(indent=2), file_name="smartcast_metrics.json",
+                       mime="application/json", key="download_metrics", use_container_width=True)
+
 # Footer
 st.markdown("""
 <div class="footer">
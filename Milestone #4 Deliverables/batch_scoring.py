@@ -0,0 +1,173 @@
+"""Chunked batch scoring for SmartCast.
+
+Streams a CSV, Excel or Parquet file in chunks, prepares each chunk with the
+same feature transformer as the single-row prediction and scores it with one
+`model.predict` call per chunk. Predictions are in Weekly_Sales units; a
+model bundled with a quantile model also adds one column per quantile
+(Predicted_Sales_P10, _P50, _P90), scored in the same pass. Can also be run
+from the command line:
+
+    python batch_scoring.py input.csv scored.csv --chunk-size 100000
+"""
+import argparse
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from drift_monitor import DriftMonitor
+from feature_transformer import TARGET, load_bundle, quantile_label
+from forecast_store import ForecastStore, model_version
+from instrumentation import REGISTRY, timer, increment
+from preprocessing import model_feature_order
+from tree_engine import ENGINES
+
+SUPPORTED_EXTENSIONS = ['csv', 'xlsx', 'parquet']
+
+PREDICTION_COLUMN = 'Predicted_Sales'
+
+
+def quantile_column(q):
+    return f'{PREDICTION_COLUMN}_{quantile_label(q)}'
+
+
+def iter_chunks(source, file_name, chunk_size=100_000):
+    """Yield the rows of a CSV/Excel/Parquet file as dataframes of at most `chunk_size` rows.
+
+    `source` can be a path or a file-like object (e.g. a Streamlit upload);
+    `file_name` is only used to pick the reader from its extension.
+    """
+    extension = os.path.splitext(file_name)[1].lower().lstrip('.')
+
+    if extension == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+    elif extension == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    elif extension == 'xlsx':
+        import openpyxl
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            for block in iter(lambda: list(islice(rows, chunk_size)), []):
+                yield pd.DataFrame(block, columns=header)
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(f"Unsupported file type '.{extension}', expected one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+def score_chunks(model, chunks, monitor=None):
+    """Score each chunk in one batched predict call, yielding it with a prediction column.
+
+    `model` is a `ModelBundle`; if it has a quantile model, a column per
+    quantile is added as well. If a `DriftMonitor` is given, its feature
+    sketches are updated with every chunk's (unscaled) features, and chunks
+    that include Weekly_Sales actuals also update its error totals and the
+    coverage of the outermost quantiles' interval. Reading, scoring and
+    monitoring are timed as the batch_read, batch_score and drift_update
+    stages.
+    """
+    chunks = iter(chunks)
+    while True:
+        with timer("batch_read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        with timer("batch_score"):
+            features = model.transformer.encode(chunk)
+            if model.quantiles:
+                chunk[PREDICTION_COLUMN], bands = model.predict_encoded_intervals(features)
+                for i, q in enumerate(model.quantiles):
+                    chunk[quantile_column(q)] = bands[:, i]
+            else:
+                chunk[PREDICTION_COLUMN] = model.predict_encoded(features)
+        increment("rows_scored", len(chunk))
+        if monitor is not None:
+            with timer("drift_update"):
+                monitor.update(pd.DataFrame(features, columns=model_feature_order, copy=False))
+                if TARGET in chunk:
+                    actuals = pd.to_numeric(chunk[TARGET], errors='coerce').to_numpy(dtype=np.float64)
+                    known = np.isfinite(actuals)
+                    monitor.update_performance(actuals[known], chunk[PREDICTION_COLUMN].to_numpy()[known])
+                    if model.quantiles:
+                        monitor.update_intervals(actuals[known], bands[known, 0], bands[known, -1],
+                                                 nominal=model.quantiles[-1] - model.quantiles[0])
+        yield chunk
+
+
+def score_to_csv(model, chunks, out, progress=None, monitor=None, forecast_store=None, run_id=None):
+    """Write the scored chunks to `out` (path or text file object) as one CSV.
+
+    `progress`, if given, is called with the running row count after each chunk.
+    With a `ForecastStore` and `run_id`, every chunk is also bulk-inserted into
+    that run (the input needs Store, Dept and date columns), and the run is
+    finished (row count, planner statistics) once after the last chunk.
+    Returns the number of rows scored.
+    """
+    rows = 0
+    for i, scored in enumerate(score_chunks(model, chunks, monitor)):
+        with timer("batch_write"):
+            scored.to_csv(out, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+        if forecast_store is not None:
+            with timer("forecast_store_insert"):
+                forecast_store.add_forecasts(run_id, scored)
+        rows += len(scored)
+        if progress is not None:
+            progress(rows)
+    if forecast_store is not None:
+        forecast_store.finish_run(run_id)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Excel/Parquet file with the SmartCast model.")
+    parser.add_argument('input', help="File to score (.csv, .xlsx or .parquet)")
+    parser.add_argument('output', help="Where to write the scored CSV")
+    parser.add_argument('--model', default='xgb_model.ubj', help="Path to the saved model")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows per predict call")
+    parser.add_argument('--engine', choices=ENGINES, default='xgboost', help="Inference engine")
+    parser.add_argument('--monitor', help="Drift sketch file (JSON) to update with the scored features")
+    parser.add_argument('--store', help="Forecast store (SQLite file) to save the predictions in as a new run")
+    parser.add_argument('--metrics', help="Write per-stage timings (p50/p95/p99) to this JSON file")
+    args = parser.parse_args()
+
+    monitor = None
+    if args.monitor:
+        monitor = DriftMonitor.load(args.monitor) if os.path.exists(args.monitor) else DriftMonitor(model_feature_order)
+
+    forecast_store, run_id = None, None
+    if args.store:
+        forecast_store = ForecastStore(args.store)
+        run_id = forecast_store.create_run(model_version(args.model), source=os.path.basename(args.input))
+
+    model = load_bundle(args.model).with_engine(args.engine)
+    rows = score_to_csv(model, iter_chunks(args.input, args.input, args.chunk_size), args.output,
+                        progress=lambda n: print(f"\rScored {n:,} rows", end='', flush=True), monitor=monitor,
+                        forecast_store=forecast_store, run_id=run_id)
+    print(f"\nWrote {rows:,} scored rows to {args.output}")
+    if forecast_store is not None:
+        print(f"Saved predictions as run {run_id} in {args.store}")
+    if monitor is not None:
+        monitor.save(args.monitor)
+        print(f"Updated drift sketches in {args.monitor}")
+        if monitor.intervals.count:
+            intervals = monitor.intervals
+            print(f"Interval coverage {intervals.coverage:.1%} (nominal {intervals.nominal:.0%}) "
+                  f"over {intervals.count:,} rows with actuals")
+    if args.metrics:
+        REGISTRY.dump(args.metrics)
+        print(f"Wrote stage timings to {args.metrics}")
+
+
+if __name__ == '__main__':
+    main()
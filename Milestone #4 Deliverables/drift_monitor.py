@@ -0,0 +1,490 @@
+"""Constant-memory drift monitoring with mergeable sketches.
+
+Instead of keeping raw sample lists per feature, each feature is summarized by
+a t-digest (quantile sketch) plus running moments. Sketches are updated batch
+by batch as data is scored, can be merged across worker processes, and are
+small enough to store as JSON. KS and PSI drift statistics are computed
+directly from the sketches. With actuals, the monitor also keeps running
+prediction error (MAE/RMSE) and prediction interval coverage: the share of
+actuals inside the model's P10-P90 interval, compared with the 80% it
+should cover.
+
+    python drift_monitor.py build walmart_cleaned_machine.csv baseline.json
+    python drift_monitor.py check baseline.json worker1.json worker2.json
+"""
+import argparse
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest with the arcsine scale function).
+
+    Memory is bounded by roughly `compression` centroids plus a raw buffer of
+    `buffer_size` values, regardless of how many values are added. Centroids
+    that hold a single distinct value are flagged `exact`, so discrete features
+    (flags, store ids) keep their exact step CDF.
+    """
+
+    def __init__(self, compression=200, buffer_size=5000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = np.empty(0, dtype=bool)
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values):
+            self._buffer.append((values, np.ones(len(values)), np.ones(len(values), dtype=bool)))
+            self._buffered += len(values)
+            if self._buffered >= self.buffer_size:
+                self._compress()
+        return self
+
+    def merge(self, other):
+        other._compress()
+        if len(other.means):
+            self._buffer.append((other.means, other.weights, other.exact))
+            self._buffered += len(other.means)
+        self._compress()
+        return self
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w, _ in self._buffer])
+        exact = np.concatenate([self.exact] + [e for _, _, e in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        # Identical values are combined first so a discrete value is never split across centroids
+        means, inverse = np.unique(means, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights)
+        exact = np.bincount(inverse, weights=~exact) == 0
+        total = weights.sum()
+        # Position of each point in the distribution, mapped through k(q) = d/(2pi) * asin(2q - 1);
+        # points whose k values fall in the same unit interval are merged into one centroid,
+        # which keeps centroids small in the tails and larger around the median.
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        cluster = np.concatenate([[0], np.cumsum(np.diff(cluster) != 0)])
+
+        self.weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=weights * means) / self.weights
+        self.exact = (np.bincount(cluster) == 1) & (np.bincount(cluster, weights=~exact) == 0)
+
+    @property
+    def count(self):
+        self._compress()
+        return float(self.weights.sum())
+
+    def cdf(self, x):
+        """Approximate P(X <= x) for each value in x."""
+        self._compress()
+        x = np.asarray(x, dtype=np.float64)
+        if not len(self.means):
+            return np.full(x.shape, np.nan)
+        cumulative = np.cumsum(self.weights)
+        total = cumulative[-1]
+        result = np.interp(x, self.means, (cumulative - self.weights / 2) / total, left=0.0, right=1.0)
+        # At an exact centroid the step CDF includes the centroid's full weight
+        index = np.clip(np.searchsorted(self.means, x), 0, len(self.means) - 1)
+        on_exact = (self.means[index] == x) & self.exact[index]
+        return np.where(on_exact, cumulative[index] / total, result)
+
+    def quantile(self, q):
+        """Approximate value at quantile(s) q."""
+        self._compress()
+        cumulative = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        return np.interp(q, cumulative, self.means)
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "exact": self.exact.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(compression=data["compression"])
+        digest.means = np.asarray(data["means"], dtype=np.float64)
+        digest.weights = np.asarray(data["weights"], dtype=np.float64)
+        digest.exact = np.asarray(data["exact"], dtype=bool)
+        return digest
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max, updated per batch and mergeable (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values):
+            other = RunningMoments()
+            other.count = len(values)
+            other.mean = float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            other.min = float(values.min())
+            other.max = float(values.max())
+            self.merge(other)
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        for key, value in data.items():
+            setattr(moments, key, value)
+        return moments
+
+
+class FeatureSketch:
+    """Quantile sketch and running moments for one feature."""
+
+    def __init__(self, compression=200):
+        self.digest = TDigest(compression)
+        self.moments = RunningMoments()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.digest.update(values)
+        self.moments.update(values)
+        return self
+
+    def merge(self, other):
+        self.digest.merge(other.digest)
+        self.moments.merge(other.moments)
+        return self
+
+    def to_dict(self):
+        return {"digest": self.digest.to_dict(), "moments": self.moments.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.digest = TDigest.from_dict(data["digest"])
+        sketch.moments = RunningMoments.from_dict(data["moments"])
+        return sketch
+
+
+class ErrorTracker:
+    """Running absolute and squared error sums for streaming MAE/RMSE."""
+
+    def __init__(self):
+        self.count = 0
+        self.abs_error = 0.0
+        self.squared_error = 0.0
+
+    def update(self, y_true, y_pred):
+        errors = np.asarray(y_true, dtype=np.float64).ravel() - np.asarray(y_pred, dtype=np.float64).ravel()
+        self.count += len(errors)
+        self.abs_error += float(np.abs(errors).sum())
+        self.squared_error += float((errors ** 2).sum())
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.abs_error += other.abs_error
+        self.squared_error += other.squared_error
+        return self
+
+    @property
+    def mae(self):
+        return self.abs_error / self.count if self.count else float("nan")
+
+    @property
+    def rmse(self):
+        return math.sqrt(self.squared_error / self.count) if self.count else float("nan")
+
+    def to_dict(self):
+        return {"count": self.count, "abs_error": self.abs_error, "squared_error": self.squared_error}
+
+    @classmethod
+    def from_dict(cls, data):
+        tracker = cls()
+        for key, value in data.items():
+            setattr(tracker, key, value)
+        return tracker
+
+
+class IntervalTracker:
+    """Running coverage and width of prediction intervals against actuals.
+
+    `nominal` is the coverage the intervals should have (e.g. 0.8 for P10-P90).
+    """
+
+    def __init__(self, nominal=None):
+        self.nominal = nominal
+        self.count = 0
+        self.below = 0
+        self.above = 0
+        self.width = 0.0
+
+    def update(self, y_true, lower, upper):
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        lower = np.asarray(lower, dtype=np.float64).ravel()
+        upper = np.asarray(upper, dtype=np.float64).ravel()
+        self.count += len(y_true)
+        self.below += int((y_true < lower).sum())
+        self.above += int((y_true > upper).sum())
+        self.width += float((upper - lower).sum())
+        return self
+
+    def merge(self, other):
+        self.nominal = self.nominal if self.nominal is not None else other.nominal
+        self.count += other.count
+        self.below += other.below
+        self.above += other.above
+        self.width += other.width
+        return self
+
+    @property
+    def coverage(self):
+        return (self.count - self.below - self.above) / self.count if self.count else float("nan")
+
+    @property
+    def mean_width(self):
+        return self.width / self.count if self.count else float("nan")
+
+    def to_dict(self):
+        return {"nominal": self.nominal, "count": self.count, "below": self.below, "above": self.above,
+                "width": self.width}
+
+    @classmethod
+    def from_dict(cls, data):
+        tracker = cls()
+        for key, value in data.items():
+            setattr(tracker, key, value)
+        return tracker
+
+
+def ks_from_sketches(baseline, current):
+    """Two-sample KS statistic and asymptotic p-value computed from two t-digests."""
+    grid = np.union1d(baseline.means, current.means)
+    statistic = float(np.max(np.abs(baseline.cdf(grid) - current.cdf(grid))))
+    n1, n2 = baseline.count, current.count
+    en = math.sqrt(n1 * n2 / (n1 + n2))
+    return statistic, kolmogorov_sf((en + 0.12 + 0.11 / en) * statistic)
+
+
+def kolmogorov_sf(x):
+    """Survival function of the Kolmogorov distribution."""
+    if x < 1e-3:
+        return 1.0
+    j = np.arange(1, 101)
+    return float(np.clip(2 * np.sum((-1) ** (j - 1) * np.exp(-2 * j ** 2 * x ** 2)), 0.0, 1.0))
+
+
+def psi_from_sketches(baseline, current, bins=10, eps=1e-4):
+    """Population Stability Index over the baseline's quantile bins."""
+    edges = np.unique(baseline.quantile(np.linspace(0, 1, bins + 1)[1:-1]))
+    expected = np.diff(np.concatenate([[0.0], baseline.cdf(edges), [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], current.cdf(edges), [1.0]]))
+    expected, actual = np.maximum(expected, eps), np.maximum(actual, eps)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class DriftMonitor:
+    """Per-feature sketches plus running prediction error, updated batch by batch.
+
+    Build one for the training data (the baseline) and one per monitoring
+    window or worker; windows from several workers can be combined with
+    `merge` before calling `check_feature_drift`.
+    """
+
+    def __init__(self, features=None, compression=200):
+        self.compression = compression
+        self.features = {f: FeatureSketch(compression) for f in (features or [])}
+        self.errors = ErrorTracker()
+        self.intervals = IntervalTracker()
+
+    def update(self, frame):
+        """Add a batch of feature rows (DataFrame)."""
+        if not self.features:
+            self.features = {c: FeatureSketch(self.compression) for c in frame.columns}
+        for feature, sketch in self.features.items():
+            if feature in frame.columns:
+                sketch.update(pd.to_numeric(frame[feature], errors="coerce").to_numpy(dtype=np.float64))
+        return self
+
+    def update_performance(self, y_true, y_pred):
+        """Add a batch of actuals and predictions to the running error totals."""
+        self.errors.update(y_true, y_pred)
+        return self
+
+    def update_intervals(self, y_true, lower, upper, nominal=None):
+        """Add a batch of actuals and prediction interval bounds to the running coverage."""
+        if nominal is not None:
+            self.intervals.nominal = nominal
+        self.intervals.update(y_true, lower, upper)
+        return self
+
+    def merge(self, other):
+        for feature, sketch in other.features.items():
+            if feature in self.features:
+                self.features[feature].merge(sketch)
+            else:
+                self.features[feature] = FeatureSketch.from_dict(sketch.to_dict())
+        self.errors.merge(other.errors)
+        self.intervals.merge(other.intervals)
+        return self
+
+    def check_feature_drift(self, current, alpha=0.05, psi_threshold=0.2):
+        """Compare a current window against this (baseline) monitor, feature by feature."""
+        drift_report = {}
+        for feature, baseline in self.features.items():
+            sketch = current.features.get(feature)
+            if sketch is None or sketch.moments.count == 0:
+                drift_report[feature] = {"error": "Feature missing in new data"}
+                continue
+            if baseline.moments.count == 0:
+                drift_report[feature] = {"error": "Feature missing in baseline"}
+                continue
+            statistic, p_value = ks_from_sketches(baseline.digest, sketch.digest)
+            psi = psi_from_sketches(baseline.digest, sketch.digest)
+            drift_report[feature] = {
+                "ks_statistic": statistic,
+                "p_value": p_value,
+                "drift_detected": p_value < alpha,
+                "psi": psi,
+                "psi_drift_detected": psi > psi_threshold,
+                "baseline_mean": baseline.moments.mean,
+                "current_mean": sketch.moments.mean,
+            }
+        return drift_report
+
+    def check_performance_drift(self, current, threshold=0.2):
+        """Compare the current window's MAE with the baseline MAE."""
+        baseline_mae, current_mae = self.errors.mae, current.errors.mae
+        # No actuals yet (NaN) or a perfect baseline (0) gives no meaningful relative change
+        if not math.isfinite(baseline_mae) or baseline_mae <= 0:
+            return {"metric": "MAE", "error": "Insufficient baseline", "baseline_value": float(baseline_mae),
+                    "current_value": float(current_mae), "threshold_exceeded": False}
+        if not math.isfinite(current_mae):
+            return {"metric": "MAE", "error": "Insufficient current data", "baseline_value": float(baseline_mae),
+                    "current_value": float(current_mae), "threshold_exceeded": False}
+        change = (current_mae - baseline_mae) / baseline_mae
+        return {
+            "metric": "MAE",
+            "baseline_value": float(baseline_mae),
+            "current_value": float(current_mae),
+            "percent_change": float(change * 100),
+            "threshold_exceeded": abs(change) > threshold,
+        }
+
+    def check_interval_coverage(self, current, tolerance=0.05):
+        """Compare the current window's interval coverage with its nominal level (and the baseline's coverage)."""
+        intervals = current.intervals
+        nominal = intervals.nominal if intervals.nominal is not None else self.intervals.nominal
+        coverage = intervals.coverage
+        return {
+            "metric": "interval_coverage",
+            "nominal": nominal,
+            "baseline_value": float(self.intervals.coverage),
+            "current_value": float(coverage),
+            "below_share": intervals.below / intervals.count if intervals.count else float("nan"),
+            "above_share": intervals.above / intervals.count if intervals.count else float("nan"),
+            "mean_width": float(intervals.mean_width),
+            "threshold_exceeded": nominal is not None and abs(coverage - nominal) > tolerance,
+        }
+
+    def to_dict(self):
+        return {
+            "compression": self.compression,
+            "features": {f: s.to_dict() for f, s in self.features.items()},
+            "errors": self.errors.to_dict(),
+            "intervals": self.intervals.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        monitor = cls(compression=data["compression"])
+        monitor.features = {f: FeatureSketch.from_dict(s) for f, s in data["features"].items()}
+        monitor.errors = ErrorTracker.from_dict(data["errors"])
+        # Sketch files written before interval tracking have no "intervals"
+        monitor.intervals = IntervalTracker.from_dict(data.get("intervals", {}))
+        return monitor
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def main():
+    from preprocessing import model_feature_order, prepare_features
+
+    parser = argparse.ArgumentParser(description="Build drift sketches or compare them against a baseline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Sketch the model features of a CSV file")
+    build.add_argument("data")
+    build.add_argument("output")
+    build.add_argument("--chunk-size", type=int, default=100_000)
+
+    check = subparsers.add_parser("check", help="Merge monitoring sketches and compare with a baseline")
+    check.add_argument("baseline")
+    check.add_argument("current", nargs="+")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        monitor = DriftMonitor(model_feature_order)
+        for chunk in pd.read_csv(args.data, chunksize=args.chunk_size):
+            if set(model_feature_order) <= set(chunk.columns):
+                monitor.update(chunk[model_feature_order])
+            else:
+                monitor.update(prepare_features(chunk))
+        monitor.save(args.output)
+        print(f"Wrote sketches for {len(monitor.features)} features to {args.output}")
+    else:
+        baseline = DriftMonitor.load(args.baseline)
+        current = DriftMonitor.load(args.current[0])
+        for path in args.current[1:]:
+            current.merge(DriftMonitor.load(path))
+        print(json.dumps(baseline.check_feature_drift(current), indent=2))
+        if current.intervals.count:
+            print(json.dumps(baseline.check_interval_coverage(current), indent=2))
+
+
+if __name__ == "__main__":
+    main()
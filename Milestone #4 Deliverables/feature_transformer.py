@@ -0,0 +1,328 @@
+"""One feature pipeline for training and serving: encoding, date features and scaling.
+
+The notebooks standardise Fuel_Price, Temperature, CPI, Unemployment, Size
+and the Weekly_Sales target with a StandardScaler before training, so the
+model expects scaled inputs and predicts scaled sales. `FeatureTransformer`
+holds those statistics and turns raw rows (dataframe, column arrays or a
+single record) into the model's float32 feature matrix with array
+operations only; `ModelBundle` keeps it together with the model, so every
+caller (SmartCast, batch scoring, forecasting, the scoring service and
+retraining) feeds the model the same features and gets sales back in
+Weekly_Sales units.
+
+Bundle a trained model with its scaler (or fit the statistics from the
+training data) once:
+
+    python feature_transformer.py xgb_model.joblib --scaler "../Saved Models/scaler.joblib" --out xgb_model.ubj
+    python feature_transformer.py xgb_model.joblib --data walmart_cleaned_machine.csv --out xgb_model.ubj
+
+A `.ubj` (or `.json`) output is XGBoost's native model format with the
+transformer statistics stored as a booster attribute: it loads in a few
+milliseconds without unpickling, does not need scikit-learn and does not
+depend on the XGBoost version that wrote it. Any other extension is a
+joblib pickle of the bundle.
+
+A bundle can also carry a quantile model for prediction intervals: one
+XGBoost model with the `reg:quantileerror` objective and one output per
+quantile (P10/P50/P90 by default), trained in a single fit and evaluated
+in a single predict call on the same scaled features as the point model:
+
+    python feature_transformer.py xgb_model.ubj --quantile-data walmart_cleaned_machine.csv --out xgb_model.ubj
+"""
+import argparse
+import base64
+import json
+import os
+
+import joblib
+import numpy as np
+
+from instrumentation import timer, increment
+from preprocessing import model_feature_order, encode_features
+
+# Columns the notebooks standardise (the target is scaled too)
+SCALED_FEATURES = ["Fuel_Price", "Temperature", "CPI", "Unemployment", "Size"]
+TARGET = "Weekly_Sales"
+
+# Scaler saved by the modelling notebooks, used for models saved without a transformer
+DEFAULT_SCALER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Saved Models", "scaler.joblib")
+
+# XGBoost's own model formats; the transformer is saved in the booster attribute below
+NATIVE_EXTENSIONS = (".ubj", ".json")
+TRANSFORMER_ATTRIBUTE = "feature_transformer"
+QUANTILE_MODEL_ATTRIBUTE = "quantile_model"
+QUANTILES_ATTRIBUTE = "quantiles"
+
+# Quantiles of the interval model: P10 and P90 bound an 80% prediction interval
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Smaller than the point model (200 trees of depth 8): with one tree per quantile
+# and round, scoring the three quantiles costs about as much as the point prediction
+QUANTILE_PARAMS = {"n_estimators": 100, "max_depth": 6, "learning_rate": 0.1, "subsample": 0.8, "random_state": 42}
+
+
+def quantile_label(q):
+    """Short name of a quantile: 0.1 -> "P10"."""
+    return f"P{q * 100:g}"
+
+
+class FeatureTransformer:
+    """Raw input rows -> scaled model features, and scaled predictions -> sales.
+
+    `mean` and `std` map each scaled column (SCALED_FEATURES and TARGET) to
+    its statistics; `n_samples` is the number of rows they were computed on,
+    so `partial_fit` can fold new rows in.
+    """
+
+    def __init__(self, mean=None, std=None, n_samples=0):
+        self.mean = dict(mean or {})
+        self.std = dict(std or {})
+        self.n_samples = n_samples
+        self._compile()
+
+    def _compile(self):
+        """Positions in model_feature_order of the scaled columns, with their mean and std."""
+        self.columns = [(i, self.mean[f], self.std[f] or 1.0)
+                        for i, f in enumerate(model_feature_order) if f in self.mean]
+
+    @classmethod
+    def from_scaler(cls, scaler):
+        """Transformer using the statistics of a fitted StandardScaler (e.g. the notebooks' scaler.joblib)."""
+        columns = list(scaler.feature_names_in_)
+        return cls(dict(zip(columns, scaler.mean_.tolist())), dict(zip(columns, scaler.scale_.tolist())),
+                   int(scaler.n_samples_seen_))
+
+    def to_dict(self):
+        return {"mean": self.mean, "std": self.std, "n_samples": self.n_samples}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["mean"], data["std"], data.get("n_samples", 0))
+
+    def fit(self, frame):
+        """Compute the scaling statistics from the training rows (population std, like StandardScaler)."""
+        self.mean, self.std = {}, {}
+        self.n_samples = 0
+        return self.partial_fit(frame)
+
+    def partial_fit(self, frame):
+        """Update the statistics with more rows, as if they had been part of the original fit."""
+        n_new = len(frame)
+        for column in SCALED_FEATURES + [TARGET]:
+            if column not in frame:
+                continue
+            values = np.asarray(frame[column], dtype=np.float64)
+            new_mean, new_var = values.mean(), values.var()
+            if self.n_samples and column in self.mean:
+                n = self.n_samples + n_new
+                mean, var = self.mean[column], self.std[column] ** 2
+                delta = new_mean - mean
+                self.mean[column] = float(mean + delta * n_new / n)
+                var = (var * self.n_samples + new_var * n_new + delta ** 2 * self.n_samples * n_new / n) / n
+            else:
+                self.mean[column], var = float(new_mean), new_var
+            self.std[column] = float(np.sqrt(var))
+        self.n_samples += n_new
+        self._compile()
+        return self
+
+    def encode(self, data):
+        """Unscaled float64 features in model_feature_order (see preprocessing.encode_features)."""
+        with timer("feature_encode"):
+            return encode_features(data)
+
+    def scale(self, features, copy=True):
+        """Standardise an encoded feature matrix.
+
+        Returns a C-ordered float32 array, the precision the trees split on;
+        the scaled columns are computed in float64 first so the values match
+        StandardScaler's exactly.
+        """
+        with timer("feature_scale"):
+            features = np.array(features, dtype=np.float64, copy=copy, ndmin=2, order="K")
+            for i, mean, std in self.columns:
+                column = features[:, i]
+                column -= mean
+                column /= std
+            return np.ascontiguousarray(features, dtype=np.float32)
+
+    def transform(self, data):
+        """Raw rows (dataframe, column arrays or one record) -> model input matrix."""
+        return self.scale(self.encode(data), copy=False)
+
+    def scale_target(self, values):
+        return (np.asarray(values, dtype=np.float64) - self.mean.get(TARGET, 0.0)) / (self.std.get(TARGET) or 1.0)
+
+    def inverse_target(self, values):
+        """Model output (scaled Weekly_Sales) back to sales units."""
+        return np.asarray(values, dtype=np.float64) * (self.std.get(TARGET) or 1.0) + self.mean.get(TARGET, 0.0)
+
+
+class ModelBundle:
+    """A model saved together with the FeatureTransformer it was trained with.
+
+    `predict` takes raw rows and returns Weekly_Sales; `predict_encoded`
+    takes rows already encoded in model_feature_order (e.g. `encode_record`
+    output or a scenario grid). Bundles with a quantile model (`quantiles`
+    is not empty) also give prediction intervals with
+    `predict_intervals` / `predict_encoded_intervals`.
+    """
+
+    # Bundles pickled before quantile models were added have neither attribute
+    quantile_model = None
+    quantiles = ()
+
+    def __init__(self, model, transformer, quantile_model=None, quantiles=()):
+        self.model = model
+        self.transformer = transformer
+        self.quantile_model = quantile_model
+        self.quantiles = tuple(quantiles) if quantile_model is not None else ()
+
+    def predict(self, data):
+        return self.predict_encoded(self.transformer.encode(data), copy=False)
+
+    def predict_encoded(self, features, copy=True):
+        return self._predict_scaled(self.transformer.scale(features, copy=copy))
+
+    def _predict_scaled(self, scaled):
+        with timer("predict"):
+            predictions = self.model.predict(scaled)
+        increment("rows_predicted", len(scaled))
+        return self.transformer.inverse_target(predictions)
+
+    def predict_intervals(self, data):
+        return self.predict_encoded_intervals(self.transformer.encode(data), copy=False)
+
+    def predict_encoded_intervals(self, features, copy=True):
+        """Point predictions and quantile predictions (n_rows x len(quantiles)), in Weekly_Sales units.
+
+        The features are scaled once for both models, and the quantile model
+        returns every quantile from one predict call. Quantiles that cross
+        (possible, since each output has its own trees) are sorted per row.
+        """
+        if self.quantile_model is None:
+            raise ValueError("This model was saved without a quantile model, so it has no prediction intervals")
+        scaled = self.transformer.scale(features, copy=copy)
+        predictions = self._predict_scaled(scaled)
+        with timer("predict_quantiles"):
+            bands = np.asarray(self.quantile_model.predict(scaled)).reshape(len(scaled), -1)
+        return predictions, np.sort(self.transformer.inverse_target(bands), axis=1)
+
+    def with_engine(self, engine):
+        """The same bundle predicting with one of tree_engine's inference engines."""
+        from tree_engine import load_engine
+        with timer("engine_load"):
+            quantile_model = None if self.quantile_model is None else load_engine(self.quantile_model, engine)
+            return ModelBundle(load_engine(self.model, engine), self.transformer, quantile_model, self.quantiles)
+
+    def save(self, path):
+        """Save as native XGBoost (.ubj/.json) with the transformer as a booster attribute, or as a joblib pickle.
+
+        In the native format the quantile model is stored as another booster
+        attribute (its own UBJSON, base64-encoded), so the bundle stays one file.
+        """
+        if os.path.splitext(path)[1].lower() in NATIVE_EXTENSIONS:
+            attributes = {TRANSFORMER_ATTRIBUTE: json.dumps(self.transformer.to_dict()),
+                          QUANTILE_MODEL_ATTRIBUTE: None, QUANTILES_ATTRIBUTE: None}
+            if self.quantile_model is not None:
+                raw = self.quantile_model.get_booster().save_raw("ubj")
+                attributes[QUANTILE_MODEL_ATTRIBUTE] = base64.b64encode(raw).decode("ascii")
+                attributes[QUANTILES_ATTRIBUTE] = json.dumps(list(self.quantiles))
+            self.model.get_booster().set_attr(**attributes)
+            self.model.save_model(path)
+        else:
+            joblib.dump(self, path)
+
+
+def fit_quantile_model(features, target, quantiles=QUANTILES, **params):
+    """One XGBRegressor predicting every quantile of `target` (one output each), in a single fit.
+
+    `features` and `target` are scaled like the point model's training data
+    (`FeatureTransformer.transform` / `scale_target`).
+    """
+    from xgboost import XGBRegressor
+    params = {**QUANTILE_PARAMS, **params}
+    model = XGBRegressor(objective="reg:quantileerror", quantile_alpha=np.asarray(quantiles), **params)
+    with timer("quantile_fit"):
+        return model.fit(features, target)
+
+
+def _load_native(path):
+    """An XGBRegressor saved with save_model, and the transformer stored with it (None if there is none).
+
+    A quantile model stored with it is returned in the third item as (model, quantiles), or None.
+    """
+    from xgboost import XGBRegressor
+    model = XGBRegressor()
+    model.load_model(path)
+    booster = model.get_booster()
+    stored = booster.attr(TRANSFORMER_ATTRIBUTE)
+    quantile = None
+    if booster.attr(QUANTILE_MODEL_ATTRIBUTE):
+        quantile_model = XGBRegressor()
+        quantile_model.load_model(bytearray(base64.b64decode(booster.attr(QUANTILE_MODEL_ATTRIBUTE))))
+        quantile = quantile_model, json.loads(booster.attr(QUANTILES_ATTRIBUTE))
+    return model, FeatureTransformer.from_dict(json.loads(stored)) if stored else None, quantile
+
+
+def load_bundle(path, scaler_path=None):
+    """Load a ModelBundle from a native (.ubj/.json) or joblib file.
+
+    A model saved without its transformer is bundled with its scaler
+    (DEFAULT_SCALER_PATH by default).
+    """
+    with timer("model_load"):
+        if os.path.splitext(path)[1].lower() in NATIVE_EXTENSIONS:
+            saved, transformer, quantile = _load_native(path)
+            if transformer is not None:
+                return ModelBundle(saved, transformer, *(quantile or ()))
+        else:
+            saved = joblib.load(path)
+    if isinstance(saved, ModelBundle):
+        return saved
+    scaler_path = scaler_path or DEFAULT_SCALER_PATH
+    if not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"{path} holds a model without its feature transformer, "
+                                f"and the scaler it was trained with ({scaler_path}) was not found")
+    return ModelBundle(saved, FeatureTransformer.from_scaler(joblib.load(scaler_path)))
+
+
+def main():
+    import pandas as pd
+
+    # Pickle the classes under this module's name, not __main__, so other scripts can load the bundle
+    from feature_transformer import FeatureTransformer, ModelBundle, load_bundle, fit_quantile_model, _load_native
+
+    parser = argparse.ArgumentParser(description="Save a model together with its feature transformer.")
+    parser.add_argument("model", help="Saved model (bare or already bundled)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--scaler", help="StandardScaler saved by the notebooks")
+    source.add_argument("--data", help="Training CSV to fit the scaling statistics on")
+    parser.add_argument("--quantile-data", help="Training CSV to fit the quantile (prediction interval) model on")
+    parser.add_argument("--quantiles", type=float, nargs="+", default=list(QUANTILES),
+                        help="Quantiles the interval model predicts")
+    parser.add_argument("--out", required=True, help="Where to write the bundle")
+    args = parser.parse_args()
+
+    if args.data:
+        native = os.path.splitext(args.model)[1].lower() in NATIVE_EXTENSIONS
+        model = _load_native(args.model)[0] if native else joblib.load(args.model)
+        model = model.model if isinstance(model, ModelBundle) else model
+        bundle = ModelBundle(model, FeatureTransformer().fit(pd.read_csv(args.data)))
+    else:
+        bundle = load_bundle(args.model, args.scaler)
+    if args.quantile_data:
+        training = pd.read_csv(args.quantile_data)
+        quantiles = sorted(args.quantiles)
+        quantile_model = fit_quantile_model(bundle.transformer.transform(training),
+                                            bundle.transformer.scale_target(training[TARGET]), quantiles)
+        bundle = ModelBundle(bundle.model, bundle.transformer, quantile_model, quantiles)
+    bundle.save(args.out)
+    stats = ", ".join(f"{c} {bundle.transformer.mean[c]:,.2f}±{bundle.transformer.std[c]:,.2f}"
+                      for c in bundle.transformer.mean)
+    intervals = f", quantiles {', '.join(quantile_label(q) for q in bundle.quantiles)}" if bundle.quantiles else ""
+    print(f"Wrote {args.out} ({stats}{intervals})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Versioned store of forecast runs in a local SQLite file.
+
+Every batch-scoring or forecasting run can be saved as a run (model version,
+source, time) with one row per Store x Dept x week. Lookups by
+(store, dept, week) hit the primary key and the dashboard access patterns
+(a year, a store, a department) have their own indexes, so reading a stored
+forecast is a single indexed query instead of a model call. Old runs are
+kept, so two runs can be compared without scoring anything again.
+
+    store = ForecastStore("../forecasts.db")
+    run_id = store.save_run(forecast, model_version("xgb_model.ubj"), source="forecasting.py")
+    store.lookup(1, 1, "2012-11-02")
+    store.weekly_totals(year=2012)
+"""
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_version TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    source TEXT,
+    rows INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    store INTEGER NOT NULL,
+    dept INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    forecast REAL NOT NULL,
+    PRIMARY KEY (run_id, store, dept, week)
+) WITHOUT ROWID;
+DROP INDEX IF EXISTS forecasts_by_year;
+-- Covers the dashboard totals (a year, optionally some stores/departments) without table lookups
+CREATE INDEX IF NOT EXISTS forecasts_by_year_store ON forecasts (run_id, year, store, dept, week, forecast);
+CREATE INDEX IF NOT EXISTS forecasts_by_dept ON forecasts (run_id, dept, week);
+CREATE INDEX IF NOT EXISTS runs_by_model ON runs (model_version, run_id);
+"""
+
+# Column names accepted for the forecast value, in order of preference
+VALUE_COLUMNS = ["forecast", "Predicted_Sales"]
+
+
+def model_version(model_path):
+    """Short content hash of a saved model file, used to tell model versions apart."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _week(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class ForecastStore:
+    """SQLite-backed forecast runs; safe to share between threads (one connection per thread)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.connection as connection:
+            connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # Writing
+
+    def create_run(self, model_version, source=None):
+        with self.connection as connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (model_version, created_at, source) VALUES (?, ?, ?)",
+                (model_version, datetime.now().isoformat(timespec="seconds"), source),
+            )
+        return cursor.lastrowid
+
+    def add_forecasts(self, run_id, frame):
+        """Bulk-insert rows with Store, Dept, a `date` (or Date) column and a forecast value.
+
+        Rows with the same Store, Dept and week replace earlier ones in the run.
+        Cheap enough to call once per chunk: the run's row count is only
+        incremented here; call `finish_run` once all rows are in. Returns the
+        number of rows written.
+        """
+        value_column = next((c for c in VALUE_COLUMNS if c in frame.columns), None)
+        date_column = "date" if "date" in frame.columns else "Date"
+        if value_column is None or date_column not in frame.columns:
+            raise ValueError("Forecast rows need Store, Dept, date and forecast (or Predicted_Sales) columns")
+
+        dates = pd.to_datetime(frame[date_column])
+        rows = zip(
+            np.full(len(frame), run_id).tolist(),
+            frame["Store"].astype(int).tolist(),
+            frame["Dept"].astype(int).tolist(),
+            dates.dt.strftime("%Y-%m-%d").tolist(),
+            dates.dt.year.tolist(),
+            frame[value_column].astype(float).tolist(),
+        )
+        with self.connection as connection:
+            connection.executemany("INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?)", rows)
+            connection.execute("UPDATE runs SET rows = rows + ? WHERE run_id = ?", (len(frame), run_id))
+        return len(frame)
+
+    def finish_run(self, run_id):
+        """Exact row count of a run (replaced rows were counted twice) and fresh planner statistics."""
+        with self.connection as connection:
+            # Range scan of this run's primary key, not the whole table
+            connection.execute(
+                "UPDATE runs SET rows = (SELECT COUNT(*) FROM forecasts WHERE run_id = ?) WHERE run_id = ?",
+                (run_id, run_id),
+            )
+            # Refresh planner statistics so year/dept filters pick the right index
+            connection.execute("ANALYZE forecasts")
+
+    def save_run(self, frame, model_version, source=None):
+        """Create a run and store `frame` in it; returns the run id."""
+        run_id = self.create_run(model_version, source)
+        self.add_forecasts(run_id, frame)
+        self.finish_run(run_id)
+        return run_id
+
+    def delete_run(self, run_id):
+        with self.connection as connection:
+            connection.execute("DELETE FROM forecasts WHERE run_id = ?", (run_id,))
+            connection.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    # Reading
+
+    def runs(self):
+        return pd.read_sql_query("SELECT * FROM runs ORDER BY run_id", self.connection)
+
+    def latest_run(self, model_version=None):
+        """Id of the newest run (for `model_version` if given), or None."""
+        if model_version is None:
+            row = self.connection.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT MAX(run_id) FROM runs WHERE model_version = ?", (model_version,)).fetchone()
+        return row[0]
+
+    def _run(self, run_id):
+        return self.latest_run() if run_id is None else run_id
+
+    def _where(self, run_id, year, store, dept):
+        """WHERE clause and parameters selecting a run and the optional filters.
+
+        Store and dept filters can be a single value or a list of values.
+        """
+        clause, params = "WHERE run_id = ?", [self._run(run_id)]
+        for column, value in (("year", year), ("store", store), ("dept", dept)):
+            if value is None:
+                continue
+            if np.ndim(value):
+                clause += f" AND {column} IN ({', '.join('?' * len(value))})"
+                params.extend(int(v) for v in value)
+            else:
+                clause += f" AND {column} = ?"
+                params.append(int(value))
+        return clause, params
+
+    def lookup(self, store, dept, week, run_id=None):
+        """Stored forecast for one Store x Dept x week, or None."""
+        row = self.connection.execute(
+            "SELECT forecast FROM forecasts WHERE run_id = ? AND store = ? AND dept = ? AND week = ?",
+            (self._run(run_id), int(store), int(dept), _week(week)),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def forecasts(self, run_id=None, year=None, store=None, dept=None):
+        """Forecast rows of a run (latest by default), optionally filtered."""
+        where, params = self._where(run_id, year, store, dept)
+        query = f"SELECT store AS Store, dept AS Dept, week AS Date, forecast FROM forecasts {where}"
+        frame = pd.read_sql_query(query + " ORDER BY store, dept, week", self.connection, params=params)
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame
+
+    def weekly_totals(self, run_id=None, year=None, store=None, dept=None):
+        """Forecast summed per week (over the selected stores/departments)."""
+        where, params = self._where(run_id, year, store, dept)
+        query = f"SELECT week AS Date, SUM(forecast) AS forecast FROM forecasts {where}"
+        frame = pd.read_sql_query(query + " GROUP BY week ORDER BY week", self.connection, params=params)
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame
+
+    def compare_runs(self, run_a, run_b, year=None):
+        """Rows present in both runs with their forecasts side by side and the difference."""
+        query = """
+            SELECT a.store AS Store, a.dept AS Dept, a.week AS Date,
+                   a.forecast AS forecast_a, b.forecast AS forecast_b, b.forecast - a.forecast AS difference
+            FROM forecasts a JOIN forecasts b
+              ON b.run_id = ? AND b.store = a.store AND b.dept = a.dept AND b.week = a.week
+            WHERE a.run_id = ?
+        """
+        params = [run_b, run_a]
+        if year is not None:
+            query += " AND a.year = ?"
+            params.append(int(year))
+        frame = pd.read_sql_query(query + " ORDER BY a.store, a.dept, a.week", self.connection, params=params)
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,216 @@
+"""Multi-week forecasts for every Store x Dept series, reconciled up the hierarchy.
+
+All future feature rows (every series x every week of the horizon) are built
+at once and scored with a single `model.predict` call, in Weekly_Sales units. Weather and economic
+inputs for future weeks are not known, so each store's values from the same
+week one year earlier are used (falling back to its latest values), with
+Holiday_Flag and IsPromoWeek taken from the same week last year.
+
+The Store x Dept forecasts are then made coherent with the Store, Type and
+Chain totals, either bottom-up (sum the series) or with MinT using
+structural scaling, which combines them with seasonal-naive forecasts of the
+aggregate levels.
+
+    python forecasting.py ../walmart_cleaned.csv --weeks 13 --method mint --out forecast.csv
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_transformer import load_bundle
+from forecast_store import ForecastStore, model_version
+
+SERIES_KEYS = ["Store", "Dept"]
+TARGET = "Weekly_Sales"
+
+# Hierarchy levels from the top down; None is the chain total
+LEVELS = {"Chain": None, "Type": "Type", "Store": "Store"}
+STORE_ATTRIBUTES = ["Type", "Size"]
+WEEKLY_INPUTS = ["Temperature", "Fuel_Price", "CPI", "Unemployment", "Holiday_Flag", "IsPromoWeek"]
+WEEKLY_AGGREGATION = {"Temperature": "mean", "Fuel_Price": "mean", "CPI": "mean", "Unemployment": "mean",
+                      "Holiday_Flag": "max", "IsPromoWeek": "max"}
+RECONCILIATION_METHODS = ["bottom_up", "mint"]
+
+SEASON_DAYS = 364
+
+
+def _with_date(history):
+    """History with a datetime `date` column, from `Date`, `date` or Year/WeekOfYear.
+
+    Files without a date column get the week's date the way the dashboard's
+    data_loader.prepare_sales_frame derives it.
+    """
+    if "Date" in history.columns and "date" not in history.columns:
+        history = history.rename(columns={"Date": "date"})
+    if "date" in history.columns:
+        return history.assign(date=pd.to_datetime(history["date"], format="mixed"))
+    if {"Year", "WeekOfYear"}.issubset(history.columns):
+        week = history["Year"].astype(int).astype(str) + history["WeekOfYear"].astype(int).astype(str) + "0"
+        return history.assign(date=pd.to_datetime(week, format="%Y%W%w"))
+    raise ValueError("History needs a Date or date column, or Year and WeekOfYear")
+
+
+def future_dates(history, weeks):
+    """The `weeks` weekly dates following the last week in the history."""
+    last = _with_date(history)["date"].max()
+    return pd.DatetimeIndex([last + pd.Timedelta(days=7 * k) for k in range(1, weeks + 1)])
+
+
+def build_future_frame(history, weeks=13):
+    """Feature rows for every Store x Dept series for each of the next `weeks` weeks."""
+    history = _with_date(history)
+    dates = future_dates(history, weeks)
+    series = history[SERIES_KEYS].drop_duplicates().sort_values(SERIES_KEYS).to_numpy()
+
+    # Cross product of series and weeks without a Python loop
+    frame = pd.DataFrame({
+        "Store": np.repeat(series[:, 0], len(dates)),
+        "Dept": np.repeat(series[:, 1], len(dates)),
+        "date": np.tile(dates.to_numpy(), len(series)),
+    })
+
+    # One row of inputs per store and week (flags are set if any department had them)
+    weekly = history.groupby(["Store", "date"]).agg(WEEKLY_AGGREGATION)[WEEKLY_INPUTS].astype(float)
+    latest = weekly.groupby(level="Store").last()
+    attributes = history.groupby("Store")[STORE_ATTRIBUTES].last()
+
+    frame["reference_date"] = frame["date"] - pd.Timedelta(days=SEASON_DAYS)
+    frame = frame.join(weekly, on=["Store", "reference_date"])
+    missing = frame[WEEKLY_INPUTS].isna().any(axis=1)
+    frame.loc[missing, WEEKLY_INPUTS] = latest.loc[frame.loc[missing, "Store"]].to_numpy()
+    frame = frame.join(attributes, on="Store").drop(columns="reference_date")
+    return frame
+
+
+def forecast_series(model, history, weeks=13):
+    """Forecast every Store x Dept series `weeks` weeks ahead with one predict call.
+
+    `model` is a `ModelBundle`, so the forecasts are in Weekly_Sales units
+    like the history the aggregate levels are reconciled with.
+    """
+    frame = build_future_frame(history, weeks)
+    forecast = frame[SERIES_KEYS + ["Type", "date"]].copy()
+    forecast["forecast"] = np.asarray(model.predict(frame), dtype=np.float64)
+    return forecast
+
+
+def aggregation_matrix(bottom):
+    """Hierarchy nodes and the 0/1 matrix A summing the bottom series into each aggregate.
+
+    `bottom` holds one row per Store x Dept series with its Type. Returns
+    (nodes, A): nodes is a dataframe (level, Type, Store, Dept) listing the
+    Chain, Type and Store nodes followed by the bottom series, and A has one
+    row per aggregate node. The full summing matrix is S = [A; I].
+    """
+    bottom = bottom.reset_index(drop=True)
+    blocks, node_frames = [], []
+    for level, column in LEVELS.items():
+        if column is None:
+            codes = np.zeros(len(bottom), dtype=int)
+            node_frames.append(pd.DataFrame({"level": [level]}))
+        else:
+            codes = pd.factorize(bottom[column], sort=True)[0]
+            nodes = bottom.groupby(codes)[["Type", "Store"] if column == "Store" else ["Type"]].first()
+            node_frames.append(nodes.assign(level=level))
+        block = np.zeros((codes.max() + 1, len(bottom)))
+        block[codes, np.arange(len(bottom))] = 1
+        blocks.append(block)
+    node_frames.append(bottom[["Type", "Store", "Dept"]].assign(level="Store x Dept"))
+
+    nodes = pd.concat(node_frames, ignore_index=True)[["level", "Type", "Store", "Dept"]]
+    nodes[["Store", "Dept"]] = nodes[["Store", "Dept"]].astype("Int64")
+    return nodes, np.vstack(blocks)
+
+
+def seasonal_naive(history, nodes, dates):
+    """Base forecasts for the aggregate nodes: the node's total in the same week one year earlier."""
+    history = _with_date(history)
+    base = np.full((len(nodes), len(dates)), np.nan)
+    reference = dates - pd.Timedelta(days=SEASON_DAYS)
+    for level, column in LEVELS.items():
+        rows = np.flatnonzero(nodes["level"] == level)
+        if column is None:
+            base[rows] = history.groupby("date")[TARGET].sum().reindex(reference).to_numpy()
+        else:
+            totals = history.groupby([column, "date"])[TARGET].sum().unstack("date")
+            base[rows] = totals.reindex(index=nodes.loc[rows, column], columns=reference).to_numpy()
+    return base
+
+
+def reconcile(bottom_forecast, A, aggregate_base=None, method="bottom_up"):
+    """Coherent forecasts for every hierarchy node, aggregates first (S = [A; I]).
+
+    `bottom_forecast` is (n_bottom, n_weeks). For "mint", `aggregate_base`
+    holds base forecasts for the aggregate nodes (rows of A); missing ones
+    fall back to the sum of their series. MinT uses structural scaling,
+    W = diag(S @ 1), which needs no in-sample residuals.
+    """
+    aggregates = A @ bottom_forecast
+    if method == "bottom_up":
+        return np.vstack([aggregates, bottom_forecast])
+    if method != "mint":
+        raise ValueError(f"Unknown method '{method}', expected one of: {', '.join(RECONCILIATION_METHODS)}")
+
+    if aggregate_base is not None:
+        known = ~np.isnan(aggregate_base)
+        aggregates[known] = aggregate_base[known]
+
+    # Bottom series have weight 1, aggregates the number of series under them, so
+    # S' W^-1 S = I + A' D A with D = diag(1 / A @ 1). Woodbury turns its inverse
+    # into a solve of size n_aggregates instead of n_bottom.
+    D = 1.0 / A.sum(axis=1)
+    rhs = bottom_forecast + A.T @ (aggregates * D[:, None])
+    small = np.diag(1.0 / D) + A @ A.T
+    reconciled_bottom = rhs - A.T @ np.linalg.solve(small, A @ rhs)
+    return np.vstack([A @ reconciled_bottom, reconciled_bottom])
+
+
+def forecast_hierarchy(model, history, weeks=13, method="mint"):
+    """Forecast all series `weeks` ahead and reconcile them to Store, Type and Chain totals.
+
+    Returns a long dataframe with columns level, Type, Store, Dept, date, forecast.
+    """
+    series_forecast = forecast_series(model, history, weeks)
+    dates = pd.DatetimeIndex(np.sort(series_forecast["date"].unique()))
+    wide = series_forecast.pivot_table(index=SERIES_KEYS, columns="date", values="forecast").reindex(columns=dates)
+    bottom = series_forecast.groupby(SERIES_KEYS, sort=True)["Type"].first().reset_index()
+
+    nodes, A = aggregation_matrix(bottom)
+    aggregate_base = None
+    if method == "mint":
+        aggregate_base = seasonal_naive(history, nodes.iloc[:len(A)], dates)
+    reconciled = reconcile(wide.to_numpy(), A, aggregate_base, method)
+
+    out = nodes.loc[nodes.index.repeat(len(dates))].reset_index(drop=True)
+    out["date"] = np.tile(dates.to_numpy(), len(nodes))
+    out["forecast"] = reconciled.ravel()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast every Store x Dept series and reconcile the totals.")
+    parser.add_argument("history", help="Sales history CSV (walmart_cleaned.csv)")
+    parser.add_argument("--model", default="xgb_model.ubj", help="Path to the saved model")
+    parser.add_argument("--weeks", type=int, default=13, help="Forecast horizon in weeks")
+    parser.add_argument("--method", choices=RECONCILIATION_METHODS, default="mint")
+    parser.add_argument("--out", default="forecast.csv", help="Where to write the forecasts")
+    parser.add_argument("--store", help="Forecast store (SQLite file) to save the Store x Dept forecasts in")
+    args = parser.parse_args()
+
+    history = pd.read_csv(args.history)
+    start = time.perf_counter()
+    forecast = forecast_hierarchy(load_bundle(args.model), history, args.weeks, args.method)
+    elapsed = time.perf_counter() - start
+    forecast.to_csv(args.out, index=False)
+    print(f"Forecast {len(forecast):,} node-weeks ({args.weeks} weeks, {args.method}) in {elapsed:.1f}s -> {args.out}")
+    if args.store:
+        series = forecast[forecast["level"] == "Store x Dept"]
+        run_id = ForecastStore(args.store).save_run(series, model_version(args.model),
+                                                    source=f"forecasting.py {args.weeks}w {args.method}")
+        print(f"Saved {len(series):,} series forecasts as run {run_id} in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
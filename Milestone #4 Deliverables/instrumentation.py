@@ -0,0 +1,294 @@
+"""Lightweight latency and counter instrumentation for SmartCast, the scoring service and the dashboard.
+
+Stages (model load, feature encoding, prediction, data loading, each
+dashboard callback, ...) are timed with a context manager or decorator:
+
+    from instrumentation import timer, timed, increment
+
+    with timer("predict"):
+        predictions = model.predict(features)
+    increment("rows_predicted", len(features))
+
+    @timed("render_overview")
+    def render_overview(...):
+        ...
+
+Every stage keeps a cumulative histogram (fixed buckets, for Prometheus
+`histogram_quantile`) and the most recent WINDOW samples, from which the
+p50/p95/p99 shown in the apps and the JSON dump are computed exactly.
+`to_prometheus()` renders the text exposition format served on `/metrics`,
+`to_json()` / `dump(path)` the same numbers as JSON. `start_http_server`
+serves both from a background thread for apps without their own web server
+(SmartCast under Streamlit).
+
+Metrics are per process: each gunicorn worker reports its own.
+"""
+import functools
+import json
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+NAMESPACE = "sales"
+
+# Latency buckets in seconds, from sub-millisecond single-row predictions to full data loads
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Recent samples kept per stage for the exact percentiles
+WINDOW = 4096
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Latency distribution of one stage: bucket counts, sum, max and a window of recent samples."""
+
+    def __init__(self, buckets=BUCKETS, window=WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self._recent = np.zeros(window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self._recent[self.count % len(self._recent)] = seconds
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def percentiles(self, quantiles=QUANTILES):
+        """Exact percentiles of the most recent samples (NaN before the first one)."""
+        with self._lock:
+            recent = self._recent[:min(self.count, len(self._recent))].copy()
+        if not len(recent):
+            return {q: math.nan for q in quantiles}
+        return dict(zip(quantiles, np.quantile(recent, quantiles).tolist()))
+
+    def snapshot(self):
+        with self._lock:
+            count, total, largest, errors = self.count, self.sum, self.max, self.errors
+            cumulative = np.cumsum(self.counts).tolist()
+        return {
+            "count": count,
+            "errors": errors,
+            "sum": total,
+            "mean": total / count if count else math.nan,
+            "max": largest,
+            **{f"p{round(q * 100)}": v for q, v in self.percentiles().items()},
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], cumulative)),
+        }
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Stage histograms, counters and gauges of one process.
+
+    Gauges are callables evaluated at export time, for numbers other
+    objects already keep (e.g. cache sizes and hit counts).
+    """
+
+    def __init__(self, namespace=NAMESPACE, buckets=BUCKETS, window=WINDOW):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.window = window
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram(self.buckets, self.window))
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the body as one sample of `stage`; exceptions are timed too and counted as errors."""
+        histogram = self.histogram(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            histogram.error()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def timed(self, stage=None):
+        """Decorator timing every call of a function (stage defaults to the function name)."""
+        def decorate(func):
+            name = stage or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, function):
+        """Report `function()` as gauge `name` at every export."""
+        self.gauges[name] = function
+
+    def _stages(self):
+        with self._lock:
+            return sorted(self.stages.items())
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    def _gauge_values(self):
+        values = {}
+        for name, function in list(self.gauges.items()):
+            try:
+                values[name] = float(function())
+            except Exception:
+                values[name] = math.nan
+        return values
+
+    def to_dict(self):
+        """Everything as JSON-ready values (NaN, e.g. percentiles of a stage without samples, is None)."""
+        def clean(value):
+            if isinstance(value, dict):
+                return {k: clean(v) for k, v in value.items()}
+            return None if isinstance(value, float) and math.isnan(value) else value
+        return clean({
+            "started": self.started,
+            "uptime_seconds": time.time() - self.started,
+            "stages": {stage: histogram.snapshot() for stage, histogram in self._stages()},
+            "counters": dict(sorted(self.counters.copy().items())),
+            "gauges": self._gauge_values(),
+        })
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json(indent=2))
+
+    def to_prometheus(self):
+        """Everything in the Prometheus text exposition format (version 0.0.4)."""
+        ns = self.namespace
+        lines = []
+        stages = self._stages()
+        if stages:
+            lines += [f"# HELP {ns}_stage_seconds Time spent per stage.", f"# TYPE {ns}_stage_seconds histogram"]
+            summaries = []
+            for stage, histogram in stages:
+                snapshot = histogram.snapshot()
+                label = f'stage="{_label(stage)}"'
+                for bound, count in snapshot["buckets"].items():
+                    lines.append(f'{ns}_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f"{ns}_stage_seconds_sum{{{label}}} {_number(snapshot['sum'])}")
+                lines.append(f"{ns}_stage_seconds_count{{{label}}} {snapshot['count']}")
+                summaries.append((label, snapshot))
+
+            lines += [f"# HELP {ns}_stage_recent_seconds Percentiles of the last {self.window} samples per stage.",
+                      f"# TYPE {ns}_stage_recent_seconds gauge"]
+            for label, snapshot in summaries:
+                for q in QUANTILES:
+                    value = snapshot[f"p{round(q * 100)}"]
+                    lines.append(f'{ns}_stage_recent_seconds{{{label},quantile="{q}"}} {_number(value)}')
+
+            lines += [f"# HELP {ns}_stage_errors_total Timed calls that raised.",
+                      f"# TYPE {ns}_stage_errors_total counter"]
+            lines += [f"{ns}_stage_errors_total{{{label}}} {snapshot['errors']}" for label, snapshot in summaries]
+
+        for name, value in sorted(self.counters.copy().items()):
+            metric = f"{ns}_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {_number(value)}"]
+        for name, value in sorted(self._gauge_values().items()):
+            metric = f"{ns}_{_metric_name(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One row per stage (count, p50/p95/p99 and max in milliseconds), slowest p95 first."""
+        rows = []
+        for stage, histogram in self._stages():
+            snapshot = histogram.snapshot()
+            rows.append({"stage": stage, "count": snapshot["count"],
+                         **{p: snapshot[p] * 1000 for p in ("p50", "p95", "p99", "max")}})
+        return sorted(rows, key=lambda row: -row["p95"] if not math.isnan(row["p95"]) else 0)
+
+
+# Registry shared by everything in the process
+REGISTRY = Registry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+observe = REGISTRY.observe
+increment = REGISTRY.increment
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = self.registry.to_prometheus(), PROMETHEUS_CONTENT_TYPE
+        elif self.path == "/metrics.json":
+            body, content_type = self.registry.to_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve /metrics (Prometheus) and /metrics.json from a daemon thread; returns the server."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,154 @@
+"""Lag, rolling-window and EWMA features per Store x Dept series.
+
+All features are computed on whole columns at once: the frame is sorted by
+series and date once, windows are strided views (`sliding_window_view`) over
+the sorted target, and only windows that lie entirely inside one series are
+kept. Every feature only looks at earlier weeks of the same series, so they
+can be used for training without leaking the target.
+
+Rows are assumed to be consecutive weeks within a series (as in
+walmart_cleaned.csv), so "lag 4" means four rows back in the same series.
+
+Training:
+    frame = add_lag_features(df)
+
+Prediction (SmartCast): append the rows to score to the recent history of
+their series and take the features of the new rows:
+    features = lag_features_for(history, new_rows)
+
+Nothing imports this module yet: the shipped model was trained on
+`preprocessing.model_feature_order`, which has no lag columns. Using these
+features means retraining with `lag_feature_names()` appended to that order
+and shipping the new order with the model.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+SERIES_KEYS = ['Store', 'Dept']
+TARGET = 'Weekly_Sales'
+
+DEFAULT_LAGS = [1, 2, 4, 52]
+DEFAULT_WINDOWS = [4, 13]
+DEFAULT_SPANS = [4, 13]
+
+
+def lag_feature_names(lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, spans=DEFAULT_SPANS, target=TARGET):
+    """Names of the columns added by `add_lag_features`, in order."""
+    names = [f'{target}_lag_{lag}' for lag in lags]
+    for window in windows:
+        names += [f'{target}_roll_mean_{window}', f'{target}_roll_std_{window}']
+    names += [f'{target}_ewm_{span}' for span in spans]
+    return names
+
+
+def _series_positions(frame, date_column):
+    """Sort order by series and date, plus each sorted row's position within its series."""
+    keys = [frame[key].to_numpy() for key in SERIES_KEYS]
+    dates = pd.to_datetime(frame[date_column], format='mixed').to_numpy()
+    order = np.lexsort([dates] + keys[::-1])
+
+    sorted_keys = np.stack([key[order] for key in keys], axis=1)
+    new_series = np.ones(len(order), dtype=bool)
+    new_series[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    starts = np.flatnonzero(new_series)
+    positions = np.arange(len(order)) - starts[np.cumsum(new_series) - 1]
+    return order, positions
+
+
+def _lag(values, positions, lag):
+    out = np.full(len(values), np.nan)
+    out[lag:] = values[:-lag]
+    out[positions < lag] = np.nan
+    return out
+
+
+def _rolling(values, positions, window):
+    """Mean and std of the `window` weeks before each row (NaN until the series has that many)."""
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) > window:
+        # Row t uses the window that ends at t - 1, i.e. windows[t - window]
+        windows = sliding_window_view(values, window)[:-1]
+        mean[window:] = windows.mean(axis=1)
+        std[window:] = windows.std(axis=1, ddof=1)
+    incomplete = positions < window
+    mean[incomplete] = np.nan
+    std[incomplete] = np.nan
+    return mean, std
+
+
+def _ewm(values, positions, span):
+    """Adjusted EWMA (same as pandas `ewm(span=span).mean()`) of each series, NaNs skipped.
+
+    Series are advanced together one position at a time, so the Python loop
+    runs once per week of the longest series rather than once per row.
+    """
+    decay = 1 - 2 / (span + 1)
+    observed = ~np.isnan(values)
+    weighted = np.where(observed, values, 0.0)
+    numerator = np.empty(len(values))
+    denominator = np.empty(len(values))
+
+    by_position = np.argsort(positions, kind='stable')
+    bounds = np.cumsum(np.bincount(positions))
+    first = by_position[:bounds[0]]
+    numerator[first] = weighted[first]
+    denominator[first] = observed[first]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        rows = by_position[start:end]
+        # Sorted rows of a series are adjacent, so the previous week is rows - 1
+        numerator[rows] = decay * numerator[rows - 1] + weighted[rows]
+        denominator[rows] = decay * denominator[rows - 1] + observed[rows]
+
+    with np.errstate(invalid='ignore'):
+        return numerator / denominator
+
+
+def add_lag_features(frame, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, spans=DEFAULT_SPANS,
+                     target=TARGET, date_column='date'):
+    """Return a copy of `frame` with lag, rolling mean/std and EWMA columns of `target`.
+
+    Rows keep their original order. Rows whose target is NaN (weeks to be
+    predicted) still get features from the known weeks before them.
+    """
+    order, positions = _series_positions(frame, date_column)
+    values = frame[target].to_numpy(dtype=np.float64)[order]
+
+    features = {}
+    for lag in lags:
+        features[f'{target}_lag_{lag}'] = _lag(values, positions, lag)
+    for window in windows:
+        mean, std = _rolling(values, positions, window)
+        features[f'{target}_roll_mean_{window}'] = mean
+        features[f'{target}_roll_std_{window}'] = std
+
+    previous = _lag(values, positions, 1)
+    for span in spans:
+        features[f'{target}_ewm_{span}'] = _ewm(previous, positions, span)
+
+    out = frame.copy()
+    for name, sorted_values in features.items():
+        column = np.empty(len(order))
+        column[order] = sorted_values
+        out[name] = column
+    return out
+
+
+def lag_features_for(history, new_rows, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, spans=DEFAULT_SPANS,
+                     target=TARGET, date_column='date'):
+    """Features for rows to be scored, computed from the preceding history of their series.
+
+    `history` holds past weeks with known `target`; `new_rows` are the weeks to
+    predict (their target, if present, is ignored). Returns `new_rows` with the
+    lag feature columns added, in their original order.
+    """
+    history = history[SERIES_KEYS + [date_column, target]]
+    future = new_rows.drop(columns=[target], errors='ignore').assign(**{target: np.nan})
+    combined = pd.concat([history, future[SERIES_KEYS + [date_column, target]]], ignore_index=True)
+    combined = add_lag_features(combined, lags, windows, spans, target, date_column)
+
+    names = lag_feature_names(lags, windows, spans, target)
+    result = new_rows.copy()
+    result[names] = combined[names].iloc[len(history):].to_numpy()
+    return result
@@ -0,0 +1,71 @@
+"""Bounded, thread-safe LRU cache of single-row predictions.
+
+Keys are the canonical encoded feature tuple (`encode_record` output, all
+floats in `model_feature_order`), so the same scenario entered twice maps to
+the same entry however its fields were typed. Entries belong to one model
+version (the model file's hash): switching to a different model clears the
+cache. One instance is shared by all SmartCast sessions.
+"""
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def set_model_version(self, version):
+        """Drop every entry if `version` differs from the model the entries were computed with."""
+        with self._lock:
+            if version != self.model_version:
+                if self.model_version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.model_version = version
+
+    def get(self, key):
+        """Cached prediction for `key`, or None (counts a hit or a miss)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,358 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Define the correct feature order expected by the model
+model_feature_order = [
+    'Store', 'Dept', 'Holiday_Flag', 'Temperature', 'Fuel_Price', 
+    'CPI', 'Unemployment', 'Type', 'Size', 'Month', 
+    'Year', 'WeekOfYear', 'Quarter', 'Season', 'IsPromoWeek'
+]
+
+# Updated feature information
+feature_info = {
+    "Store": {
+        "description": "Unique identifier for each store",
+        "range": "1 to 45 (integer)",
+        "example": "1, 2, 3,...",
+        "icon": "🏪",
+        "default": 22
+    },
+    "Dept": {
+        "description": "Department number within the store",
+        "range": "1 to 99 (integer)",
+        "example": "1, 2, 3,...",
+        "icon": "📦",
+        "default": 50
+    },
+    "date": {
+        "description": "Week of the sale (YYYY-MM-DD format)",
+        "range": "2010-02-05 to 2012-11-23",
+        "example": "2010-02-05, 2012-11-23,...",
+        "icon": "📅",
+        "default": "2011-06-15"
+    },
+    "Weekly_Sales": {
+        "description": "Cleaned weekly sales figures",
+        "range": "Positive numbers",
+        "example": "24924.5, 66836.92,...",
+        "icon": "💰"
+    },
+    "Holiday_Flag": {
+        "description": "Holiday indicator",
+        "range": "0 or 1",
+        "example": "0 = No, 1 = Yes",
+        "icon": "🏷️",
+        "default": 0
+    },
+    "Temperature": {
+        "description": "Average temperature during the week",
+        "range": "30 to 110 (Fahrenheit)",
+        "example": "42.31, 78.50,...",
+        "icon": "🌡️",
+        "default": 70.0
+    },
+    "Fuel_Price": {
+        "description": "Fuel price in the store's region",
+        "range": "2.0 to 4.5 (dollars)",
+        "example": "2.72, 3.14,...",
+        "icon": "⛽",
+        "default": 3.25
+    },
+    "CPI": {
+        "description": "Consumer Price Index",
+        "range": "120 to 250",
+        "example": "126.06, 138.33,...",
+        "icon": "📊",
+        "default": 185.0
+    },
+    "Unemployment": {
+        "description": "Unemployment rate",
+        "range": "3.0 to 15.0 (percentage)",
+        "example": "5.8, 7.2,...",
+        "icon": "📉",
+        "default": 7.5
+    },
+    "Type": {
+        "description": "Store type (A, B, or C)",
+        "range": "A, B, or C",
+        "example": "A = Small, B = Medium, C = Large",
+        "icon": "🏬",
+        "default": "B"
+    },
+    "Size": {
+        "description": "Size of the store in square feet",
+        "range": "20,000 to 250,000",
+        "example": "151315, 202307,...",
+        "icon": "📏",
+        "default": 150000
+    },
+    "Month": {
+        "description": "Month of the year",
+        "range": "1 to 12",
+        "example": "1 (Jan), 6 (Jun), 12 (Dec)",
+        "icon": "📅",
+        "default": 6
+    },
+    "Year": {
+        "description": "Year of the record",
+        "range": "2010 to 2012",
+        "example": "2010, 2011, 2012",
+        "icon": "📅",
+        "default": 2011
+    },
+    "WeekOfYear": {
+        "description": "Week number of the year",
+        "range": "1 to 52",
+        "example": "5, 23, 50",
+        "icon": "📅",
+        "default": 24
+    },
+    "Quarter": {
+        "description": "Quarter of the year",
+        "range": "1 to 4",
+        "example": "1 (Q1), 2 (Q2), 3 (Q3), 4 (Q4)",
+        "icon": "📅",
+        "default": 2
+    },
+    "Season": {
+        "description": "Season of the year",
+        "range": "0 to 3 (0=Winter, 1=Spring, 2=Summer, 3=Fall)",
+        "example": "0, 1, 2, 3",
+        "icon": "🌞",
+        "default": 2
+    },
+    "IsPromoWeek": {
+        "description": "Whether the week includes a promotion",
+        "range": "0 or 1",
+        "example": "0 = No, 1 = Yes",
+        "icon": "🏷️",
+        "default": 0
+    }
+}
+
+category_mapping = {
+    "Type": {"A": 0, "B": 1, "C": 2}
+}
+
+
+def season(month):
+    """Season code used in training: 0 = Dec-Feb, 1 = Mar-May, 2 = Jun-Aug, 3 = Sep-Nov.
+
+    Works on a single month or an array of months.
+    """
+    return (month % 12) // 3
+
+
+def _as_dates(values):
+    """datetime64[D] array from datetimes, dates or ISO date strings."""
+    values = np.asarray(values)
+    if values.dtype.kind != "M":
+        try:
+            values = values.astype("datetime64[D]")
+        except (ValueError, TypeError):
+            values = pd.to_datetime(values, format="mixed").to_numpy()
+    values = values.astype("datetime64[D]")
+    if np.isnat(values).any():
+        raise ValueError("Missing or invalid dates")
+    return values
+
+
+def _civil_from_days(days):
+    """Year and month of days since 1970-01-01, with integer arithmetic only (proleptic Gregorian)."""
+    z = days + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    # Months counted from March, so the leap day is the last day of the year
+    shifted_month = (5 * day_of_year + 2) // 153
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month
+
+
+def _days_to_january_first(year):
+    """Days since 1970-01-01 of January 1st of each year."""
+    year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    return era * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + 306 - 719468
+
+
+def date_feature_arrays(dates):
+    """Year, Month, WeekOfYear (ISO), Quarter and Season arrays for an array of dates."""
+    days = _as_dates(dates).astype(np.int64)
+    year, month = _civil_from_days(days)
+    # ISO week: the week of the Thursday in the same Monday-Sunday week (1970-01-01 was a Thursday)
+    thursday = days - (days + 3) % 7 + 3
+    week = (thursday - _days_to_january_first(_civil_from_days(thursday)[0])) // 7 + 1
+    return {
+        "Year": year,
+        "Month": month,
+        "WeekOfYear": week,
+        "Quarter": (month - 1) // 3 + 1,
+        "Season": season(month),
+    }
+
+
+def add_date_features(frame, date_column="date"):
+    """Replace a date column with the Year/Month/WeekOfYear/Quarter/Season features."""
+    for feature, values in date_feature_arrays(frame[date_column].to_numpy()).items():
+        frame[feature] = values
+    return frame.drop(date_column, axis=1)
+
+
+def encode_labels(column, values):
+    """Map a categorical column given as labels (e.g. Type 'A'/'B'/'C') to its model codes.
+
+    Numeric values are taken to be codes already and returned unchanged.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values
+    # Look up each distinct label once (hashing), then spread the codes to every row
+    positions, labels = pd.factorize(values.ravel())
+    label_codes = np.array([category_mapping[column].get(label, np.nan) for label in labels], dtype=np.float64)
+    unknown = [str(label) for label, code in zip(labels, label_codes) if np.isnan(code)]
+    if unknown or (positions < 0).any():
+        raise ValueError(f"Unknown {column} values: {', '.join(unknown[:5] or ['missing'])}")
+    return label_codes[positions].reshape(values.shape)
+
+
+def encode_categories(frame):
+    """Map categorical columns given as labels (e.g. Type 'A'/'B'/'C') to their model codes."""
+    for column in category_mapping:
+        if column in frame.columns and not pd.api.types.is_numeric_dtype(frame[column]):
+            frame[column] = encode_labels(column, frame[column].to_numpy())
+    return frame
+
+
+def _values(data, name):
+    values = data[name]
+    return values.to_numpy() if hasattr(values, "to_numpy") else np.atleast_1d(np.asarray(values))
+
+
+def encode_features(data, date_column="date"):
+    """Encode raw input rows into a float64 feature matrix in model_feature_order.
+
+    `data` is a dataframe or a mapping of column name to values (one record
+    of scalars or whole arrays). Derives the date features when a `date`
+    column is present and encodes the categorical columns, all as array
+    operations over every row at once.
+    """
+    derived = date_feature_arrays(_values(data, date_column)) if date_column in data else {}
+    missing = [f for f in model_feature_order if f not in derived and f not in data]
+    if missing:
+        raise ValueError(f"Missing required features: {', '.join(missing)}")
+
+    columns = [derived[f] if f in derived else _values(data, f) for f in model_feature_order]
+    # Column-major, so every feature is written to contiguous memory
+    features = np.empty((len(columns[0]), len(model_feature_order)), dtype=np.float64, order="F")
+    for i, (feature, values) in enumerate(zip(model_feature_order, columns)):
+        features[:, i] = encode_labels(feature, values) if feature in category_mapping else values
+    return features
+
+
+def prepare_features(frame):
+    """Turn raw input rows into the (unscaled) feature frame expected by the model.
+
+    Works on any number of rows at once: derives the date features when a
+    `date` column is present, encodes the categorical columns and orders
+    the columns as in `model_feature_order`. See `encode_features`.
+    """
+    return pd.DataFrame(encode_features(frame), columns=model_feature_order, index=frame.index)
+
+
+# Features that add_date_features derives from a `date` field
+date_features = ["Year", "Month", "WeekOfYear", "Quarter", "Season"]
+
+
+def parse_range(range_text):
+    """Parse a feature_info range string into (low, high) or a set of allowed values.
+
+    Returns None when the range is descriptive only (e.g. "Positive numbers").
+    """
+    text = range_text.split("(")[0].strip().replace(",", "")
+    if " to " in text:
+        low, high = (part.strip() for part in text.split(" to "))
+        try:
+            return float(low), float(high)
+        except ValueError:
+            return datetime.date.fromisoformat(low), datetime.date.fromisoformat(high)
+    if " or " in text:
+        return {int(value) for value in text.split(" or ")}
+    return None
+
+
+# Bounds for every feature with a machine-readable range (Type is checked against category_mapping)
+feature_bounds = {
+    feature: parse_range(info["range"])
+    for feature, info in feature_info.items()
+    if feature != "Type" and parse_range(info["range"]) is not None
+}
+
+
+def validate_record(record):
+    """Check one input record against model_feature_order and the feature_info ranges.
+
+    The record may give either the date-derived features or a single `date`
+    field. Returns a list of error messages (empty when the record is valid).
+    """
+    errors = []
+    expected = [f for f in model_feature_order if not ("date" in record and f in date_features)]
+    if "date" in record:
+        expected.append("date")
+
+    missing = [f for f in expected if f not in record]
+    if missing:
+        errors.append(f"Missing required features: {', '.join(missing)}")
+    unknown = [f for f in record if f not in expected]
+    if unknown:
+        errors.append(f"Unknown features: {', '.join(unknown)}")
+
+    for feature in expected:
+        if feature not in record:
+            continue
+        value = record[feature]
+        bounds = feature_bounds.get(feature)
+        if feature == "Type":
+            # Check the type first: lists/dicts from JSON are unhashable and would raise in the lookups
+            if (isinstance(value, bool) or not isinstance(value, (str, int, float))
+                    or (value not in category_mapping["Type"] and value not in category_mapping["Type"].values())):
+                errors.append(f"Type must be one of {', '.join(category_mapping['Type'])}")
+        elif feature == "date":
+            try:
+                value = datetime.date.fromisoformat(str(value))
+            except ValueError:
+                errors.append("date must be in YYYY-MM-DD format")
+                continue
+            if not bounds[0] <= value <= bounds[1]:
+                errors.append(f"date must be in range {feature_info['date']['range']}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append(f"{feature} must be a number")
+        elif isinstance(bounds, set) and value not in bounds:
+            errors.append(f"{feature} must be {feature_info[feature]['range']}")
+        elif isinstance(bounds, tuple) and not bounds[0] <= value <= bounds[1]:
+            errors.append(f"{feature} must be in range {feature_info[feature]['range']}")
+    return errors
+
+
+def encode_record(record):
+    """Encode one validated record into a feature list in model_feature_order.
+
+    Plain-Python equivalent of prepare_features for a single row, used on
+    latency-sensitive paths where building a dataframe per row is too slow.
+    """
+    values = dict(record)
+    if "date" in values:
+        date = datetime.date.fromisoformat(str(values.pop("date")))
+        values["Year"] = date.year
+        values["Month"] = date.month
+        values["WeekOfYear"] = date.isocalendar()[1]
+        values["Quarter"] = (date.month - 1) // 3 + 1
+        values["Season"] = season(date.month)
+    if isinstance(values["Type"], str):
+        values["Type"] = category_mapping["Type"][values["Type"]]
+    return [float(values[f]) for f in model_feature_order]
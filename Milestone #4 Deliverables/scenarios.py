@@ -0,0 +1,79 @@
+"""What-if scenario sweeps for SmartCast.
+
+Starting from one base record, the chosen features are swept over ranges of
+values and every combination (the Cartesian grid) is built as a single NumPy
+array in `model_feature_order`, then scaled and scored with one batched
+predict call of the model bundle.
+
+    ranges = {"Temperature": sweep_values("Temperature", steps=20),
+              "IsPromoWeek": sweep_values("IsPromoWeek")}
+    results = run_sweep(model, base_record, ranges)
+    sensitivity(results, "Temperature")
+"""
+import numpy as np
+import pandas as pd
+
+from preprocessing import model_feature_order, feature_bounds, encode_record
+
+SWEEP_FEATURES = ["Temperature", "Fuel_Price", "CPI", "Unemployment", "IsPromoWeek", "Holiday_Flag"]
+
+PREDICTION_COLUMN = "Predicted_Sales"
+
+
+def sweep_values(feature, low=None, high=None, steps=10):
+    """Values to try for `feature`: both flag values, or `steps` points between low and high.
+
+    low/high default to the feature's range in feature_info.
+    """
+    bounds = feature_bounds[feature]
+    if isinstance(bounds, set):
+        return np.array(sorted(bounds), dtype=np.float64)
+    low = bounds[0] if low is None else low
+    high = bounds[1] if high is None else high
+    return np.linspace(low, high, steps)
+
+
+def grid_size(ranges):
+    return int(np.prod([len(values) for values in ranges.values()], dtype=np.int64)) if ranges else 1
+
+
+def build_grid(base_record, ranges):
+    """Feature matrix (n_scenarios, n_features) for every combination of the swept values.
+
+    Columns follow `model_feature_order`; features not in `ranges` keep their
+    value from `base_record`.
+    """
+    unknown = [f for f in ranges if f not in model_feature_order]
+    if unknown:
+        raise ValueError(f"Cannot sweep unknown features: {', '.join(unknown)}")
+
+    grid = np.empty((grid_size(ranges), len(model_feature_order)), dtype=np.float64)
+    grid[:] = np.asarray(encode_record(base_record), dtype=np.float64)
+    if ranges:
+        mesh = np.meshgrid(*ranges.values(), indexing="ij")
+        for feature, values in zip(ranges, mesh):
+            grid[:, model_feature_order.index(feature)] = values.ravel()
+    return grid
+
+
+def run_sweep(model, base_record, ranges):
+    """Score every scenario in one predict call of `model` (a `ModelBundle`).
+
+    Returns a dataframe with one column per swept feature and the prediction.
+    """
+    grid = build_grid(base_record, ranges)
+    predictions = model.predict_encoded(grid)
+    columns = [model_feature_order.index(feature) for feature in ranges]
+    results = pd.DataFrame(grid[:, columns], columns=list(ranges))
+    results[PREDICTION_COLUMN] = np.asarray(predictions, dtype=np.float64)
+    return results
+
+
+def sensitivity(results, feature):
+    """Mean, min and max prediction for each value of `feature` over all other swept features."""
+    return results.groupby(feature)[PREDICTION_COLUMN].agg(["mean", "min", "max"]).reset_index()
+
+
+def heatmap_table(results, x, y):
+    """Mean prediction for each (x, y) pair, averaged over the remaining swept features."""
+    return results.groupby([x, y], as_index=False)[PREDICTION_COLUMN].mean()
@@ -0,0 +1,252 @@
+"""Headless HTTP scoring service for the SmartCast model.
+
+Loads the model once and serves predictions over a small asyncio HTTP/1.1
+server (standard library only). Concurrent requests are coalesced into
+micro-batches so the model sees one `predict` call per batch instead of one
+per request.
+
+    python serve.py --port 8000 --max-batch-size 256 --max-latency-ms 5
+
+Endpoints:
+    GET  /health   -> {"status": "ok", ...}
+    POST /predict  -> body is one record or {"instances": [record, ...]},
+                      response is {"predictions": [...]}, plus
+                      {"intervals": [{"P10": ..., "P50": ..., "P90": ...}, ...]}
+                      if the model has a quantile model
+    GET  /metrics  -> per-stage latency histograms and counters (Prometheus text format)
+    GET  /metrics.json -> the same with p50/p95/p99 per stage, as JSON
+
+A record uses the same fields as the SmartCast form (see feature_info),
+either with Year/Month/WeekOfYear/Quarter/Season or with a single `date`.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from feature_transformer import load_bundle, quantile_label
+from instrumentation import REGISTRY, PROMETHEUS_CONTENT_TYPE, timer, observe, increment
+from preprocessing import validate_record, encode_record
+from tree_engine import ENGINES
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class MicroBatcher:
+    """Collect single-row predictions into batches for one `model.predict` call.
+
+    A batch is sent to the model when it reaches `max_batch_size` rows or when
+    the oldest queued row has waited `max_latency_ms`, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size=256, max_latency_ms=5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+
+    async def predict(self, rows):
+        """Queue encoded feature rows and wait for their predictions."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self.queue.put_nowait((row, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    def _predict_batch(self, rows):
+        """One prediction per row: a float, or (float, {quantile label: value}) if the model has quantiles."""
+        features = np.asarray(rows, dtype=np.float64)
+        if not self.model.quantiles:
+            return self.model.predict_encoded(features, copy=False).tolist()
+        predictions, bands = self.model.predict_encoded_intervals(features, copy=False)
+        labels = [quantile_label(q) for q in self.model.quantiles]
+        return [(prediction, dict(zip(labels, band))) for prediction, band in zip(predictions.tolist(), bands.tolist())]
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Take whatever else is already waiting without extending the deadline
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            rows = [row for row, _ in batch]
+            observe("batch_fill", loop.time() - deadline + self.max_latency)
+            try:
+                predictions = await loop.run_in_executor(None, self._predict_batch, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+
+class PredictionServer:
+    """Minimal keep-alive HTTP/1.1 front end for a MicroBatcher."""
+
+    def __init__(self, batcher, model_path):
+        self.batcher = batcher
+        self.model_path = model_path
+        self.started = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, {
+                "status": "ok",
+                "model": self.model_path,
+                "quantiles": list(self.batcher.model.quantiles),
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "batches": self.batcher.batches,
+                "rows": self.batcher.rows,
+            }
+        if path == "/predict":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            with timer("request_predict"):
+                return await self.predict(body)
+        if path in ("/metrics", "/metrics.json"):
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, REGISTRY.to_prometheus() if path == "/metrics" else REGISTRY.to_dict()
+        return 404, {"error": f"Unknown path {path}"}
+
+    async def predict(self, body):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"error": "Body must be valid JSON"}
+
+        records = payload.get("instances", [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            return 400, {"error": "Expected a record or {\"instances\": [record, ...]}"}
+
+        errors = {i: e for i, e in ((i, validate_record(r)) for i, r in enumerate(records)) if e}
+        if errors:
+            increment("invalid_requests")
+            return 400, {"error": "Invalid input", "details": errors}
+
+        try:
+            with timer("feature_encode_records"):
+                rows = [encode_record(r) for r in records]
+            predictions = await self.batcher.predict(rows)
+        except Exception as e:
+            return 500, {"error": f"Prediction failed: {str(e)}"}
+        if self.batcher.model.quantiles:
+            return 200, {"predictions": [p for p, _ in predictions], "intervals": [band for _, band in predictions]}
+        return 200, {"predictions": predictions}
+
+    async def respond(self, writer, status, payload, keep_alive=True):
+        """Send `payload` as JSON, or as Prometheus text if it is already a string."""
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(model_path, host, port, max_batch_size, max_latency_ms, engine="xgboost"):
+    model = load_bundle(model_path).with_engine(engine)
+    batcher = MicroBatcher(model, max_batch_size, max_latency_ms)
+    server = PredictionServer(batcher, model_path)
+
+    batch_task = asyncio.create_task(batcher.run())
+    tcp_server = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"SmartCast scoring service listening on http://{host}:{port} "
+          f"(max batch {max_batch_size}, max latency {max_latency_ms} ms)")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SmartCast predictions over HTTP.")
+    parser.add_argument("--model", default="xgb_model.ubj", help="Path to the saved model")
+    parser.add_argument("--engine", choices=ENGINES, default="xgboost", help="Inference engine")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=256, help="Most rows per predict call")
+    parser.add_argument("--max-latency-ms", type=float, default=5.0,
+                        help="Longest time a request waits for its batch to fill")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.model, args.host, args.port, args.max_batch_size, args.max_latency_ms, args.engine))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Compiled NumPy inference engine for the saved XGBoost model.
+
+The booster's trees are exported once into flat node arrays (feature,
+threshold, children, default direction, leaf value) and evaluated for a whole
+batch at a time: every row walks every tree in lock-step, one tree level per
+NumPy step. This skips the DataFrame validation and DMatrix construction done
+by `XGBRegressor.predict`. On the shipped model (200 trees of depth 8) it is
+not faster than XGBoost's native predictor at any batch size:
+benchmarks/bench_tree_engine.py, with float32 arrays as ModelBundle passes
+them, gives (compiled vs XGBoost) 0.22 vs 0.22 ms for one row, 0.51 vs
+0.35 ms for 10 rows, 3.1 vs 1.4 ms for 100 rows and ~30k vs ~105k rows/s
+from 1,000 rows up. So
+"xgboost" is the default everywhere; "compiled" is kept for parity checks,
+benchmarks and models small enough for it to pay off.
+
+Usage:
+    engine = load_engine(model, "compiled")
+    engine.predict(features)  # same result as model.predict(features)
+"""
+import json
+
+import numpy as np
+
+ENGINES = ["xgboost", "compiled"]
+
+# Objectives whose prediction is the raw margin (no link function)
+IDENTITY_OBJECTIVES = {
+    "reg:squarederror",
+    "reg:squaredlogerror",
+    "reg:absoluteerror",
+    "reg:pseudohubererror",
+    "reg:quantileerror",
+}
+
+
+class CompiledTreeEngine:
+    """Tree ensemble flattened into NumPy arrays and evaluated vectorized."""
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, tree_group, base_score, max_depth, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.tree_group = tree_group
+        self.base_score = base_score
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+        self.n_groups = int(tree_group.max()) + 1 if len(tree_group) else 1
+        # Interleaved (left, right) children so the next node is children[2 * node + go_right]
+        self.children = np.stack([left, right], axis=1).ravel()
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile an `XGBRegressor` (or a raw `xgboost.Booster`).
+
+        Like `XGBRegressor.predict`, a model trained with early stopping only
+        uses the trees up to its `best_iteration`; a raw Booster uses all of them.
+        """
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        raw = json.loads(booster.save_raw("json"))
+        learner = raw["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective '{objective}' is not supported by the compiled engine")
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Booster '{gbm['name']}' is not supported by the compiled engine")
+
+        trees = gbm["model"]["trees"]
+        tree_info = gbm["model"]["tree_info"]
+        n_trees = _best_iteration_trees(model, gbm["model"])
+        if n_trees is not None:
+            trees, tree_info = trees[:n_trees], tree_info[:n_trees]
+        features, thresholds, lefts, rights, defaults, values, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported by the compiled engine")
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            right = np.asarray(tree["right_children"], dtype=np.int32)
+            n_nodes = len(left)
+            is_leaf = left == -1
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+
+            # Leaves point at themselves so extra traversal steps are no-ops
+            lefts.append(np.where(is_leaf, node_ids, left) + offset)
+            rights.append(np.where(is_leaf, node_ids, right) + offset)
+            features.append(np.where(is_leaf, 0, tree["split_indices"]).astype(np.int32))
+            thresholds.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            defaults.append(np.asarray(tree["default_left"], dtype=bool))
+            # For leaf nodes XGBoost stores the leaf value in split_conditions
+            values.append(np.where(is_leaf, tree["split_conditions"], 0.0).astype(np.float32))
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += n_nodes
+
+        base_score = float(learner["learner_model_param"]["base_score"])
+        feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is None:
+            feature_names = booster.feature_names
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            default_left=np.concatenate(defaults),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            tree_group=np.asarray(tree_info, dtype=np.int32),
+            base_score=base_score,
+            max_depth=max_depth,
+            feature_names=None if feature_names is None else list(feature_names),
+        )
+
+    def save(self, path):
+        """Save the compiled arrays to an .npz file."""
+        np.savez(
+            path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            tree_group=self.tree_group, base_score=self.base_score, max_depth=self.max_depth,
+            feature_names=np.asarray(self.feature_names or [], dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load arrays written by `save`."""
+        with np.load(path) as data:
+            feature_names = [str(name) for name in data["feature_names"]] or None
+            return cls(
+                feature=data["feature"], threshold=data["threshold"], left=data["left"],
+                right=data["right"], default_left=data["default_left"], value=data["value"],
+                roots=data["roots"], tree_group=data["tree_group"],
+                base_score=float(data["base_score"]), max_depth=int(data["max_depth"]),
+                feature_names=feature_names,
+            )
+
+    def _as_array(self, X):
+        if hasattr(X, "columns"):
+            if self.feature_names is not None and list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict_margin(self, X, block_size=4096):
+        """Sum of leaf values per output group plus base_score, shape (n_rows, n_groups)."""
+        X = self._as_array(X)
+        n_rows, n_features = X.shape
+        out = np.empty((n_rows, self.n_groups), dtype=np.float64)
+        has_missing = bool(np.isnan(X).any())
+
+        for start in range(0, n_rows, block_size):
+            block = X[start:start + block_size]
+            n_block = block.shape[0]
+            values = block.ravel()
+            row_offset = (np.arange(n_block, dtype=np.int32) * n_features)[:, None]
+            node = np.broadcast_to(self.roots, (n_block, len(self.roots))).copy()
+            for _ in range(self.max_depth):
+                x = values[row_offset + self.feature[node]]
+                # NaN compares False, so missing values go right unless the node defaults left
+                go_right = ~(x < self.threshold[node])
+                if has_missing:
+                    go_right = np.where(np.isnan(x), ~self.default_left[node], go_right)
+                node = self.children[2 * node + go_right]
+            leaf_values = self.value[node]
+            if self.n_groups == 1:
+                out[start:start + n_block, 0] = leaf_values.sum(axis=1, dtype=np.float64)
+            else:
+                for group in range(self.n_groups):
+                    out[start:start + n_block, group] = leaf_values[:, self.tree_group == group].sum(
+                        axis=1, dtype=np.float64)
+        return out + self.base_score
+
+    def predict(self, X):
+        """Predict like `XGBRegressor.predict` (1-D for single-output models)."""
+        margin = self.predict_margin(X).astype(np.float32)
+        return margin[:, 0] if self.n_groups == 1 else margin
+
+
+def _best_iteration_trees(model, gbtree):
+    """Number of trees `model.predict` uses when the model has a `best_iteration`, else None."""
+    if not hasattr(model, "get_booster"):
+        return None
+    try:
+        rounds = model.best_iteration + 1
+    except AttributeError:
+        return None
+    indptr = gbtree.get("iteration_indptr")
+    if indptr:
+        return indptr[min(rounds, len(indptr) - 1)]
+    # Older model files: every round adds one tree per output group and parallel tree
+    trees_per_round = len(set(gbtree["tree_info"])) * int(gbtree["gbtree_model_param"]["num_parallel_tree"])
+    return rounds * trees_per_round
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [child for node in frontier if left[node] != -1 for child in (left[node], right[node])]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def load_engine(model, engine="xgboost"):
+    """Return an object with a `predict` method for the chosen inference engine."""
+    if engine == "xgboost":
+        return model
+    if engine == "compiled":
+        return CompiledTreeEngine.from_model(model)
+    raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+
+
+def check_parity(model, X, engine=None, atol=1e-4):
+    """Compare the compiled engine with `model.predict` on X.
+
+    Returns the largest absolute difference; raises AssertionError if it is above `atol`.
+    """
+    engine = engine or CompiledTreeEngine.from_model(model)
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = np.asarray(engine.predict(X), dtype=np.float64)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if max_diff > atol:
+        raise AssertionError(f"Compiled engine differs from model.predict by {max_diff:.3g} (> {atol})")
+    return max_diff
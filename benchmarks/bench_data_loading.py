@@ -0,0 +1,81 @@
+"""Benchmark dashboard data loading: plain CSV parse vs the typed Feather cache.
+
+Each variant runs in a fresh Python process so load time and peak RSS are
+measured from a cold interpreter, the same way the dashboard starts.
+
+Usage:
+    python benchmarks/bench_data_loading.py path/to/walmart_cleaned.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #2 Deliverables')
+
+VARIANT_CODE = r'''
+import json, resource, sys, time
+sys.path.insert(0, {dashboard_dir!r})
+import pandas as pd
+from data_loader import load_sales_data
+
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {variant!r} == 'csv':
+    # Baseline: what app.py did before the cache existed
+    df = pd.read_csv({csv_path!r})
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    else:
+        df['Date'] = pd.to_datetime(df['Year'].astype(str) + df['WeekOfYear'].astype(str) + '0', format='%Y%W%w')
+else:
+    df = load_sales_data({csv_path!r}, cache_dir={cache_dir!r})
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'load_seconds': elapsed,
+    'peak_rss_mb': rss_after / 1024,
+    'rss_growth_mb': (rss_after - rss_before) / 1024,
+    'frame_mb': df.memory_usage(deep=True).sum() / 2**20,
+    'rows': len(df),
+}}))
+'''
+
+
+def run_variant(variant, csv_path, cache_dir):
+    code = VARIANT_CODE.format(dashboard_dir=DASHBOARD_DIR, variant=variant,
+                               csv_path=csv_path, cache_dir=cache_dir)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant (best time is kept)')
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='sales-cache-')
+    try:
+        results = {}
+        results['csv'] = min((run_variant('csv', args.csv_path, cache_dir) for _ in range(args.repeat)),
+                             key=lambda r: r['load_seconds'])
+        results['cache_cold'] = run_variant('cache', args.csv_path, cache_dir)
+        results['cache_warm'] = min((run_variant('cache', args.csv_path, cache_dir) for _ in range(args.repeat)),
+                                    key=lambda r: r['load_seconds'])
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'variant':<12}{'load (s)':>10}{'peak RSS (MB)':>15}{'frame (MB)':>12}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['load_seconds']:>10.3f}{r['peak_rss_mb']:>15.1f}{r['frame_mb']:>12.1f}")
+    base, warm = results['csv'], results['cache_warm']
+    print(f"\nwarm cache speedup: {base['load_seconds'] / warm['load_seconds']:.1f}x, "
+          f"frame size reduction: {base['frame_mb'] / warm['frame_mb']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Feature construction cost: the shared FeatureTransformer vs the previous pandas path.
+
+The pandas baseline is what SmartCast and the notebooks did before: date
+features through the `.dt` accessors and a per-row Season `.map`, label
+encoding with `.map`, and scaling with the StandardScaler on a dataframe.
+Both run on the same raw rows (date strings and Type labels, as in an
+upload); times are reported per call and per 1M rows, plus the single
+record path used by the prediction form.
+
+Usage:
+    python benchmarks/bench_features.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SMARTCAST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #4 Deliverables')
+sys.path.insert(0, SMARTCAST_DIR)
+
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from feature_transformer import SCALED_FEATURES, TARGET, FeatureTransformer  # noqa: E402
+from preprocessing import model_feature_order, category_mapping, feature_bounds  # noqa: E402
+
+RAW_INPUTS = ['Store', 'Dept', 'Holiday_Flag', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment', 'Type', 'Size',
+              'IsPromoWeek']
+
+
+def raw_rows(n_rows, seed=0):
+    """Upload-like rows: a `date` string column and Type labels instead of the derived features."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for feature in RAW_INPUTS:
+        bounds = feature_bounds.get(feature)
+        if feature == 'Type':
+            columns[feature] = rng.choice(list(category_mapping['Type']), n_rows)
+        elif isinstance(bounds, set):
+            columns[feature] = rng.choice(sorted(bounds), n_rows)
+        else:
+            columns[feature] = rng.uniform(bounds[0], bounds[1], n_rows).round(2)
+    days = rng.integers(0, 1000, n_rows)
+    columns['date'] = (np.datetime64('2010-02-05') + days).astype(str)
+    columns[TARGET] = rng.uniform(0, 100_000, n_rows)
+    return pd.DataFrame(columns)
+
+
+def pandas_features(frame, scaler):
+    """The previous pandas implementation, kept here as the baseline."""
+    frame = frame.copy()
+    dates = pd.to_datetime(frame['date'])
+    frame['Year'] = dates.dt.year
+    frame['Month'] = dates.dt.month
+    frame['WeekOfYear'] = dates.dt.isocalendar().week.astype('int64')
+    frame['Quarter'] = dates.dt.quarter
+    frame['Season'] = (frame['Month'] % 12).map({m: m // 3 for m in range(12)})
+    frame['Type'] = frame['Type'].map(category_mapping['Type'])
+    frame[SCALED_FEATURES + [TARGET]] = scaler.transform(frame[SCALED_FEATURES + [TARGET]])
+    return frame[model_feature_order].to_numpy(dtype=np.float32)
+
+
+def time_call(fn, min_seconds=0.5, max_repeat=200):
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeat and (not timings or time.perf_counter() - start < min_seconds):
+        t = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    frame = raw_rows(args.rows)
+    scaler = StandardScaler().fit(frame[SCALED_FEATURES + [TARGET]])
+    transformer = FeatureTransformer.from_scaler(scaler)
+
+    expected = pandas_features(frame, scaler)
+    actual = transformer.transform(frame)
+    diff = float(np.abs(expected - actual).max())
+
+    per_million = 1_000_000 / args.rows
+    print(f"{args.rows:,} raw rows, max |diff| {diff:.2e}\n")
+    print(f"{'path':<28}{'per call (ms)':>15}{'per 1M rows (ms)':>18}")
+    for name, fn in [('pandas + StandardScaler', lambda: pandas_features(frame, scaler)),
+                     ('FeatureTransformer', lambda: transformer.transform(frame))]:
+        seconds = time_call(fn)
+        print(f"{name:<28}{seconds * 1e3:>15.1f}{seconds * 1e3 * per_million:>18.1f}")
+
+    record = frame[RAW_INPUTS + ['date']].iloc[0].to_dict()
+    record_frame = pd.DataFrame([record])
+    print(f"\n{'single record':<28}{'per call (us)':>15}")
+    for name, fn in [('pandas + StandardScaler', lambda: pandas_features(record_frame.assign(**{TARGET: 0.0}), scaler)),
+                     ('FeatureTransformer', lambda: transformer.transform(record))]:
+        print(f"{name:<28}{time_call(fn) * 1e6:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
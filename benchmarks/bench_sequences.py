@@ -0,0 +1,88 @@
+"""Benchmark LSTM/WaveNet sequence preparation: create_sequences vs SequenceDataset.
+
+Each variant runs in a fresh Python process on the same random float32
+feature matrix and reports build time, time for one full pass over all
+windows in batches, and peak RSS growth. create_sequences is the function
+from the Part 1 modelling notebook.
+
+Usage:
+    python benchmarks/bench_sequences.py [--rows 420000] [--time-steps 10 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODELLING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #3 Deliverables')
+
+VARIANT_CODE = r'''
+import json, resource, sys, time
+import numpy as np
+sys.path.insert(0, {modelling_dir!r})
+from sequences import SequenceDataset
+
+def create_sequences(X, y, time_steps=10):
+    X_seq, y_seq = [], []
+    for i in range(len(X) - time_steps):
+        X_seq.append(X[i:i + time_steps])
+        y_seq.append(y[i + time_steps])
+    return np.array(X_seq, dtype=np.float32), np.array(y_seq, dtype=np.float32)
+
+rng = np.random.default_rng(0)
+X = rng.standard_normal(({rows}, 15)).astype(np.float32)
+y = rng.standard_normal(({rows}, 1)).astype(np.float32)
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+start = time.perf_counter()
+if {variant!r} == 'create_sequences':
+    X_seq, y_seq = create_sequences(X, y, {time_steps})
+    build = time.perf_counter() - start
+    checksum = 0.0
+    for i in range(0, len(X_seq), {batch_size}):
+        checksum += float(X_seq[i:i + {batch_size}, -1, 0].sum())
+else:
+    dataset = SequenceDataset(X, y, {time_steps}, {batch_size})
+    build = time.perf_counter() - start
+    checksum = 0.0
+    for batch_X, batch_y in dataset:
+        checksum += float(batch_X[:, -1, 0].sum())
+total = time.perf_counter() - start
+
+print(json.dumps({{
+    'build_seconds': build,
+    'epoch_seconds': total - build,
+    'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    'checksum': checksum,
+}}))
+'''
+
+VARIANTS = ['create_sequences', 'SequenceDataset']
+
+
+def run_variant(variant, rows, time_steps, batch_size):
+    code = VARIANT_CODE.format(modelling_dir=MODELLING_DIR, variant=variant, rows=rows,
+                               time_steps=time_steps, batch_size=batch_size)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=420_000)
+    parser.add_argument('--time-steps', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'time_steps':>10}  {'variant':<18}{'build (s)':>10}{'epoch (s)':>10}{'RSS growth (MB)':>17}")
+    for time_steps in args.time_steps:
+        results = {v: run_variant(v, args.rows, time_steps, args.batch_size) for v in VARIANTS}
+        if abs(results[VARIANTS[0]]['checksum'] - results[VARIANTS[1]]['checksum']) > 1e-3 * args.rows:
+            raise AssertionError(f'Variants produced different windows for time_steps={time_steps}')
+        for name, r in results.items():
+            print(f"{time_steps:>10}  {name:<18}{r['build_seconds']:>10.3f}{r['epoch_seconds']:>10.3f}"
+                  f"{r['rss_growth_mb']:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
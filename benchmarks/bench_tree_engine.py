@@ -0,0 +1,86 @@
+"""Latency/throughput of the compiled tree engine vs XGBoost's predict.
+
+Checks parity on every batch first, then times both engines for batch sizes
+from 1 to 1M rows. Feature rows are drawn from the training CSV when
+--data is given (walmart_cleaned_machine.csv), otherwise generated uniformly
+within the feature_info ranges. Rows are passed as float32 arrays, the way
+ModelBundle passes scaled features to the model.
+
+Usage:
+    python benchmarks/bench_tree_engine.py [--data walmart_cleaned_machine.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SMARTCAST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #4 Deliverables')
+sys.path.insert(0, SMARTCAST_DIR)
+
+import joblib  # noqa: E402
+from preprocessing import model_feature_order, feature_bounds  # noqa: E402
+from tree_engine import CompiledTreeEngine, check_parity  # noqa: E402
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def synthetic_features(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for feature in model_feature_order:
+        bounds = feature_bounds.get(feature, (0, 2))
+        if isinstance(bounds, set):
+            columns[feature] = rng.choice(sorted(bounds), n_rows)
+        else:
+            columns[feature] = rng.uniform(bounds[0], bounds[1], n_rows).round()
+    return pd.DataFrame(columns)[model_feature_order].astype(np.float32)
+
+
+def training_features(path, n_rows, seed=0):
+    data = pd.read_csv(path)
+    X = data.drop(columns=['Weekly_Sales', 'date'], errors='ignore')[model_feature_order].astype(np.float32)
+    index = np.random.default_rng(seed).integers(0, len(X), n_rows)
+    return X.iloc[index].reset_index(drop=True)
+
+
+def time_call(fn, X, min_seconds=0.2, max_repeat=100):
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeat and (not timings or time.perf_counter() - start < min_seconds):
+        t = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - t)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=os.path.join(SMARTCAST_DIR, 'xgb_model.joblib'))
+    parser.add_argument('--data', help="Training CSV to draw feature rows from")
+    parser.add_argument('--max-rows', type=int, default=BATCH_SIZES[-1])
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    start = time.perf_counter()
+    engine = CompiledTreeEngine.from_model(model)
+    print(f"compiled {len(engine.roots)} trees ({len(engine.value)} nodes, depth {engine.max_depth}) "
+          f"in {time.perf_counter() - start:.2f}s\n")
+
+    sizes = [n for n in BATCH_SIZES if n <= args.max_rows]
+    X_all = (training_features(args.data, sizes[-1]) if args.data else synthetic_features(sizes[-1])).to_numpy()
+
+    print(f"{'rows':>9}{'xgboost (ms)':>14}{'compiled (ms)':>15}{'xgboost rows/s':>16}{'compiled rows/s':>17}{'max |diff|':>12}")
+    for n in sizes:
+        X = X_all[:n]
+        diff = check_parity(model, X, engine)
+        xgb_time = time_call(model.predict, X)
+        compiled_time = time_call(engine.predict, X)
+        print(f"{n:>9,}{xgb_time * 1e3:>14.3f}{compiled_time * 1e3:>15.3f}"
+              f"{n / xgb_time:>16,.0f}{n / compiled_time:>17,.0f}{diff:>12.2e}")
+
+
+if __name__ == '__main__':
+    main()
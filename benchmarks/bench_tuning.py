@@ -0,0 +1,89 @@
+"""Benchmark the Hyperband search in tuning.py against the notebooks' GridSearchCV.
+
+Both searches tune XGBoost on the same time-aware split (last 20% of weeks held
+out). GridSearchCV uses the notebook grid with cv=3 on the training weeks;
+Hyperband uses the same grid with n_estimators as its budget. The best
+parameters of each are then refitted on the training weeks and scored on the
+held-out weeks, so the comparison is wall time vs out-of-time RMSE.
+
+Usage:
+    python benchmarks/bench_tuning.py walmart_cleaned_machine.csv [--stores 10] [--jobs 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+MODELLING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Milestone #3 Deliverables')
+sys.path.insert(0, MODELLING_DIR)
+
+from sklearn.model_selection import GridSearchCV  # noqa: E402
+from xgboost import XGBRegressor  # noqa: E402
+from tuning import HyperbandSearch, time_split  # noqa: E402
+
+# The grid from the modelling notebooks
+XGB_PARAMS = {
+    'n_estimators': [100, 200],
+    'max_depth': [4, 6, 8],
+    'learning_rate': [0.01, 0.1],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0]
+}
+
+
+def holdout_rmse(params, X_train, y_train, X_valid, y_valid, n_jobs):
+    model = XGBRegressor(objective='reg:squarederror', random_state=42, n_jobs=n_jobs, **params)
+    model.fit(X_train, y_train)
+    return float(np.sqrt(np.mean((model.predict(X_valid) - y_valid) ** 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data', help='Path to walmart_cleaned_machine.csv')
+    parser.add_argument('--stores', type=int, help='Only use the first N stores (faster runs)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    if args.stores:
+        data = data[data['Store'] <= args.stores]
+    X_train, y_train, X_valid, y_valid = time_split(data)
+    print(f'{len(X_train):,} training rows, {len(X_valid):,} held-out rows\n')
+
+    start = time.perf_counter()
+    grid = GridSearchCV(XGBRegressor(objective='reg:squarederror', random_state=42), param_grid=XGB_PARAMS,
+                        scoring='neg_mean_squared_error', cv=3, n_jobs=args.jobs, refit=False)
+    grid.fit(X_train, y_train)
+    grid_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        search = HyperbandSearch('xgboost', results_path=os.path.join(tmp, 'trials.jsonl'),
+                                 n_jobs=args.jobs, verbose=False)
+        start = time.perf_counter()
+        search.fit(X_train, y_train, X_valid, y_valid)
+        hyperband_seconds = time.perf_counter() - start
+
+        # A second run over the same results file only replays recorded trials
+        resumed = HyperbandSearch('xgboost', results_path=os.path.join(tmp, 'trials.jsonl'),
+                                  n_jobs=args.jobs, verbose=False)
+        start = time.perf_counter()
+        resumed.fit(X_train, y_train, X_valid, y_valid)
+        resume_seconds = time.perf_counter() - start
+
+    rows = [
+        ('GridSearchCV (cv=3)', grid_seconds, len(grid.cv_results_['params']) * 3, grid.best_params_),
+        ('Hyperband', hyperband_seconds, len(search.trials), search.best_params()),
+    ]
+    print(f"{'search':<22}{'wall (s)':>10}{'fits':>7}{'holdout RMSE':>14}  best params")
+    for name, seconds, fits, params in rows:
+        rmse = holdout_rmse(params, X_train, y_train, X_valid, y_valid, args.jobs)
+        print(f'{name:<22}{seconds:>10.1f}{fits:>7}{rmse:>14.5f}  {params}')
+    print(f'\nspeedup: {grid_seconds / hyperband_seconds:.1f}x, resumed search: {resume_seconds:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
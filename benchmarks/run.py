@@ -0,0 +1,367 @@
+"""Reproducible benchmark suite: data loading, dashboard rendering, scoring, sequences and drift.
+
+Runs every case on a synthetic dataset with the walmart_cleaned.csv schema
+(see synthetic.py; generated once per size and cached in benchmarks/.cache),
+so it needs no network, no GPU and not the real data. Results are written
+as JSON together with the commit, library versions and machine, and can be
+compared with an earlier run to catch regressions before deploying.
+
+Groups of cases:
+    load       CSV parse, file digest, Arrow cache build/read and aggregate
+               build, i.e. the data loading of Milestone #2 Deliverables/app.py
+    render     every render_* tab of the dashboard, for each year, without and
+               with a store filter
+    predict    loading xgb_model.ubj, single-row and batch predictions with
+               each inference engine (with prediction intervals too if the
+               model has a quantile model), and scoring the whole dataset
+               in chunks
+    sequences  the notebooks' create_sequences vs SequenceDataset (one epoch)
+    drift      building drift sketches over the dataset and checking drift
+
+Usage:
+    python benchmarks/run.py --size 420k
+    python benchmarks/run.py --size 4m --only load render --baseline benchmarks/results/4m-1a2b3c4.json
+    python benchmarks/run.py --compare benchmarks/results/420k-1a2b3c4.json benchmarks/results/420k-5d6e7f8.json
+
+The focused comparisons (bench_*.py) stay as they are for A/B studies of
+one change; this suite tracks the current code over time.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCHMARKS_DIR, '..')
+DASHBOARD_DIR = os.path.join(REPO_DIR, 'Milestone #2 Deliverables')
+MODELLING_DIR = os.path.join(REPO_DIR, 'Milestone #3 Deliverables')
+SMARTCAST_DIR = os.path.join(REPO_DIR, 'Milestone #4 Deliverables')
+for directory in (SMARTCAST_DIR, MODELLING_DIR, DASHBOARD_DIR):
+    sys.path.insert(0, directory)
+
+from synthetic import SIZES, ensure_csv, parse_size  # noqa: E402
+
+GROUPS = ['load', 'render', 'predict', 'sequences', 'drift']
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+# Slower than the baseline by more than this fraction (median time) counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def measure(fn, min_seconds=1.0, max_repeat=50, warmup=1):
+    """Call `fn` until `min_seconds` have passed (at least once, at most `max_repeat` times) and summarise."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeat and (not timings or time.perf_counter() - start < min_seconds):
+        t = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t)
+    timings = np.array(timings)
+    return {
+        'runs': len(timings),
+        'min': float(timings.min()),
+        'median': float(np.median(timings)),
+        'mean': float(timings.mean()),
+        'max': float(timings.max()),
+    }
+
+
+def once(fn):
+    """Time a single cold call (first load, cache build)."""
+    return measure(fn, min_seconds=0, max_repeat=1, warmup=0)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Suite:
+    """Runs the cases of the selected groups and collects their timings."""
+
+    def __init__(self, csv_path, n_rows, args):
+        self.csv_path = csv_path
+        self.n_rows = n_rows
+        self.args = args
+        self.results = {}
+        self._frame = None
+        self._aggregates = None
+        self._bundle = None
+
+    def record(self, name, timing, rows=None):
+        timing = dict(timing, peak_rss_mb=peak_rss_mb())
+        if rows:
+            timing['rows'] = rows
+            timing['rows_per_second'] = rows / timing['median']
+        self.results[name] = timing
+        throughput = f"{timing['rows_per_second']:>14,.0f} rows/s" if rows else ''
+        print(f"{name:<52}{timing['median'] * 1e3:>12.2f} ms  x{timing['runs']:<4}{throughput}", flush=True)
+
+    # Shared inputs, built on first use so any subset of groups can run alone
+    @property
+    def frame(self):
+        if self._frame is None:
+            from data_loader import load_sales_data
+            self._frame = load_sales_data(self.csv_path, use_cache=False)
+        return self._frame
+
+    @property
+    def aggregates(self):
+        if self._aggregates is None:
+            from aggregates import SalesAggregates
+            self._aggregates = SalesAggregates(self.frame)
+        return self._aggregates
+
+    @property
+    def bundle(self):
+        if self._bundle is None:
+            from feature_transformer import load_bundle
+            self._bundle = load_bundle(self.args.model)
+        return self._bundle
+
+    def load(self):
+        from data_loader import file_digest, load_sales_data
+        from aggregates import SalesAggregates, INDEX_KEYS
+
+        self.record('load.csv_parse', measure(lambda: load_sales_data(self.csv_path, use_cache=False),
+                                              min_seconds=0, max_repeat=self.args.repeat), self.n_rows)
+        self.record('load.file_digest', measure(lambda: file_digest(self.csv_path), max_repeat=self.args.repeat))
+        digest = file_digest(self.csv_path)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Same call as the dashboard: memory-mapped Arrow cache keyed by the file digest
+            load = lambda: load_sales_data(self.csv_path, cache_dir, memory_map=True, digest=digest,  # noqa: E731
+                                           sort_by=INDEX_KEYS)
+            self.record('load.arrow_cache_build', once(load), self.n_rows)
+            self.record('load.arrow_cache_read', measure(load, max_repeat=self.args.repeat), self.n_rows)
+        self.record('load.aggregates_build', measure(lambda: SalesAggregates(self.frame), min_seconds=0,
+                                                     max_repeat=self.args.repeat), self.n_rows)
+
+    def render(self):
+        from overview import render_overview
+        from sales_trends import render_sales_trends
+        from department_performance import render_department_performance
+        from seasonality_analysis import render_seasonality_analysis
+
+        aggregates = self.aggregates
+        filtered = {'stores': aggregates.stores[:5], 'depts': [], 'types': []}
+        renderers = {
+            'render_overview': lambda year, filters: render_overview(year, aggregates, filters),
+            'render_sales_trends': lambda year, filters: render_sales_trends(year, aggregates, None, filters),
+            'render_department_performance': lambda year, filters: render_department_performance(year, aggregates,
+                                                                                                 filters),
+            'render_seasonality_analysis': lambda year, filters: render_seasonality_analysis(year, aggregates,
+                                                                                             filters),
+        }
+        for name, render in renderers.items():
+            for year in aggregates.years:
+                year = int(year)
+                self.record(f'render.{name}.{year}', measure(lambda: render(year, None), min_seconds=0.5))
+                self.record(f'render.{name}.{year}.5_stores', measure(lambda: render(year, filtered),
+                                                                      min_seconds=0.5))
+
+    def predict(self):
+        from feature_transformer import load_bundle
+        from preprocessing import encode_features
+
+        self.record('predict.model_load', once(lambda: load_bundle(self.args.model)))
+        frame = self.frame
+        record = encode_features(frame.iloc[:1])
+        batch = frame.iloc[:self.args.batch_rows]
+        for engine in ['xgboost', 'compiled']:
+            predictor = self.bundle.with_engine(engine)
+            self.record(f'predict.single.{engine}', measure(lambda: predictor.predict_encoded(record),
+                                                            max_repeat=10_000))
+            self.record(f'predict.batch.{engine}', measure(lambda: predictor.predict(batch), max_repeat=20),
+                        len(batch))
+            # Point prediction plus every quantile, for models bundled with a quantile model
+            if predictor.quantiles:
+                self.record(f'predict.single_intervals.{engine}',
+                            measure(lambda: predictor.predict_encoded_intervals(record), max_repeat=10_000))
+                self.record(f'predict.batch_intervals.{engine}',
+                            measure(lambda: predictor.predict_intervals(batch), max_repeat=20), len(batch))
+
+        # Whole dataset in batch_scoring's default chunks, features built from the raw columns
+        def score_dataset():
+            for start in range(0, len(frame), self.args.batch_rows):
+                self.bundle.predict(frame.iloc[start:start + self.args.batch_rows])
+        self.record('predict.score_dataset', measure(score_dataset, min_seconds=0, max_repeat=self.args.repeat,
+                                                     warmup=0), len(frame))
+
+    def sequences(self):
+        from sequences import SequenceDataset
+        from preprocessing import encode_features
+
+        rows = min(self.args.sequence_rows, len(self.frame))
+        sample = self.frame.iloc[:rows]
+        X = self.bundle.transformer.scale(encode_features(sample))
+        y = self.bundle.transformer.scale_target(sample['Weekly_Sales']).astype(np.float32).reshape(-1, 1)
+
+        def create_sequences(X, y, time_steps=10):
+            # As in the Part 1 modelling notebook
+            X_seq, y_seq = [], []
+            for i in range(len(X) - time_steps):
+                X_seq.append(X[i:i + time_steps])
+                y_seq.append(y[i + time_steps])
+            return np.array(X_seq, dtype=np.float32), np.array(y_seq, dtype=np.float32)
+
+        def dataset_epoch():
+            for batch_X, batch_y in SequenceDataset(X, y, self.args.time_steps, 32):
+                pass
+
+        steps = self.args.time_steps
+        self.record(f'sequences.create_sequences.t{steps}', measure(lambda: create_sequences(X, y, steps),
+                                                                    min_seconds=0, max_repeat=self.args.repeat), rows)
+        self.record(f'sequences.dataset_epoch.t{steps}', measure(dataset_epoch, min_seconds=0,
+                                                                 max_repeat=self.args.repeat), rows)
+
+    def drift(self):
+        from drift_monitor import DriftMonitor
+        from preprocessing import model_feature_order, encode_features
+
+        frame = self.frame
+        chunk_rows = self.args.batch_rows
+
+        def sketch(rows):
+            monitor = DriftMonitor(model_feature_order)
+            for start in range(0, len(rows), chunk_rows):
+                features = encode_features(rows.iloc[start:start + chunk_rows])
+                monitor.update(pd.DataFrame(features, columns=model_feature_order, copy=False))
+            return monitor
+
+        # Encode + sketch update per chunk, as batch_scoring --monitor does
+        self.record('drift.sketch_dataset', measure(lambda: sketch(frame), min_seconds=0, max_repeat=self.args.repeat,
+                                                    warmup=0), len(frame))
+        half = len(frame) // 2
+        baseline, current = sketch(frame.iloc[:half]), sketch(frame.iloc[half:])
+        self.record('drift.check', measure(lambda: baseline.check_feature_drift(current)))
+
+    def run(self, groups):
+        for group in groups:
+            getattr(self, group)()
+        return self.results
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import sklearn
+    import xgboost
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'xgboost': xgboost.__version__,
+        'scikit-learn': sklearn.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def read_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Cases present in both runs with their median times and ratio; returns the regressed case names."""
+    regressions = []
+    print(f"\n{'case':<52}{'baseline (ms)':>14}{'current (ms)':>14}{'ratio':>8}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['median'] / old['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<52}{old['median'] * 1e3:>14.2f}{result['median'] * 1e3:>14.2f}{ratio:>8.2f}{flag}")
+    if baseline['meta'].get('rows') != current['meta'].get('rows'):
+        print(f"Note: different dataset sizes ({baseline['meta'].get('rows')} vs {current['meta'].get('rows')} rows)")
+    print(f"{len(regressions)} regression(s) over {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='420k', help=f"One of {', '.join(SIZES)} or a row count")
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--data', help='Run on this CSV (walmart_cleaned.csv schema) instead of synthetic data')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=GROUPS, help='Groups of cases to run')
+    parser.add_argument('--model', default=os.path.join(SMARTCAST_DIR, 'xgb_model.ubj'))
+    parser.add_argument('--repeat', type=int, default=3, help='Most runs of the slow (whole dataset) cases')
+    parser.add_argument('--batch-rows', type=int, default=100_000, help='Rows per predict call / drift chunk')
+    parser.add_argument('--sequence-rows', type=int, default=420_000,
+                        help='Rows used for the sequence cases (create_sequences copies every window)')
+    parser.add_argument('--time-steps', type=int, default=10)
+    parser.add_argument('--out', help='Results JSON (default: benchmarks/results/<size>-<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare this run with')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Median slowdown counted as a regression (0.10 = 10%%)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Only compare two results files')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on any regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (read_results(path) for path in args.compare)
+        regressions = compare(baseline, current, args.threshold)
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+    if args.data:
+        csv_path, size = args.data, os.path.splitext(os.path.basename(args.data))[0]
+        n_rows = None
+    else:
+        n_rows, size = parse_size(args.size), args.size.lower()
+        print(f'Preparing {n_rows:,} synthetic rows...', flush=True)
+        csv_path = ensure_csv(n_rows, args.seed)
+
+    suite = Suite(csv_path, n_rows, args)
+    meta = environment()
+    started = time.perf_counter()
+    suite.run([group for group in GROUPS if group in args.only])
+    meta.update({
+        'data': os.path.abspath(csv_path),
+        'rows': len(suite.frame) if suite._frame is not None else n_rows,
+        'seed': None if args.data else args.seed,
+        'groups': args.only,
+        'batch_rows': args.batch_rows,
+        'total_seconds': time.perf_counter() - started,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+    report = {'meta': meta, 'results': suite.results}
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{size}-{(meta['commit'] or 'nogit')[:7]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nWrote {len(suite.results)} results to {out}')
+
+    if args.baseline:
+        regressions = compare(read_results(args.baseline), report, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Synthetic sales data with the schema of walmart_cleaned.csv, at any size.
+
+Rows follow the real file's layout: every store has the same 80 departments
+over the same 143 weeks (2010-02-05 to 2012-10-26), sorted by Store, Dept
+and Date, so larger sizes add stores rather than weeks. Store Type and Size
+are fixed per store, holidays fall on the same ISO weeks as the real data,
+about 20% of the rows are promo weeks, and Weekly_Sales has a department
+level, store size effect, yearly seasonality and noise. The same size and
+seed always give the same file, so results compare across commits and
+machines without network access or the real dataset.
+
+    python benchmarks/synthetic.py --size 4m
+    python benchmarks/synthetic.py --size 1000000 --out /tmp/sales.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Named sizes: the real dataset (~420K rows) and 10x / 100x of it
+SIZES = {'420k': 420_000, '4m': 4_000_000, '40m': 40_000_000}
+
+DEPTS = 80
+FIRST_WEEK = '2010-02-05'
+WEEKS = 143
+HOLIDAY_WEEKS = [6, 36, 47, 52]  # Super Bowl, Labor Day, Thanksgiving, Christmas
+PROMO_SHARE = 0.2
+
+COLUMNS = ['Store', 'Dept', 'Weekly_Sales', 'Holiday_Flag', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment',
+           'Type', 'Size', 'Month', 'Year', 'WeekOfYear', 'Quarter', 'Season', 'IsPromoWeek', 'Date']
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Stores generated per block, to bound memory for the 40M row file
+STORES_PER_BLOCK = 100
+
+
+def _weeks(seed):
+    """Date columns and the week-level series shared by every store (holidays, fuel price walk)."""
+    rng = np.random.default_rng([seed, 0])
+    dates = pd.date_range(FIRST_WEEK, periods=WEEKS, freq='7D')
+    iso = dates.isocalendar()
+    return {
+        'Date': dates.strftime('%Y-%m-%d').to_numpy(),
+        'Month': dates.month.to_numpy(),
+        'Year': dates.year.to_numpy(),
+        'WeekOfYear': iso['week'].to_numpy(dtype=np.int64),
+        'Quarter': dates.quarter.to_numpy(),
+        'Season': (dates.month.to_numpy() % 12) // 3,
+        'Holiday_Flag': np.isin(iso['week'].to_numpy(dtype=np.int64), HOLIDAY_WEEKS).astype(np.int64),
+        'Fuel_Price': np.clip(2.6 + np.cumsum(rng.normal(0.01, 0.05, WEEKS)), 2.5, 4.2),
+        'Phase': 2 * np.pi * (dates.dayofyear.to_numpy() - 105) / 365.25,
+    }
+
+
+def _store_block(stores, weeks, seed):
+    """All rows of a block of stores (every department and week of each)."""
+    rng = np.random.default_rng([seed, int(stores[0])])
+    n_stores = len(stores)
+    store_type = rng.choice(np.array(['A', 'B', 'C']), n_stores)
+    size = rng.integers(33_331, 179_896, n_stores)
+    climate = rng.normal(60, 12, n_stores)
+    cpi = rng.uniform(126, 227, n_stores)
+    unemployment = rng.uniform(4, 14, n_stores)
+    dept_level = np.exp(rng.normal(9.4, 0.8, (n_stores, DEPTS)))
+
+    # Broadcast store x dept x week, then flatten in the file's Store, Dept, Date order
+    shape = (n_stores, DEPTS, WEEKS)
+    store_axis = (slice(None), None, None)
+    week_axis = (None, None, slice(None))
+    seasonal = np.sin(weeks['Phase'])[week_axis]
+    holiday = weeks['Holiday_Flag'][week_axis]
+    promo = rng.random(shape) < PROMO_SHARE
+    sales = (dept_level[:, :, None]
+             * np.sqrt(size / 106_613)[store_axis]
+             * (1 + 0.15 * seasonal + 0.1 * holiday + 0.05 * promo)
+             * np.exp(rng.normal(0, 0.15, shape)))
+
+    def full(values):
+        return np.broadcast_to(values, shape).ravel()
+
+    block = {
+        'Store': full(stores[store_axis]),
+        'Dept': full(np.arange(1, DEPTS + 1)[None, :, None]),
+        'Weekly_Sales': np.maximum(sales, 25.2).round(2).ravel(),
+        'Holiday_Flag': full(holiday),
+        'Temperature': np.clip(climate[store_axis] + 22 * seasonal + rng.normal(0, 6, shape), -29.95, 141.9)
+        .round(2).ravel(),
+        'Fuel_Price': full(weeks['Fuel_Price'].round(3)[week_axis]),
+        'CPI': full((cpi[store_axis] * (1 + 0.0004 * np.arange(WEEKS))[week_axis]).clip(126, 227)),
+        'Unemployment': full((unemployment[store_axis] - 0.005 * np.arange(WEEKS)[week_axis]).clip(4, 14).round(3)),
+        'Type': full(store_type[store_axis]),
+        'Size': full(size[store_axis]),
+        'IsPromoWeek': promo.ravel(),
+    }
+    for column in ['Month', 'Year', 'WeekOfYear', 'Quarter', 'Season', 'Date']:
+        block[column] = full(weeks[column][week_axis])
+    return pd.DataFrame(block, columns=COLUMNS)
+
+
+def iter_blocks(n_rows, seed=0, stores_per_block=STORES_PER_BLOCK):
+    """Yield the first `n_rows` rows of the synthetic dataset as dataframes of whole stores."""
+    weeks = _weeks(seed)
+    rows_per_store = DEPTS * WEEKS
+    n_stores = -(-n_rows // rows_per_store)
+    remaining = n_rows
+    for first in range(1, n_stores + 1, stores_per_block):
+        stores = np.arange(first, min(first + stores_per_block, n_stores + 1))
+        block = _store_block(stores, weeks, seed)
+        yield block.iloc[:remaining] if len(block) > remaining else block
+        remaining -= len(block)
+
+
+def sales_frame(n_rows, seed=0):
+    """The synthetic dataset as one dataframe (Date as strings, like a freshly read CSV)."""
+    return pd.concat(iter_blocks(n_rows, seed), ignore_index=True)
+
+
+def write_csv(path, n_rows, seed=0):
+    """Write the synthetic dataset block by block (atomically, so an interrupted run leaves no partial file)."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        for i, block in enumerate(iter_blocks(n_rows, seed)):
+            block.to_csv(f, index=False, header=(i == 0))
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_path(n_rows, seed=0, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f'walmart_synthetic_{n_rows}_seed{seed}.csv')
+
+
+def ensure_csv(n_rows, seed=0, data_dir=DATA_DIR):
+    """Path of the synthetic CSV for `n_rows` and `seed`, generating it on first use."""
+    path = dataset_path(n_rows, seed, data_dir)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        write_csv(path, n_rows, seed)
+    return path
+
+
+def parse_size(size):
+    """Row count of a named size ('420k', '4m', '40m') or a plain number."""
+    return SIZES[size.lower()] if size.lower() in SIZES else int(size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='420k', help=f"One of {', '.join(SIZES)} or a row count")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help=f'CSV to write (default: a cached file in {DATA_DIR})')
+    args = parser.parse_args()
+
+    n_rows = parse_size(args.size)
+    path = write_csv(args.out, n_rows, args.seed) if args.out else ensure_csv(n_rows, args.seed)
+    print(f'{n_rows:,} rows in {path} ({os.path.getsize(path) / 2**20:,.0f} MB)')
+
+
+if __name__ == '__main__':
+    main()
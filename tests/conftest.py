@@ -0,0 +1,10 @@
+"""Puts the deliverable folders and benchmarks/ on sys.path so tests can import their modules.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for directory in ('benchmarks', 'Milestone #2 Deliverables', 'Milestone #3 Deliverables', 'Milestone #4 Deliverables'):
+    sys.path.insert(0, os.path.join(REPO_DIR, directory))
@@ -0,0 +1,36 @@
+"""`SalesAggregates.append` gives the same aggregates as a full rebuild."""
+import numpy as np
+import pandas as pd
+
+from aggregates import CROSS_DIMENSIONS, DIMENSIONS, SalesAggregates
+from data_loader import prepare_sales_frame
+from synthetic import DEPTS, WEEKS, sales_frame
+
+
+def assert_same_aggregates(actual, expected, year, **filters):
+    actual_cube, expected_cube = actual.select(year, **filters), expected.select(year, **filters)
+    assert expected_cube is not None, f'No rows for {filters} in {year}'
+    for dims in DIMENSIONS + CROSS_DIMENSIONS:
+        pd.testing.assert_frame_equal(actual_cube[dims].sort_index(), expected_cube[dims].sort_index(),
+                                      check_index_type=False)
+    pd.testing.assert_series_equal(actual_cube['total'], expected_cube['total'])
+
+
+def test_append_matches_rebuild():
+    sales = prepare_sales_frame(sales_frame(3 * DEPTS * WEEKS))
+    dates = np.sort(sales['Date'].unique())
+    # More weeks than MAX_SEGMENTS, so appended segments also get merged
+    first_new = dates[-10]
+
+    aggregates = SalesAggregates(sales[sales['Date'] < first_new])
+    for date in dates[-10:]:
+        aggregates.append(sales[sales['Date'] == date])
+    rebuilt = SalesAggregates(sales)
+
+    assert aggregates.years == rebuilt.years
+    assert aggregates.depts == rebuilt.depts
+    pd.testing.assert_series_equal(aggregates.last_dates, rebuilt.last_dates)
+    for year in rebuilt.years:
+        assert_same_aggregates(aggregates, rebuilt, year)
+        assert_same_aggregates(aggregates, rebuilt, year, stores=[1, 3], depts=[1, 2, 5])
+        assert_same_aggregates(aggregates, rebuilt, year, types=rebuilt.types[:1])
@@ -0,0 +1,59 @@
+"""Scoring a file in chunks gives the same output as scoring all of its rows at once."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBRegressor
+
+from batch_scoring import PREDICTION_COLUMN, iter_chunks, quantile_column, score_to_csv
+from feature_transformer import TARGET, FeatureTransformer, ModelBundle
+from synthetic import sales_frame
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return sales_frame(1000, seed=3)
+
+
+@pytest.fixture(scope='module', params=[(), (0.1, 0.5, 0.9)], ids=['point', 'quantile'])
+def bundle(request, sales):
+    transformer = FeatureTransformer().fit(sales)
+    X, y = transformer.transform(sales), transformer.scale_target(sales[TARGET])
+    model = XGBRegressor(n_estimators=20, max_depth=4).fit(X, y)
+    if not request.param:
+        return ModelBundle(model, transformer)
+    quantile_model = XGBRegressor(n_estimators=20, max_depth=4, objective='reg:quantileerror',
+                                  quantile_alpha=np.array(request.param)).fit(X, y)
+    return ModelBundle(model, transformer, quantile_model, request.param)
+
+
+def expected_output(bundle, sales):
+    expected = sales.copy()
+    if bundle.quantiles:
+        expected[PREDICTION_COLUMN], bands = bundle.predict_intervals(sales)
+        for i, q in enumerate(bundle.quantiles):
+            expected[quantile_column(q)] = bands[:, i]
+    else:
+        expected[PREDICTION_COLUMN] = bundle.predict(sales)
+    return expected
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_chunked_output_matches_scoring_at_once(tmp_path, sales, bundle, extension):
+    path = str(tmp_path / f'input.{extension}')
+    if extension == 'csv':
+        sales.to_csv(path, index=False)
+    else:
+        sales.to_parquet(path, index=False)
+    out = io.StringIO()
+
+    # A chunk size that does not divide the row count, so the last chunk is short
+    rows = score_to_csv(bundle, iter_chunks(path, path, chunk_size=137), out)
+    assert rows == len(sales)
+
+    out.seek(0)
+    scored = pd.read_csv(out)
+    expected = expected_output(bundle, sales)
+    assert list(scored.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(scored, pd.read_csv(io.StringIO(expected.to_csv(index=False))), rtol=1e-6)
@@ -0,0 +1,59 @@
+"""Cached callback results are reused until the data version changes."""
+import time
+
+from callback_cache import CallbackCache
+
+
+class Versioned:
+    """A memoized function counting its calls, with a version the test can change."""
+
+    def __init__(self):
+        self.version = 'a'
+        self.calls = 0
+
+    def render(self, tab, year):
+        self.calls += 1
+        return {'tab': tab, 'year': year, 'version': self.version}
+
+
+def test_hit_miss_and_version_switch(tmp_path):
+    source = Versioned()
+    cache = CallbackCache(str(tmp_path), version=lambda: source.version)
+    render = cache.memoize(source.render)
+
+    assert render('overview', 2011) == {'tab': 'overview', 'year': 2011, 'version': 'a'}
+    assert render('overview', 2011) == {'tab': 'overview', 'year': 2011, 'version': 'a'}
+    assert render('overview', 2012)['year'] == 2012
+    assert source.calls == 2
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3}
+
+    # Another worker sharing the directory reads the entries this one wrote
+    other = CallbackCache(str(tmp_path), version=lambda: source.version)
+    assert other.memoize(source.render)('overview', 2011)['version'] == 'a'
+    assert source.calls == 2
+
+    source.version = 'b'
+    assert render('overview', 2011)['version'] == 'b'
+    assert source.calls == 3
+    assert cache.get(CallbackCache.key('render', ('overview', 2011)), 'a') is None
+
+
+def test_only_older_versions_are_removed(tmp_path):
+    key = CallbackCache.key('render', ())
+    versions = {'lagging': 'a', 'current': 'a'}
+    lagging = CallbackCache(str(tmp_path), version=lambda: versions['lagging'])
+    current = CallbackCache(str(tmp_path), version=lambda: versions['current'])
+    lagging.put(key, 'a')
+
+    for version in 'bc':
+        # Versions created in the same clock tick would not be ordered
+        time.sleep(0.01)
+        versions['current'] = version
+        current.put(key, version)
+    assert current.get(key, 'a') is None
+    assert current.get(key, 'b') is None
+
+    # A worker still reporting an older version must not remove the newer one
+    versions['lagging'] = 'b'
+    assert lagging.get(key) is None
+    assert current.get(key) == 'c'
@@ -0,0 +1,49 @@
+"""KS drift statistics computed from t-digest sketches are close to scipy's two-sample KS test."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+
+from drift_monitor import DriftMonitor, TDigest, ks_from_sketches
+
+
+def digest(values, batch_size=10_000):
+    sketch = TDigest()
+    for start in range(0, len(values), batch_size):
+        sketch.update(values[start:start + batch_size])
+    return sketch
+
+
+@pytest.mark.parametrize('shift', [0.0, 0.02, 0.1, 0.5])
+def test_ks_from_sketches_matches_scipy(shift):
+    rng = np.random.default_rng(8)
+    baseline, current = rng.gamma(2, 1, 60_000), rng.gamma(2, 1, 25_000) + shift
+
+    statistic, p_value = ks_from_sketches(digest(baseline), digest(current))
+    expected = ks_2samp(baseline, current, method='asymp')
+    assert statistic == pytest.approx(expected.statistic, abs=0.005)
+    assert (p_value < 0.05) == (expected.pvalue < 0.05)
+
+
+def test_ks_on_discrete_feature_is_exact():
+    rng = np.random.default_rng(9)
+    baseline, current = rng.integers(1, 46, 40_000), rng.integers(1, 40, 20_000)
+    statistic, _ = ks_from_sketches(digest(baseline), digest(current))
+    assert statistic == pytest.approx(ks_2samp(baseline, current).statistic, abs=1e-9)
+
+
+def test_merged_and_reloaded_monitors_give_the_same_drift():
+    rng = np.random.default_rng(10)
+    frame = pd.DataFrame({'Temperature': rng.normal(60, 15, 40_000), 'Store': rng.integers(1, 46, 40_000)})
+    current = frame.assign(Temperature=frame['Temperature'] + 3)
+    baseline = DriftMonitor(['Temperature', 'Store']).update(frame)
+
+    # Two workers each see half of the current window
+    workers = [DriftMonitor(['Temperature', 'Store']).update(half) for half in (current[:20_000], current[20_000:])]
+    merged = DriftMonitor.from_dict(workers[0].to_dict()).merge(DriftMonitor.from_dict(workers[1].to_dict()))
+    report = baseline.check_feature_drift(merged)
+
+    for feature, drifted in (('Temperature', True), ('Store', False)):
+        expected = ks_2samp(frame[feature], current[feature])
+        assert report[feature]['ks_statistic'] == pytest.approx(expected.statistic, abs=0.005)
+        assert report[feature]['drift_detected'] is drifted
@@ -0,0 +1,74 @@
+"""Vectorized per-segment metrics agree with sklearn's metric functions run on each segment."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import (explained_variance_score, mean_absolute_error, mean_absolute_percentage_error,
+                             mean_squared_error, r2_score)
+
+from evaluation import (EXPLAINED_VARIANCE, MAE, MAPE, METRICS, MSE, R2, RMSE, calculate_metrics,
+                        evaluation_report, grouped_metrics, segment_codes)
+
+SKLEARN_METRICS = {
+    MSE: mean_squared_error,
+    RMSE: lambda y_true, y_pred: np.sqrt(mean_squared_error(y_true, y_pred)),
+    MAE: mean_absolute_error,
+    MAPE: mean_absolute_percentage_error,
+    R2: r2_score,
+    EXPLAINED_VARIANCE: explained_variance_score,
+}
+
+
+@pytest.fixture(scope='module')
+def scored():
+    rng = np.random.default_rng(5)
+    n_rows = 3000
+    frame = pd.DataFrame({
+        'Store': rng.integers(1, 6, n_rows),
+        'Dept': rng.integers(1, 8, n_rows),
+        'Weekly_Sales': rng.gamma(2, 10_000, n_rows),
+    })
+    # A zero actual exercises MAPE's epsilon denominator
+    frame.loc[0, 'Weekly_Sales'] = 0.0
+    predictions = {
+        'good': frame['Weekly_Sales'] * rng.normal(1, 0.1, n_rows),
+        'biased': frame['Weekly_Sales'] * 0.8 + rng.normal(0, 2_000, n_rows),
+    }
+    return frame, predictions
+
+
+def sklearn_metrics(y_true, y_pred):
+    return {name: metric(y_true, y_pred) for name, metric in SKLEARN_METRICS.items()}
+
+
+def test_calculate_metrics_matches_sklearn(scored):
+    frame, predictions = scored
+    actual = calculate_metrics(frame['Weekly_Sales'], predictions['good'])
+    assert actual == pytest.approx(sklearn_metrics(frame['Weekly_Sales'], predictions['good']), rel=1e-9)
+
+
+@pytest.mark.parametrize('keys', ['Store', ('Store', 'Dept')], ids=['store', 'store-dept'])
+def test_grouped_metrics_match_sklearn_per_group(scored, keys):
+    frame, predictions = scored
+    columns = [keys] if isinstance(keys, str) else list(keys)
+    codes, labels = segment_codes(frame, columns)
+    y_pred = np.vstack([predictions['good'], predictions['biased']])
+    metrics = grouped_metrics(frame['Weekly_Sales'], y_pred, codes, len(labels))
+
+    for m, name in enumerate(predictions):
+        for g, (label, group) in enumerate(frame.groupby(columns)):
+            expected = sklearn_metrics(group['Weekly_Sales'], predictions[name][group.index])
+            i = m * len(labels) + g
+            assert tuple(labels.iloc[g]) == (label if isinstance(label, tuple) else (label,))
+            assert metrics['n'][i] == len(group)
+            assert {metric: metrics[metric][i] for metric in METRICS} == pytest.approx(expected, rel=1e-9)
+
+
+def test_report_rows_match_grouped_metrics(scored):
+    frame, predictions = scored
+    report = evaluation_report(frame, predictions, segments=['Store', ('Store', 'Dept'), 'Type'])
+    # Type is not in the frame, so that segment is skipped
+    assert set(report['segment']) == {'all', 'Store', 'Store x Dept'}
+    row = report[(report['model'] == 'biased') & (report['segment'] == 'Store x Dept') & (report['value'] == '3 / 4')]
+    group = frame[(frame['Store'] == 3) & (frame['Dept'] == 4)]
+    expected = sklearn_metrics(group['Weekly_Sales'], predictions['biased'][group.index])
+    assert row[METRICS].iloc[0].to_dict() == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,53 @@
+"""A saved forecast run reads back the same from a reopened store."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast_store import ForecastStore
+
+
+@pytest.fixture
+def forecast():
+    rng = np.random.default_rng(4)
+    weeks = pd.date_range('2012-11-30', periods=8, freq='7D')
+    keys = pd.MultiIndex.from_product([[1, 2, 3], [1, 5], weeks], names=['Store', 'Dept', 'date'])
+    return keys.to_frame(index=False).assign(forecast=rng.uniform(1_000, 50_000, len(keys)))
+
+
+def test_saved_run_reloads(tmp_path, forecast):
+    path = str(tmp_path / 'forecasts.db')
+    store = ForecastStore(path)
+    first = store.save_run(forecast, 'model-a', source='test')
+    # Chunked like batch_scoring, with the last chunk repeating rows it replaces
+    second = store.create_run('model-b')
+    for chunk in (forecast.iloc[:20], forecast.iloc[20:], forecast.iloc[-5:].assign(forecast=0.0)):
+        store.add_forecasts(second, chunk)
+    store.finish_run(second)
+    store.close()
+
+    store = ForecastStore(path)
+    runs = store.runs()
+    assert runs['run_id'].tolist() == [first, second]
+    assert runs['model_version'].tolist() == ['model-a', 'model-b']
+    assert runs['rows'].tolist() == [len(forecast)] * 2
+    assert store.latest_run() == second
+    assert store.latest_run('model-a') == first
+
+    stored = store.forecasts(first).rename(columns={'Date': 'date'})
+    expected = forecast.sort_values(['Store', 'Dept', 'date']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+    row = forecast.iloc[7]
+    assert store.lookup(row['Store'], row['Dept'], row['date'], run_id=first) == pytest.approx(row['forecast'])
+    assert store.lookup(row['Store'], row['Dept'], '2014-01-03', run_id=first) is None
+    assert store.lookup(forecast.iloc[-1]['Store'], forecast.iloc[-1]['Dept'], forecast.iloc[-1]['date']) == 0.0
+
+    totals = store.weekly_totals(first, year=2012, store=[1, 3], dept=5)
+    selected = forecast[forecast['Store'].isin([1, 3]) & (forecast['Dept'] == 5)]
+    expected_totals = selected[selected['date'].dt.year == 2012].groupby('date')['forecast'].sum()
+    assert len(totals) == 5
+    np.testing.assert_allclose(totals.set_index('Date')['forecast'], expected_totals)
+
+    store.delete_run(second)
+    assert store.latest_run() == first
+    store.close()
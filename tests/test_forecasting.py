@@ -0,0 +1,63 @@
+"""Hierarchical forecasts in forecasting.py.
+
+MinT reconciliation gives coherent forecasts and agrees with the textbook
+formula, and future frames can be built from histories without a date column.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting import aggregation_matrix, build_future_frame, reconcile
+
+
+@pytest.fixture(scope='module')
+def hierarchy():
+    bottom = pd.DataFrame({
+        'Store': [1, 1, 1, 2, 2, 3, 3, 3, 3],
+        'Dept': [1, 2, 3, 1, 4, 1, 2, 5, 7],
+        'Type': ['A', 'A', 'A', 'B', 'B', 'A', 'A', 'A', 'A'],
+    })
+    nodes, A = aggregation_matrix(bottom)
+    rng = np.random.default_rng(2)
+    bottom_forecast = rng.uniform(100, 1000, (len(bottom), 4))
+    # Aggregate base forecasts that disagree with the sum of their series
+    aggregate_base = (A @ bottom_forecast) * rng.uniform(0.8, 1.2, (len(A), 4))
+    return A, bottom_forecast, aggregate_base
+
+
+def test_mint_is_coherent(hierarchy):
+    A, bottom_forecast, aggregate_base = hierarchy
+    aggregate_base = aggregate_base.copy()
+    aggregate_base[1, 2] = np.nan
+    reconciled = reconcile(bottom_forecast, A, aggregate_base, method='mint')
+    np.testing.assert_allclose(reconciled[:len(A)], A @ reconciled[len(A):])
+
+
+def test_mint_matches_dense_formula(hierarchy):
+    A, bottom_forecast, aggregate_base = hierarchy
+    # S (S' W^-1 S)^-1 S' W^-1 y with structural scaling W = diag(S @ 1)
+    S = np.vstack([A, np.eye(A.shape[1])])
+    W_inv = np.diag(1.0 / S.sum(axis=1))
+    base = np.vstack([aggregate_base, bottom_forecast])
+    expected = S @ np.linalg.solve(S.T @ W_inv @ S, S.T @ W_inv @ base)
+    np.testing.assert_allclose(reconcile(bottom_forecast, A, aggregate_base, method='mint'), expected)
+
+
+def test_mint_keeps_coherent_forecasts(hierarchy):
+    A, bottom_forecast, _ = hierarchy
+    np.testing.assert_allclose(reconcile(bottom_forecast, A, A @ bottom_forecast, method='mint'),
+                               reconcile(bottom_forecast, A, method='bottom_up'))
+
+
+def test_future_frame_without_date_column():
+    history = pd.DataFrame({
+        'Store': [1, 1, 2, 2], 'Dept': [1, 1, 1, 1], 'Type': [0, 0, 1, 1], 'Size': [100, 100, 200, 200],
+        'Year': [2012, 2012, 2012, 2012], 'WeekOfYear': [40, 41, 40, 41],
+        'Temperature': 60.0, 'Fuel_Price': 3.5, 'CPI': 200.0, 'Unemployment': 7.0,
+        'Holiday_Flag': 0, 'IsPromoWeek': 0, 'Weekly_Sales': [10.0, 11.0, 20.0, 21.0],
+    })
+    with_dates = history.assign(date=pd.to_datetime(['2012-10-07', '2012-10-14'] * 2))
+    # Year/WeekOfYear give the week's Sunday, as in the dashboard's data_loader
+    frame = build_future_frame(history, weeks=2)
+    pd.testing.assert_frame_equal(frame, build_future_frame(with_dates, weeks=2)[frame.columns])
+    assert list(frame['date'].unique()) == list(pd.to_datetime(['2012-10-21', '2012-10-28']))
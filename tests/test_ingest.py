@@ -0,0 +1,107 @@
+"""Weekly files dropped in the incoming directory are applied once, or rejected with a reason."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import SalesAggregates
+from data_loader import prepare_sales_frame
+from ingest import WeeklyIngestor, ingested_files
+from synthetic import DEPTS, WEEKS, sales_frame
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return sales_frame(2 * DEPTS * WEEKS)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    return str(tmp_path / 'incoming'), str(tmp_path / 'ingested')
+
+
+def base_aggregates(sales, last_date):
+    return SalesAggregates(prepare_sales_frame(sales[sales['Date'] <= last_date].copy()))
+
+
+def drop_file(directory, name, content):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    if isinstance(content, pd.DataFrame):
+        content.to_csv(path, index=False)
+    else:
+        with open(path, 'wb') as f:
+            f.write(content)
+
+
+def rejection(incoming):
+    """Names in incoming/rejected and the reasons written next to them."""
+    rejected = os.path.join(incoming, 'rejected')
+    reasons = {}
+    for name in os.listdir(rejected):
+        if name.endswith('.error.txt'):
+            with open(os.path.join(rejected, name)) as f:
+                reasons[name[:-len('.error.txt')]] = f.read()
+    return reasons
+
+
+def test_valid_week_is_applied_by_every_worker(sales, dirs):
+    incoming, ingested = dirs
+    dates = np.sort(sales['Date'].unique())
+    week = sales[sales['Date'] == dates[-1]]
+    # Known stores may leave out Type
+    drop_file(incoming, 'week.csv', week.drop(columns='Type'))
+
+    first = WeeklyIngestor(base_aggregates(sales, dates[-2]), incoming, ingested)
+    assert first.sync() == 1
+    assert os.listdir(incoming) == []
+    assert len(ingested_files(ingested)) == 1
+
+    rebuilt = SalesAggregates(prepare_sales_frame(sales.copy()))
+    pd.testing.assert_series_equal(first.aggregates.last_dates, rebuilt.last_dates)
+    year = rebuilt.years[-1]
+    pd.testing.assert_series_equal(first.aggregates.select(year)['total'], rebuilt.select(year)['total'])
+
+    # Another worker applies the ingested week without seeing the incoming file
+    second = WeeklyIngestor(base_aggregates(sales, dates[-2]), incoming, ingested)
+    assert second.sync() == 1
+    assert second.version == first.version != 'base'
+    assert first.sync() == 0
+
+
+def test_duplicate_week_is_rejected(sales, dirs):
+    incoming, ingested = dirs
+    dates = np.sort(sales['Date'].unique())
+    week = sales[sales['Date'] == dates[-1]]
+    ingestor = WeeklyIngestor(base_aggregates(sales, dates[-2]), incoming, ingested)
+    drop_file(incoming, 'week.csv', week)
+    assert ingestor.sync() == 1
+    version = ingestor.version
+
+    drop_file(incoming, 'week.csv', week)
+    assert ingestor.sync() == 0
+    assert ingestor.version == version
+    assert 'not newer' in rejection(incoming)['week.csv']
+    assert len(ingested_files(ingested)) == 1
+
+
+@pytest.mark.parametrize('content, reason', [
+    (lambda week: week.drop(columns='Weekly_Sales'), 'Missing columns: Weekly_Sales'),
+    (lambda week: week.assign(Store=week['Store'] + 100).drop(columns='Type'), 'Type column is required'),
+    (lambda week: pd.concat([week, week.head(1)]), 'Duplicate Store/Dept/Date rows'),
+    (lambda week: week.assign(Year=week['Year'] - 1), 'Year/Month do not match Date'),
+    (lambda week: b'', 'No columns to parse'),
+    (lambda week: 'Date,Store\n2012-11-02,Gießen\n'.encode('latin-1'), "can't decode"),
+], ids=['missing-column', 'unknown-store', 'duplicate-rows', 'wrong-year', 'empty', 'latin-1'])
+def test_bad_file_is_rejected(sales, dirs, content, reason):
+    incoming, ingested = dirs
+    dates = np.sort(sales['Date'].unique())
+    ingestor = WeeklyIngestor(base_aggregates(sales, dates[-2]), incoming, ingested)
+    drop_file(incoming, 'week.csv', content(sales[sales['Date'] == dates[-1]]))
+
+    assert ingestor.sync() == 0
+    assert ingestor.version == 'base'
+    assert ingested_files(ingested) == []
+    assert os.listdir(incoming) == ['rejected']
+    assert reason in rejection(incoming)['week.csv']
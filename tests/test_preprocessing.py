@@ -0,0 +1,55 @@
+"""`encode_features` and `encode_record` build the EDA notebook's date and category features."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import category_mapping, encode_features, encode_record, model_feature_order
+
+
+# Dates around ISO week 53 / week 1 and a leap day, plus random days
+EDGE_DATES = ['2009-12-31', '2010-01-03', '2010-01-04', '2012-02-29', '2012-12-30', '2012-12-31', '2013-01-01']
+
+
+@pytest.fixture(scope='module')
+def raw_rows():
+    rng = np.random.default_rng(1)
+    n_rows = 500
+    random_dates = pd.Timestamp('2009-12-01') + pd.to_timedelta(rng.integers(0, 4 * 365, n_rows - len(EDGE_DATES)),
+                                                                unit='D')
+    return pd.DataFrame({
+        'Store': rng.integers(1, 46, n_rows),
+        'Dept': rng.integers(1, 100, n_rows),
+        'Holiday_Flag': rng.integers(0, 2, n_rows),
+        'Temperature': rng.uniform(-5, 100, n_rows),
+        'Fuel_Price': rng.uniform(2.4, 4.5, n_rows),
+        'CPI': rng.uniform(126, 228, n_rows),
+        'Unemployment': rng.uniform(3.8, 14.4, n_rows),
+        'Type': rng.choice(list(category_mapping['Type']), n_rows),
+        'Size': rng.integers(34875, 219623, n_rows),
+        'IsPromoWeek': rng.integers(0, 2, n_rows),
+        'date': EDGE_DATES + list(random_dates.strftime('%Y-%m-%d')),
+    })
+
+
+def notebook_features(frame):
+    """Features as built in the EDA notebook: pandas .dt accessors and label-encoded seasons and types."""
+    dates = pd.to_datetime(frame['date'])
+    seasons = {12: 0, 1: 0, 2: 0, 3: 1, 4: 1, 5: 1, 6: 2, 7: 2, 8: 2, 9: 3, 10: 3, 11: 3}
+    features = frame.drop(columns='date').assign(
+        Year=dates.dt.year,
+        Month=dates.dt.month,
+        WeekOfYear=dates.dt.isocalendar().week.astype(int),
+        Quarter=dates.dt.quarter,
+        Season=dates.dt.month.map(seasons),
+        Type=frame['Type'].map(category_mapping['Type']),
+    )
+    return features[model_feature_order].to_numpy(dtype=np.float64)
+
+
+def test_encode_features_matches_notebook(raw_rows):
+    np.testing.assert_array_equal(encode_features(raw_rows), notebook_features(raw_rows))
+
+
+def test_encode_record_matches_encode_features(raw_rows):
+    records = np.array([encode_record(record) for record in raw_rows.to_dict('records')])
+    np.testing.assert_array_equal(records, encode_features(raw_rows))
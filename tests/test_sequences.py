@@ -0,0 +1,81 @@
+"""SequenceDataset batches hold the same windows as the notebook's create_sequences."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from sequences import SequenceDataset
+
+
+def create_sequences(X, y, time_steps=10):
+    """The modelling notebook's version: every window copied into one array."""
+    X_seq, y_seq = [], []
+    for i in range(len(X) - time_steps):
+        X_seq.append(X[i:i + time_steps])
+        y_seq.append(y[i + time_steps])
+    return np.array(X_seq, dtype=np.float32), np.array(y_seq, dtype=np.float32)
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(6)
+    return rng.standard_normal((203, 15)), rng.standard_normal((203, 1))
+
+
+def batches(dataset):
+    X_batches, y_batches = zip(*dataset)
+    return np.concatenate(X_batches), np.concatenate(y_batches)
+
+
+@pytest.mark.parametrize('time_steps, batch_size', [(10, 32), (1, 7), (50, 200)])
+def test_windows_match_create_sequences(data, time_steps, batch_size):
+    X, y = data
+    X_seq, y_seq = create_sequences(X, y, time_steps)
+    dataset = SequenceDataset(X, y, time_steps, batch_size)
+
+    assert dataset.shape == X_seq.shape
+    assert len(dataset) == -(-len(X_seq) // batch_size)
+    X_all, y_all = batches(dataset)
+    np.testing.assert_array_equal(X_all, X_seq)
+    np.testing.assert_array_equal(y_all, y_seq)
+    np.testing.assert_array_equal(dataset.targets(), y_seq)
+
+
+def test_shuffled_epochs_hold_the_same_windows(data):
+    X, y = data
+    X_seq, y_seq = create_sequences(X, y, 10)
+    dataset = SequenceDataset(X, y, 10, 32, shuffle=True, seed=0)
+
+    orders = []
+    for _ in range(2):
+        X_all, y_all = batches(dataset)
+        # Each window is still paired with its own target
+        order = dataset.order.copy()
+        np.testing.assert_array_equal(X_all, X_seq[order])
+        np.testing.assert_array_equal(y_all, y_seq[order])
+        orders.append(order)
+        dataset.on_epoch_end()
+    assert sorted(orders[0]) == list(range(len(X_seq)))
+    assert not np.array_equal(orders[0], orders[1])
+
+
+def test_windows_stay_inside_each_series():
+    rng = np.random.default_rng(7)
+    lengths = {(1, 1): 30, (1, 2): 8, (2, 1): 25}
+    frame = pd.concat([
+        pd.DataFrame({'Store': store, 'Dept': dept, 'date': pd.date_range('2011-01-07', periods=n, freq='7D'),
+                      'x': rng.standard_normal(n), 'Weekly_Sales': rng.standard_normal(n)})
+        for (store, dept), n in lengths.items()
+    ])
+    # Rows out of order, as they might come from a file
+    frame = frame.sample(frac=1, random_state=0)
+    dataset = SequenceDataset.from_frame(frame, ['x'], time_steps=10, batch_size=16)
+
+    expected_X, expected_y = [], []
+    for _, series in frame.sort_values(['Store', 'Dept', 'date']).groupby(['Store', 'Dept']):
+        if len(series) > 10:
+            X_seq, y_seq = create_sequences(series[['x']].to_numpy(), series['Weekly_Sales'].to_numpy(), 10)
+            expected_X.append(X_seq)
+            expected_y.append(y_seq)
+    X_all, y_all = batches(dataset)
+    np.testing.assert_array_equal(X_all, np.concatenate(expected_X))
+    np.testing.assert_array_equal(y_all, np.concatenate(expected_y))
@@ -0,0 +1,125 @@
+"""The scoring service batches concurrent requests and answers bad ones with 4xx replies."""
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+from xgboost import XGBRegressor
+
+from feature_transformer import FeatureTransformer, ModelBundle
+from preprocessing import encode_record, model_feature_order
+from serve import MAX_BODY_BYTES, MicroBatcher, PredictionServer
+
+RECORD = {'Store': 1, 'Dept': 1, 'Holiday_Flag': 0, 'Temperature': 60.0, 'Fuel_Price': 3.0, 'CPI': 200.0,
+          'Unemployment': 8.0, 'Type': 'A', 'Size': 150000, 'IsPromoWeek': 0, 'date': '2011-06-10'}
+
+
+@pytest.fixture(scope='module')
+def bundle():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, (500, len(model_feature_order)))
+    model = XGBRegressor(n_estimators=10, max_depth=3).fit(X, X[:, 0] * 10 + X[:, 3])
+    quantile_model = XGBRegressor(n_estimators=10, max_depth=3, objective='reg:quantileerror',
+                                  quantile_alpha=np.array([0.1, 0.9])).fit(X, X[:, 0] * 10 + X[:, 3])
+    return ModelBundle(model, FeatureTransformer(), quantile_model, (0.1, 0.9))
+
+
+def point_bundle(bundle):
+    return ModelBundle(bundle.model, bundle.transformer)
+
+
+async def with_batcher(batcher, coroutine):
+    task = asyncio.create_task(batcher.run())
+    try:
+        return await coroutine
+    finally:
+        task.cancel()
+
+
+def test_batch_is_sent_when_full(bundle):
+    batcher = MicroBatcher(point_bundle(bundle), max_batch_size=4, max_latency_ms=10_000)
+    rows = [encode_record(dict(RECORD, Store=store)) for store in range(1, 9)]
+
+    start = time.perf_counter()
+    predictions = asyncio.run(with_batcher(batcher, batcher.predict(rows)))
+    # Two full batches, so neither waits for the 10 s deadline
+    assert time.perf_counter() - start < 5
+    assert (batcher.batches, batcher.rows) == (2, 8)
+    np.testing.assert_allclose(predictions, batcher.model.predict_encoded(np.array(rows)), rtol=1e-6)
+
+
+def test_partial_batch_is_sent_at_the_deadline(bundle):
+    batcher = MicroBatcher(point_bundle(bundle), max_batch_size=256, max_latency_ms=50)
+    row = encode_record(RECORD)
+
+    async def concurrent_requests():
+        return await asyncio.gather(*(batcher.predict([row]) for _ in range(3)))
+
+    start = time.perf_counter()
+    predictions = asyncio.run(with_batcher(batcher, concurrent_requests()))
+    assert time.perf_counter() - start >= 0.05
+    # The three requests share one predict call
+    assert (batcher.batches, batcher.rows) == (1, 3)
+    assert len({p[0] for p in predictions}) == 1
+
+
+def request(server, method, path, body=b''):
+    return asyncio.run(with_batcher(server.batcher, server.route(method, path, body)))
+
+
+def test_predict_returns_predictions_and_intervals(bundle):
+    server = PredictionServer(MicroBatcher(bundle, max_latency_ms=1), 'model.ubj')
+    status, payload = request(server, 'POST', '/predict', json.dumps({'instances': [RECORD, RECORD]}))
+    assert status == 200
+    predictions, bands = bundle.predict_encoded_intervals(np.array([encode_record(RECORD)] * 2))
+    np.testing.assert_allclose(payload['predictions'], predictions, rtol=1e-6)
+    assert [sorted(band) for band in payload['intervals']] == [['P10', 'P90']] * 2
+
+
+@pytest.mark.parametrize('method, path, body, status, error', [
+    ('POST', '/predict', b'{"Store": ', 400, 'Body must be valid JSON'),
+    ('POST', '/predict', json.dumps({'instances': []}), 400, 'Expected a record'),
+    ('POST', '/predict', json.dumps([RECORD, 'not a record']), 400, 'Expected a record'),
+    ('POST', '/predict', json.dumps(dict(RECORD, Store=99)), 400, 'Invalid input'),
+    ('POST', '/predict', json.dumps(dict(RECORD, Type=['A'])), 400, 'Invalid input'),
+    ('POST', '/predict', json.dumps({k: v for k, v in RECORD.items() if k != 'CPI'}), 400, 'Invalid input'),
+    ('GET', '/predict', b'', 405, 'Use POST'),
+    ('POST', '/health', b'', 405, 'Use GET'),
+    ('GET', '/nowhere', b'', 404, 'Unknown path'),
+], ids=['bad-json', 'no-instances', 'not-a-dict', 'out-of-range', 'unhashable-type', 'missing-feature',
+        'get-predict', 'post-health', 'unknown-path'])
+def test_bad_requests_get_4xx(bundle, method, path, body, status, error):
+    server = PredictionServer(MicroBatcher(bundle, max_latency_ms=1), 'model.ubj')
+    reply_status, payload = request(server, method, path, body)
+    assert reply_status == status
+    assert payload['error'].startswith(error)
+
+
+async def read_reply(reader):
+    """Status line of one HTTP reply; the rest of the reply is read and dropped."""
+    status_line = await reader.readline()
+    headers = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').lower()
+    length = int(headers.split('content-length:')[1].split('\r\n')[0])
+    await reader.readexactly(length)
+    return status_line.decode('latin-1').strip()
+
+
+def test_oversized_body_gets_413_over_http(bundle):
+    server = PredictionServer(MicroBatcher(bundle, max_latency_ms=1), 'model.ubj')
+    body = json.dumps(RECORD).encode()
+
+    async def exchange():
+        tcp_server = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        async with tcp_server:
+            reader, writer = await asyncio.open_connection(*tcp_server.sockets[0].getsockname())
+            # A valid request on a keep-alive connection, then one that is too large
+            writer.write(b'POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+            writer.write(b'POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (MAX_BODY_BYTES + 1))
+            await writer.drain()
+            replies = [await read_reply(reader), await read_reply(reader)]
+            writer.close()
+            return replies
+
+    replies = asyncio.run(with_batcher(server.batcher, exchange()))
+    assert replies == ['HTTP/1.1 200 OK', 'HTTP/1.1 413 Payload Too Large']
@@ -0,0 +1,31 @@
+"""The compiled tree engine predicts what `XGBRegressor.predict` does."""
+import numpy as np
+import pytest
+from xgboost import XGBRegressor
+
+from preprocessing import model_feature_order
+from tree_engine import CompiledTreeEngine, check_parity
+
+
+def training_data(n_rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, len(model_feature_order))).astype(np.float32)
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + X[:, 2] * X[:, 3] + rng.normal(0, 0.1, n_rows)
+    # Missing values must follow each split's default direction
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize('params', [
+    {'objective': 'reg:squarederror'},
+    {'objective': 'reg:quantileerror', 'quantile_alpha': np.array([0.1, 0.5, 0.9])},
+], ids=['point', 'quantile'])
+def test_compiled_engine_matches_xgboost(params):
+    X, y = training_data()
+    # Early stopping, so the engine has to stop at best_iteration like model.predict
+    model = XGBRegressor(n_estimators=300, max_depth=6, learning_rate=0.5, early_stopping_rounds=5, **params)
+    model.fit(X[:1500], y[:1500], eval_set=[(X[1500:], y[1500:])], verbose=False)
+
+    engine = CompiledTreeEngine.from_model(model)
+    check_parity(model, X, engine)
+    check_parity(model, X[:1], engine)